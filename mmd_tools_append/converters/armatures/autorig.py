@@ -7,6 +7,7 @@ from typing import Dict, Iterable, Tuple
 import bpy
 from mathutils import Euler, Matrix, Vector
 
+from ...editors.armatures import EditBonePlan, PoseMatrixSolver
 from .mmd import MMDBoneInfo
 from .mmd_bind import (
     ControlType,
@@ -203,258 +204,269 @@ class AutoRigArmatureObject(MMDBindArmatureObjectABC):
     def leg_r_mmd_autorig(self, value):
         self._set_property(ControlType.LEG_R_MMD_MMD_APPEND, value)
 
-    def _add_upper_arm_twist_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
+    def _add_upper_arm_twist_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
         # add upper arm twist (腕捩)
-        upper_arm_twist_fk_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_upper_arm_twist_fk.l")
-        self.bone_collections["Main"].assign(upper_arm_twist_fk_l_bone)
-        upper_arm_twist_fk_l_bone.head = rig_edit_bones["c_arm_fk.l"].tail - rig_edit_bones["c_arm_fk.l"].vector / 3
-        upper_arm_twist_fk_l_bone.tail = rig_edit_bones["c_arm_fk.l"].tail
-        upper_arm_twist_fk_l_bone.parent = rig_edit_bones["c_arm_fk.l"]
-        self.fit_edit_bone_rotation(upper_arm_twist_fk_l_bone, rig_edit_bones["c_arm_fk.l"])
-        rig_edit_bones["c_forearm_fk.l"].use_connect = False
-        rig_edit_bones["c_forearm_fk.l"].parent = upper_arm_twist_fk_l_bone
-
-        upper_arm_twist_fk_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_upper_arm_twist_fk.r")
-        self.bone_collections["Main"].assign(upper_arm_twist_fk_r_bone)
-        upper_arm_twist_fk_r_bone.head = rig_edit_bones["c_arm_fk.r"].tail - rig_edit_bones["c_arm_fk.r"].vector / 3
-        upper_arm_twist_fk_r_bone.tail = rig_edit_bones["c_arm_fk.r"].tail
-        upper_arm_twist_fk_r_bone.parent = rig_edit_bones["c_arm_fk.r"]
-        self.fit_edit_bone_rotation(upper_arm_twist_fk_r_bone, rig_edit_bones["c_arm_fk.r"])
-        rig_edit_bones["c_forearm_fk.r"].use_connect = False
-        rig_edit_bones["c_forearm_fk.r"].parent = upper_arm_twist_fk_r_bone
+        upper_arm_twist_fk_l_bone = plan.get_or_create_bone("mmd_append_upper_arm_twist_fk.l")
+        plan.assign("Main", upper_arm_twist_fk_l_bone)
+        plan.set(
+            upper_arm_twist_fk_l_bone,
+            head=plan.tail("c_arm_fk.l") - plan.vector("c_arm_fk.l") / 3,
+            tail=plan.tail("c_arm_fk.l"),
+        )
+        plan.set_parent(upper_arm_twist_fk_l_bone, "c_arm_fk.l")
+        plan.fit_rotation(upper_arm_twist_fk_l_bone, "c_arm_fk.l")
+        plan.set("c_forearm_fk.l", use_connect=False)
+        plan.set_parent("c_forearm_fk.l", upper_arm_twist_fk_l_bone)
+
+        upper_arm_twist_fk_r_bone = plan.get_or_create_bone("mmd_append_upper_arm_twist_fk.r")
+        plan.assign("Main", upper_arm_twist_fk_r_bone)
+        plan.set(
+            upper_arm_twist_fk_r_bone,
+            head=plan.tail("c_arm_fk.r") - plan.vector("c_arm_fk.r") / 3,
+            tail=plan.tail("c_arm_fk.r"),
+        )
+        plan.set_parent(upper_arm_twist_fk_r_bone, "c_arm_fk.r")
+        plan.fit_rotation(upper_arm_twist_fk_r_bone, "c_arm_fk.r")
+        plan.set("c_forearm_fk.r", use_connect=False)
+        plan.set_parent("c_forearm_fk.r", upper_arm_twist_fk_r_bone)
 
         return upper_arm_twist_fk_l_bone, upper_arm_twist_fk_r_bone
 
-    def _add_wrist_twist_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
+    def _add_wrist_twist_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
         # add wrist twist (手捩)
-        wrist_twist_fk_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_wrist_twist_fk.l")
-        self.bone_collections["Main"].assign(wrist_twist_fk_l_bone)
-        wrist_twist_fk_l_bone.head = rig_edit_bones["c_forearm_fk.l"].tail - rig_edit_bones["c_forearm_fk.l"].vector / 3
-        wrist_twist_fk_l_bone.tail = rig_edit_bones["c_forearm_fk.l"].tail
-        wrist_twist_fk_l_bone.parent = rig_edit_bones["c_forearm_fk.l"]
-        self.fit_edit_bone_rotation(wrist_twist_fk_l_bone, rig_edit_bones["c_forearm_fk.l"])
-        rig_edit_bones["c_hand_fk.l"].use_connect = False
-        rig_edit_bones["c_hand_fk.l"].parent = wrist_twist_fk_l_bone
-
-        wrist_twist_fk_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_wrist_twist_fk.r")
-        self.bone_collections["Main"].assign(wrist_twist_fk_r_bone)
-        wrist_twist_fk_r_bone.head = rig_edit_bones["c_forearm_fk.r"].tail - rig_edit_bones["c_forearm_fk.r"].vector / 3
-        wrist_twist_fk_r_bone.tail = rig_edit_bones["c_forearm_fk.r"].tail
-        wrist_twist_fk_r_bone.parent = rig_edit_bones["c_forearm_fk.r"]
-        self.fit_edit_bone_rotation(wrist_twist_fk_r_bone, rig_edit_bones["c_forearm_fk.r"])
-        rig_edit_bones["c_hand_fk.r"].use_connect = False
-        rig_edit_bones["c_hand_fk.r"].parent = wrist_twist_fk_r_bone
+        wrist_twist_fk_l_bone = plan.get_or_create_bone("mmd_append_wrist_twist_fk.l")
+        plan.assign("Main", wrist_twist_fk_l_bone)
+        plan.set(
+            wrist_twist_fk_l_bone,
+            head=plan.tail("c_forearm_fk.l") - plan.vector("c_forearm_fk.l") / 3,
+            tail=plan.tail("c_forearm_fk.l"),
+        )
+        plan.set_parent(wrist_twist_fk_l_bone, "c_forearm_fk.l")
+        plan.fit_rotation(wrist_twist_fk_l_bone, "c_forearm_fk.l")
+        plan.set("c_hand_fk.l", use_connect=False)
+        plan.set_parent("c_hand_fk.l", wrist_twist_fk_l_bone)
+
+        wrist_twist_fk_r_bone = plan.get_or_create_bone("mmd_append_wrist_twist_fk.r")
+        plan.assign("Main", wrist_twist_fk_r_bone)
+        plan.set(
+            wrist_twist_fk_r_bone,
+            head=plan.tail("c_forearm_fk.r") - plan.vector("c_forearm_fk.r") / 3,
+            tail=plan.tail("c_forearm_fk.r"),
+        )
+        plan.set_parent(wrist_twist_fk_r_bone, "c_forearm_fk.r")
+        plan.fit_rotation(wrist_twist_fk_r_bone, "c_forearm_fk.r")
+        plan.set("c_hand_fk.r", use_connect=False)
+        plan.set_parent("c_hand_fk.r", wrist_twist_fk_r_bone)
 
         return wrist_twist_fk_l_bone, wrist_twist_fk_r_bone
 
-    def _add_leg_ik_parent_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
+    def _add_leg_ik_parent_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
         # add Leg IKP (足IK親) bones
-        leg_ik_parent_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_leg_ik_parent.l")
-        self.bone_collections["Main"].assign(leg_ik_parent_l_bone)
-        leg_ik_parent_l_bone.tail = rig_edit_bones["foot.l"].head
-        leg_ik_parent_l_bone.head = leg_ik_parent_l_bone.tail.copy()
-        leg_ik_parent_l_bone.head.z = rig_edit_bones["foot.l"].tail.z
-        leg_ik_parent_l_bone.roll = 0
-
-        leg_ik_parent_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_leg_ik_parent.r")
-        self.bone_collections["Main"].assign(leg_ik_parent_r_bone)
-        leg_ik_parent_r_bone.tail = rig_edit_bones["foot.r"].head
-        leg_ik_parent_r_bone.head = leg_ik_parent_r_bone.tail.copy()
-        leg_ik_parent_r_bone.head.z = rig_edit_bones["foot.r"].tail.z
-        leg_ik_parent_r_bone.roll = 0
-
-        leg_ik_parent_l_bone.parent = rig_edit_bones["c_pos"]
-        rig_edit_bones["c_foot_ik.l"].parent = leg_ik_parent_l_bone
-
-        leg_ik_parent_r_bone.parent = rig_edit_bones["c_pos"]
-        rig_edit_bones["c_foot_ik.r"].parent = leg_ik_parent_r_bone
+        leg_ik_parent_l_bone = plan.get_or_create_bone("mmd_append_leg_ik_parent.l")
+        plan.assign("Main", leg_ik_parent_l_bone)
+        leg_ik_parent_l_tail = plan.head("foot.l")
+        leg_ik_parent_l_head = leg_ik_parent_l_tail.copy()
+        leg_ik_parent_l_head.z = plan.tail("foot.l").z
+        plan.set(leg_ik_parent_l_bone, head=leg_ik_parent_l_head, tail=leg_ik_parent_l_tail, roll=0)
+
+        leg_ik_parent_r_bone = plan.get_or_create_bone("mmd_append_leg_ik_parent.r")
+        plan.assign("Main", leg_ik_parent_r_bone)
+        leg_ik_parent_r_tail = plan.head("foot.r")
+        leg_ik_parent_r_head = leg_ik_parent_r_tail.copy()
+        leg_ik_parent_r_head.z = plan.tail("foot.r").z
+        plan.set(leg_ik_parent_r_bone, head=leg_ik_parent_r_head, tail=leg_ik_parent_r_tail, roll=0)
+
+        plan.set_parent(leg_ik_parent_l_bone, "c_pos")
+        plan.set_parent("c_foot_ik.l", leg_ik_parent_l_bone)
+
+        plan.set_parent(leg_ik_parent_r_bone, "c_pos")
+        plan.set_parent("c_foot_ik.r", leg_ik_parent_r_bone)
 
         #
 
-        rig_edit_bones["c_leg_pole.l"].roll = 0
-        rig_edit_bones["c_leg_pole.r"].roll = 0
+        plan.set("c_leg_pole.l", roll=0)
+        plan.set("c_leg_pole.r", roll=0)
 
         return leg_ik_parent_l_bone, leg_ik_parent_r_bone
 
-    def _add_toe_ik_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
+    def _add_toe_ik_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
         # add toe IK (つま先ＩＫ)
-        toe_ik_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_toe_ik.l")
-        self.bone_collections["Main"].assign(toe_ik_l_bone)
-        toe_ik_l_bone.head = rig_edit_bones["foot.l"].tail
-        toe_ik_l_bone.tail = toe_ik_l_bone.head - Vector([0, 0, rig_edit_bones["mmd_append_leg_ik_parent.l"].length])
-        toe_ik_l_bone.parent = rig_edit_bones["c_foot_ik.l"]
-        self.fit_edit_bone_rotation(toe_ik_l_bone, rig_edit_bones["c_foot_ik.l"])
-
-        toe_ik_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_toe_ik.r")
-        self.bone_collections["Main"].assign(toe_ik_r_bone)
-        toe_ik_r_bone.head = rig_edit_bones["foot.r"].tail
-        toe_ik_r_bone.tail = toe_ik_r_bone.head - Vector([0, 0, rig_edit_bones["mmd_append_leg_ik_parent.r"].length])
-        toe_ik_r_bone.parent = rig_edit_bones["c_foot_ik.r"]
-        self.fit_edit_bone_rotation(toe_ik_r_bone, rig_edit_bones["c_foot_ik.r"])
+        toe_ik_l_bone = plan.get_or_create_bone("mmd_append_toe_ik.l")
+        plan.assign("Main", toe_ik_l_bone)
+        toe_ik_l_head = plan.tail("foot.l")
+        plan.set(toe_ik_l_bone, head=toe_ik_l_head, tail=toe_ik_l_head - Vector([0, 0, plan.length("mmd_append_leg_ik_parent.l")]))
+        plan.set_parent(toe_ik_l_bone, "c_foot_ik.l")
+        plan.fit_rotation(toe_ik_l_bone, "c_foot_ik.l")
+
+        toe_ik_r_bone = plan.get_or_create_bone("mmd_append_toe_ik.r")
+        plan.assign("Main", toe_ik_r_bone)
+        toe_ik_r_head = plan.tail("foot.r")
+        plan.set(toe_ik_r_bone, head=toe_ik_r_head, tail=toe_ik_r_head - Vector([0, 0, plan.length("mmd_append_leg_ik_parent.r")]))
+        plan.set_parent(toe_ik_r_bone, "c_foot_ik.r")
+        plan.fit_rotation(toe_ik_r_bone, "c_foot_ik.r")
 
         return toe_ik_l_bone, toe_ik_r_bone
 
-    def _add_eye_fk_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone, bpy.types.EditBone]:
-        rig_eyes_fk_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_eyes_fk")
-        rig_eyes_fk_bone.head = rig_edit_bones["head.x"].tail + rig_edit_bones["head.x"].vector
-        rig_eyes_fk_bone.head.y = rig_edit_bones["c_eye.l"].head.y
-        rig_eyes_fk_bone.tail = rig_eyes_fk_bone.head - Vector([0, rig_edit_bones["c_eye.l"].length * 2, 0])
-        self.bone_collections["Main"].assign(rig_eyes_fk_bone)
-        rig_eyes_fk_bone.parent = rig_edit_bones["c_skull_02.x"]
-        self.fit_edit_bone_rotation(rig_eyes_fk_bone, rig_edit_bones["c_eye.l"])
-
-        rig_eye_fk_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_eye_fk.l")
-        rig_eye_fk_l_bone.head = rig_edit_bones["c_eye.l"].head
-        rig_eye_fk_l_bone.tail = rig_edit_bones["c_eye.l"].tail
-        self.bone_collections["Main"].assign(rig_eye_fk_l_bone)
-        rig_eye_fk_l_bone.parent = rig_edit_bones["c_eye_offset.l"]
-        self.fit_edit_bone_rotation(rig_eye_fk_l_bone, rig_edit_bones["c_eye.l"])
-
-        rig_eye_fk_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_eye_fk.r")
-        rig_eye_fk_r_bone.head = rig_edit_bones["c_eye.r"].head
-        rig_eye_fk_r_bone.tail = rig_edit_bones["c_eye.r"].tail
-        self.bone_collections["Main"].assign(rig_eye_fk_r_bone)
-        rig_eye_fk_r_bone.parent = rig_edit_bones["c_eye_offset.r"]
-        self.fit_edit_bone_rotation(rig_eye_fk_r_bone, rig_edit_bones["c_eye.r"])
+    def _add_eye_fk_bones(self, plan: EditBonePlan) -> Tuple[str, str, str]:
+        rig_eyes_fk_bone = plan.get_or_create_bone("mmd_append_eyes_fk")
+        rig_eyes_fk_head = plan.tail("head.x") + plan.vector("head.x")
+        rig_eyes_fk_head.y = plan.head("c_eye.l").y
+        plan.set(rig_eyes_fk_bone, head=rig_eyes_fk_head, tail=rig_eyes_fk_head - Vector([0, plan.length("c_eye.l") * 2, 0]))
+        plan.assign("Main", rig_eyes_fk_bone)
+        plan.set_parent(rig_eyes_fk_bone, "c_skull_02.x")
+        plan.fit_rotation(rig_eyes_fk_bone, "c_eye.l")
+
+        rig_eye_fk_l_bone = plan.get_or_create_bone("mmd_append_eye_fk.l")
+        plan.set(rig_eye_fk_l_bone, head=plan.head("c_eye.l"), tail=plan.tail("c_eye.l"))
+        plan.assign("Main", rig_eye_fk_l_bone)
+        plan.set_parent(rig_eye_fk_l_bone, "c_eye_offset.l")
+        plan.fit_rotation(rig_eye_fk_l_bone, "c_eye.l")
+
+        rig_eye_fk_r_bone = plan.get_or_create_bone("mmd_append_eye_fk.r")
+        plan.set(rig_eye_fk_r_bone, head=plan.head("c_eye.r"), tail=plan.tail("c_eye.r"))
+        plan.assign("Main", rig_eye_fk_r_bone)
+        plan.set_parent(rig_eye_fk_r_bone, "c_eye_offset.r")
+        plan.fit_rotation(rig_eye_fk_r_bone, "c_eye.r")
 
         return rig_eye_fk_l_bone, rig_eye_fk_r_bone, rig_eyes_fk_bone
 
-    def _adjust_torso_bone(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> bpy.types.EditBone:
-        thigh_center = self.to_center(rig_edit_bones["thigh.l"].head, rig_edit_bones["thigh.r"].head)
-        length = rig_edit_bones["root.x"].length / 2
-        rig_edit_bones["c_root_master.x"].head = Vector([0, rig_edit_bones["root.x"].head.y + length, thigh_center.z + length])
-        rig_edit_bones["c_root_master.x"].tail = rig_edit_bones["root.x"].head
-        rig_edit_bones["c_root_master.x"].roll = 0
+    def _adjust_torso_bone(self, plan: EditBonePlan) -> str:
+        thigh_center = self.to_center(plan.head("thigh.l"), plan.head("thigh.r"))
+        length = plan.length("root.x") / 2
+        plan.set(
+            "c_root_master.x",
+            head=Vector([0, plan.head("root.x").y + length, thigh_center.z + length]),
+            tail=plan.head("root.x"),
+            roll=0,
+        )
 
-        return rig_edit_bones["c_root_master.x"]
+        return "c_root_master.x"
 
-    def _add_root_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
+    def _add_root_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
         # add center (センター) bone
-        center_bone = self.get_or_create_bone(rig_edit_bones, "c_traj")
+        center_bone = plan.get_or_create_bone("c_traj")
 
         # add groove (グルーブ) bone
-        groove_bone = self.get_or_create_bone(rig_edit_bones, "groove")
-        self.bone_collections["Main"].assign(groove_bone)
-        groove_bone.head = center_bone.head
-        groove_bone.tail = groove_bone.head + Vector([0.0, 0.0, center_bone.length])
-        groove_bone.roll = 0
+        groove_bone = plan.get_or_create_bone("groove")
+        plan.assign("Main", groove_bone)
+        groove_head = plan.head(center_bone)
+        plan.set(groove_bone, head=groove_head, tail=groove_head + Vector([0.0, 0.0, plan.length(center_bone)]), roll=0)
 
         return center_bone, groove_bone
 
-    def _add_shoulder_parent_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
-        shoulder_parent_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_parent.l")
-        shoulder_parent_l_bone.head = rig_edit_bones["c_shoulder.l"].head
-        shoulder_parent_l_bone.tail = shoulder_parent_l_bone.head + Vector([0, 0, rig_edit_bones["c_shoulder.l"].length / 2])
-        self.bone_collections["Main"].assign(shoulder_parent_l_bone)
-        shoulder_parent_l_bone.parent = rig_edit_bones["c_spine_02.x"]
-        shoulder_parent_l_bone.roll = 0
+    def _add_shoulder_parent_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
+        shoulder_parent_l_bone = plan.get_or_create_bone("mmd_append_shoulder_parent.l")
+        shoulder_parent_l_head = plan.head("c_shoulder.l")
+        plan.set(shoulder_parent_l_bone, head=shoulder_parent_l_head, tail=shoulder_parent_l_head + Vector([0, 0, plan.length("c_shoulder.l") / 2]))
+        plan.assign("Main", shoulder_parent_l_bone)
+        plan.set_parent(shoulder_parent_l_bone, "c_spine_02.x")
+        plan.set(shoulder_parent_l_bone, roll=0)
 
-        rig_edit_bones["c_shoulder.l"].parent = shoulder_parent_l_bone
+        plan.set_parent("c_shoulder.l", shoulder_parent_l_bone)
 
-        shoulder_parent_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_parent.r")
-        shoulder_parent_r_bone.head = rig_edit_bones["c_shoulder.r"].head
-        shoulder_parent_r_bone.tail = shoulder_parent_r_bone.head + Vector([0, 0, rig_edit_bones["c_shoulder.r"].length / 2])
-        self.bone_collections["Main"].assign(shoulder_parent_r_bone)
-        shoulder_parent_r_bone.parent = rig_edit_bones["c_spine_02.x"]
-        shoulder_parent_r_bone.roll = 0
+        shoulder_parent_r_bone = plan.get_or_create_bone("mmd_append_shoulder_parent.r")
+        shoulder_parent_r_head = plan.head("c_shoulder.r")
+        plan.set(shoulder_parent_r_bone, head=shoulder_parent_r_head, tail=shoulder_parent_r_head + Vector([0, 0, plan.length("c_shoulder.r") / 2]))
+        plan.assign("Main", shoulder_parent_r_bone)
+        plan.set_parent(shoulder_parent_r_bone, "c_spine_02.x")
+        plan.set(shoulder_parent_r_bone, roll=0)
 
-        rig_edit_bones["c_shoulder.r"].parent = shoulder_parent_r_bone
+        plan.set_parent("c_shoulder.r", shoulder_parent_r_bone)
 
         return shoulder_parent_l_bone, shoulder_parent_r_bone
 
-    def _add_shoulder_cancel_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
-        shoulder_cancel_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel.l")
-        shoulder_cancel_l_bone.head = rig_edit_bones["c_shoulder.l"].tail
-        shoulder_cancel_l_bone.tail = shoulder_cancel_l_bone.head + Vector([0, 0, rig_edit_bones["c_shoulder.l"].length / 2])
-        self.bone_collections["Main"].assign(shoulder_cancel_l_bone)
-        shoulder_cancel_l_bone.roll = 0
+    def _add_shoulder_cancel_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
+        shoulder_cancel_l_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel.l")
+        shoulder_cancel_l_head = plan.tail("c_shoulder.l")
+        plan.set(shoulder_cancel_l_bone, head=shoulder_cancel_l_head, tail=shoulder_cancel_l_head + Vector([0, 0, plan.length("c_shoulder.l") / 2]))
+        plan.assign("Main", shoulder_cancel_l_bone)
+        plan.set(shoulder_cancel_l_bone, roll=0)
 
-        shoulder_cancel_l_bone.parent = rig_edit_bones["c_shoulder.l"]
-        rig_edit_bones["c_arm_fk.l"].parent = shoulder_cancel_l_bone
+        plan.set_parent(shoulder_cancel_l_bone, "c_shoulder.l")
+        plan.set_parent("c_arm_fk.l", shoulder_cancel_l_bone)
 
-        shoulder_cancel_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel.r")
-        shoulder_cancel_r_bone.head = rig_edit_bones["c_shoulder.r"].tail
-        shoulder_cancel_r_bone.tail = shoulder_cancel_r_bone.head + Vector([0, 0, rig_edit_bones["c_shoulder.r"].length / 2])
-        self.bone_collections["Main"].assign(shoulder_cancel_r_bone)
-        shoulder_cancel_r_bone.roll = 0
+        shoulder_cancel_r_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel.r")
+        shoulder_cancel_r_head = plan.tail("c_shoulder.r")
+        plan.set(shoulder_cancel_r_bone, head=shoulder_cancel_r_head, tail=shoulder_cancel_r_head + Vector([0, 0, plan.length("c_shoulder.r") / 2]))
+        plan.assign("Main", shoulder_cancel_r_bone)
+        plan.set(shoulder_cancel_r_bone, roll=0)
 
-        shoulder_cancel_r_bone.parent = rig_edit_bones["c_shoulder.r"]
-        rig_edit_bones["c_arm_fk.r"].parent = rig_edit_bones["c_shoulder.r"]
+        plan.set_parent(shoulder_cancel_r_bone, "c_shoulder.r")
+        plan.set_parent("c_arm_fk.r", "c_shoulder.r")
 
         return shoulder_cancel_l_bone, shoulder_cancel_r_bone
 
-    def _add_shoulder_cancel_dummy_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
-        shoulder_cancel_dummy_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel_dummy.l")
-        shoulder_cancel_dummy_l_bone.head = rig_edit_bones["c_shoulder.l"].head
-        shoulder_cancel_dummy_l_bone.tail = shoulder_cancel_dummy_l_bone.head + Vector([0, 0, rig_edit_bones["c_shoulder.l"].length / 2])
-        self.bone_collections["mmd_dummy"].assign(shoulder_cancel_dummy_l_bone)
-        shoulder_cancel_dummy_l_bone.parent = rig_edit_bones["mmd_append_shoulder_parent.l"]
-        shoulder_cancel_dummy_l_bone.roll = 0
-
-        shoulder_cancel_dummy_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel_dummy.r")
-        shoulder_cancel_dummy_r_bone.head = rig_edit_bones["c_shoulder.r"].head
-        shoulder_cancel_dummy_r_bone.tail = shoulder_cancel_dummy_r_bone.head + Vector([0, 0, rig_edit_bones["c_shoulder.r"].length / 2])
-        self.bone_collections["mmd_dummy"].assign(shoulder_cancel_dummy_r_bone)
-        shoulder_cancel_dummy_r_bone.parent = rig_edit_bones["mmd_append_shoulder_parent.r"]
-        shoulder_cancel_dummy_r_bone.roll = 0
+    def _add_shoulder_cancel_dummy_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
+        shoulder_cancel_dummy_l_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel_dummy.l")
+        shoulder_cancel_dummy_l_head = plan.head("c_shoulder.l")
+        plan.set(shoulder_cancel_dummy_l_bone, head=shoulder_cancel_dummy_l_head, tail=shoulder_cancel_dummy_l_head + Vector([0, 0, plan.length("c_shoulder.l") / 2]))
+        plan.assign("mmd_dummy", shoulder_cancel_dummy_l_bone)
+        plan.set_parent(shoulder_cancel_dummy_l_bone, "mmd_append_shoulder_parent.l")
+        plan.set(shoulder_cancel_dummy_l_bone, roll=0)
+
+        shoulder_cancel_dummy_r_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel_dummy.r")
+        shoulder_cancel_dummy_r_head = plan.head("c_shoulder.r")
+        plan.set(shoulder_cancel_dummy_r_bone, head=shoulder_cancel_dummy_r_head, tail=shoulder_cancel_dummy_r_head + Vector([0, 0, plan.length("c_shoulder.r") / 2]))
+        plan.assign("mmd_dummy", shoulder_cancel_dummy_r_bone)
+        plan.set_parent(shoulder_cancel_dummy_r_bone, "mmd_append_shoulder_parent.r")
+        plan.set(shoulder_cancel_dummy_r_bone, roll=0)
 
         return shoulder_cancel_dummy_l_bone, shoulder_cancel_dummy_r_bone
 
-    def _add_shoulder_cancel_shadow_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
-        shoulder_cancel_shadow_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel_shadow.l")
-        shoulder_cancel_shadow_l_bone.head = rig_edit_bones["c_shoulder.l"].head
-        shoulder_cancel_shadow_l_bone.tail = shoulder_cancel_shadow_l_bone.head + Vector([0, 0, rig_edit_bones["c_shoulder.l"].length / 2])
-        self.bone_collections["mmd_shadow"].assign(shoulder_cancel_shadow_l_bone)
-        shoulder_cancel_shadow_l_bone.parent = rig_edit_bones["c_spine_02.x"]
-        shoulder_cancel_shadow_l_bone.roll = 0
-
-        shoulder_cancel_shadow_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel_shadow.r")
-        shoulder_cancel_shadow_r_bone.head = rig_edit_bones["c_shoulder.r"].head
-        shoulder_cancel_shadow_r_bone.tail = shoulder_cancel_shadow_r_bone.head + Vector([0, 0, rig_edit_bones["c_shoulder.r"].length / 2])
-        self.bone_collections["mmd_shadow"].assign(shoulder_cancel_shadow_r_bone)
-        shoulder_cancel_shadow_r_bone.parent = rig_edit_bones["c_spine_02.x"]
-        shoulder_cancel_shadow_r_bone.roll = 0
+    def _add_shoulder_cancel_shadow_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
+        shoulder_cancel_shadow_l_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel_shadow.l")
+        shoulder_cancel_shadow_l_head = plan.head("c_shoulder.l")
+        plan.set(shoulder_cancel_shadow_l_bone, head=shoulder_cancel_shadow_l_head, tail=shoulder_cancel_shadow_l_head + Vector([0, 0, plan.length("c_shoulder.l") / 2]))
+        plan.assign("mmd_shadow", shoulder_cancel_shadow_l_bone)
+        plan.set_parent(shoulder_cancel_shadow_l_bone, "c_spine_02.x")
+        plan.set(shoulder_cancel_shadow_l_bone, roll=0)
+
+        shoulder_cancel_shadow_r_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel_shadow.r")
+        shoulder_cancel_shadow_r_head = plan.head("c_shoulder.r")
+        plan.set(shoulder_cancel_shadow_r_bone, head=shoulder_cancel_shadow_r_head, tail=shoulder_cancel_shadow_r_head + Vector([0, 0, plan.length("c_shoulder.r") / 2]))
+        plan.assign("mmd_shadow", shoulder_cancel_shadow_r_bone)
+        plan.set_parent(shoulder_cancel_shadow_r_bone, "c_spine_02.x")
+        plan.set(shoulder_cancel_shadow_r_bone, roll=0)
 
         return shoulder_cancel_shadow_l_bone, shoulder_cancel_shadow_r_bone
 
     def imitate_mmd_bone_structure(self):
         # pylint: disable=too-many-statements
-        rig_edit_bones = self.edit_bones
-
         # Add MMD Bone Collections if they don't exist
         if "mmd_dummy" not in self.bone_collections:
             self.bone_collections.new("mmd_dummy")
         if "mmd_shadow" not in self.bone_collections:
             self.bone_collections.new("mmd_shadow")
 
+        plan = EditBonePlan(self.raw_armature)
+
         # add center (センター) groove (グルーブ) bone
-        center_bone, groove_bone = self._add_root_bones(rig_edit_bones)
+        center_bone, groove_bone = self._add_root_bones(plan)
 
         # set spine parent-child relationship
-        self.insert_edit_bone(groove_bone, center_bone)
+        plan.insert(groove_bone, center_bone)
 
-        self._add_shoulder_parent_bones(rig_edit_bones)
-        self._add_shoulder_cancel_bones(rig_edit_bones)
-        self._add_shoulder_cancel_dummy_bones(rig_edit_bones)
-        self._add_shoulder_cancel_shadow_bones(rig_edit_bones)
+        self._add_shoulder_parent_bones(plan)
+        self._add_shoulder_cancel_bones(plan)
+        self._add_shoulder_cancel_dummy_bones(plan)
+        self._add_shoulder_cancel_shadow_bones(plan)
 
-        self._add_upper_arm_twist_bones(rig_edit_bones)
+        self._add_upper_arm_twist_bones(plan)
 
-        self._add_wrist_twist_bones(rig_edit_bones)
+        self._add_wrist_twist_bones(plan)
 
-        self._add_leg_ik_parent_bones(rig_edit_bones)
+        self._add_leg_ik_parent_bones(plan)
 
-        self._add_toe_ik_bones(rig_edit_bones)
+        self._add_toe_ik_bones(plan)
 
         # adjust torso bone
-        self._adjust_torso_bone(rig_edit_bones)
+        self._adjust_torso_bone(plan)
 
         # set face bones
-        if not self.has_face_bones():
-            # There are not enough bones for the setup.
-            return
+        if self.has_face_bones():
+            self._add_eye_fk_bones(plan)
 
-        self._add_eye_fk_bones(rig_edit_bones)
+        plan.apply()
 
     def imitate_mmd_pose_behavior(self):
         """Imitate the behavior of MMD armature as much as possible."""
@@ -776,11 +788,36 @@ class AutoRigArmatureObject(MMDBindArmatureObjectABC):
         # pylint: disable=too-many-arguments, too-many-locals
         pose_bones = self.pose_bones
 
-        def set_rotation(pose_bone: bpy.types.PoseBone, rotation_matrix: Matrix):
-            pose_bone.matrix = Matrix.Translation(pose_bone.matrix.to_translation()) @ rotation_matrix
+        solver = PoseMatrixSolver(pose_bones)
+        solver.set_leader("foot.l", "c_foot_ik.l")
+        solver.set_leader("foot.r", "c_foot_ik.r")
+
+        def set_rotation(bone_name: str, rotation_matrix: Matrix):
+            solver.set_matrix(bone_name, Matrix.Translation(solver.matrix(bone_name).to_translation()) @ rotation_matrix)
+
+        def to_rotation_matrix(bone_name: str) -> Matrix:
+            return solver.matrix(bone_name).to_euler().to_matrix().to_4x4()
+
+        def head_x(bone_name: str) -> float:
+            return solver.matrix(bone_name).translation[0]
+
+        def x_axis(bone_name: str) -> Vector:
+            return solver.matrix(bone_name).col[0].xyz
+
+        def translate_location_x(bone_name: str, distance: float):
+            basis = solver.basis(bone_name)
+            basis[0][3] += distance
+            solver.set_basis(bone_name, basis)
+
+        def rotate_euler_y(bone_name: str, angle: float):
+            rotation_mode = pose_bones[bone_name].rotation_mode
+            if rotation_mode in {"QUATERNION", "AXIS_ANGLE"}:
+                return
 
-        def to_rotation_matrix(pose_bone: bpy.types.PoseBone) -> Matrix:
-            return pose_bone.matrix.to_euler().to_matrix().to_4x4()
+            location, rotation, scale = solver.basis(bone_name).decompose()
+            euler = rotation.to_euler(rotation_mode, pose_bones[bone_name].rotation_euler)
+            euler.y += angle
+            solver.set_basis(bone_name, Matrix.LocRotScale(location, euler, scale))
 
         arm_l_target_rotation = Euler([math.radians(+123 + 90), math.radians(0), math.radians(+90)]).to_matrix().to_4x4()
         hand_l_target_rotation = Euler([math.radians(-123 + 90), math.radians(0), math.radians(-90)]).to_matrix().to_4x4()
@@ -788,6 +825,8 @@ class AutoRigArmatureObject(MMDBindArmatureObjectABC):
         arm_r_target_rotation = Euler([math.radians(+123 - 270), math.radians(0), math.radians(-90)]).to_matrix().to_4x4()
         hand_r_target_rotation = Euler([math.radians(-123 + 90), math.radians(0), math.radians(+90)]).to_matrix().to_4x4()
 
+        # The arm and finger chains are solved parent first in the first iteration,
+        # the further iterations only converge the leg offsets measured on the IK chains.
         for _ in range(iterations):
             if pose_arms:
                 # arm.L
@@ -795,49 +834,49 @@ class AutoRigArmatureObject(MMDBindArmatureObjectABC):
                     "c_arm_fk.l",
                     "c_forearm_fk.l",
                 ]:
-                    set_rotation(pose_bones[bone_name], arm_l_target_rotation)
+                    set_rotation(bone_name, arm_l_target_rotation)
 
                 for bone_name in [
                     "c_hand_fk.l",
                 ]:
-                    set_rotation(pose_bones[bone_name], hand_l_target_rotation)
+                    set_rotation(bone_name, hand_l_target_rotation)
 
                 # arm.R
                 for bone_name in [
                     "c_arm_fk.r",
                     "c_forearm_fk.r",
                 ]:
-                    set_rotation(pose_bones[bone_name], arm_r_target_rotation)
+                    set_rotation(bone_name, arm_r_target_rotation)
 
                 for bone_name in [
                     "c_hand_fk.r",
                 ]:
-                    set_rotation(pose_bones[bone_name], hand_r_target_rotation)
+                    set_rotation(bone_name, hand_r_target_rotation)
 
             if pose_legs:
                 # foot.L
                 if "mmd_append_leg_ik_parent.l" in pose_bones:
-                    pose_bones["mmd_append_leg_ik_parent.l"].location.x += pose_bones["thigh.l"].head[0] - pose_bones["foot.l"].head[0]
+                    translate_location_x("mmd_append_leg_ik_parent.l", head_x("thigh.l") - head_x("foot.l"))
                 else:
-                    pose_bones["c_foot_ik.l"].location.x += pose_bones["thigh.l"].head[0] - pose_bones["c_foot_ik.l"].head[0]
+                    translate_location_x("c_foot_ik.l", head_x("thigh.l") - head_x("c_foot_ik.l"))
 
-                pose_bones["c_thigh_b.l"].rotation_euler.y -= math.radians(180) + math.atan2(*pose_bones["c_thigh_b.l"].x_axis[0:2])
-                pose_bones["c_foot_ik.l"].matrix = pose_bones["c_foot_ik.l"].matrix @ Matrix.Rotation(math.radians(180) + pose_bones["foot.l"].matrix.to_euler().z, 4, "Z")
-                pose_bones["c_leg_pole.l"].location.x += pose_bones["thigh.l"].head[0] - pose_bones["c_leg_pole.l"].head[0]
+                rotate_euler_y("c_thigh_b.l", -(math.radians(180) + math.atan2(*x_axis("c_thigh_b.l")[0:2])))
+                solver.set_matrix("c_foot_ik.l", solver.matrix("c_foot_ik.l") @ Matrix.Rotation(math.radians(180) + solver.matrix("foot.l").to_euler().z, 4, "Z"))
+                translate_location_x("c_leg_pole.l", head_x("thigh.l") - head_x("c_leg_pole.l"))
 
                 # foot.R
                 if "mmd_append_leg_ik_parent.r" in pose_bones:
-                    pose_bones["mmd_append_leg_ik_parent.r"].location.x += pose_bones["thigh.r"].head[0] - pose_bones["foot.r"].head[0]
+                    translate_location_x("mmd_append_leg_ik_parent.r", head_x("thigh.r") - head_x("foot.r"))
                 else:
-                    pose_bones["c_foot_ik.r"].location.x += pose_bones["thigh.r"].head[0] - pose_bones["c_foot_ik.r"].head[0]
+                    translate_location_x("c_foot_ik.r", head_x("thigh.r") - head_x("c_foot_ik.r"))
 
-                pose_bones["c_thigh_b.r"].rotation_euler.y -= math.radians(0) + math.atan2(*pose_bones["c_thigh_b.r"].x_axis[0:2])
-                pose_bones["c_foot_ik.r"].matrix = pose_bones["c_foot_ik.r"].matrix @ Matrix.Rotation(math.radians(180) + pose_bones["foot.r"].matrix.to_euler().z, 4, "Z")
-                pose_bones["c_leg_pole.r"].location.x += pose_bones["thigh.r"].head[0] - pose_bones["c_leg_pole.r"].head[0]
+                rotate_euler_y("c_thigh_b.r", -(math.radians(0) + math.atan2(*x_axis("c_thigh_b.r")[0:2])))
+                solver.set_matrix("c_foot_ik.r", solver.matrix("c_foot_ik.r") @ Matrix.Rotation(math.radians(180) + solver.matrix("foot.r").to_euler().z, 4, "Z"))
+                translate_location_x("c_leg_pole.r", head_x("thigh.r") - head_x("c_leg_pole.r"))
 
             if pose_fingers:
                 # finger.L
-                target_rotation = to_rotation_matrix(pose_bones["c_middle1.l"])
+                target_rotation = to_rotation_matrix("c_middle1.l")
                 for bone_name in [
                     "c_index1.l",
                     "c_index2.l",
@@ -852,10 +891,10 @@ class AutoRigArmatureObject(MMDBindArmatureObjectABC):
                     "c_pinky2.l",
                     "c_pinky3.l",
                 ]:
-                    set_rotation(pose_bones[bone_name], target_rotation)
+                    set_rotation(bone_name, target_rotation)
 
                 # finger.R
-                target_rotation = to_rotation_matrix(pose_bones["c_middle1.r"])
+                target_rotation = to_rotation_matrix("c_middle1.r")
                 for bone_name in [
                     "c_index1.r",
                     "c_index2.r",
@@ -870,6 +909,7 @@ class AutoRigArmatureObject(MMDBindArmatureObjectABC):
                     "c_pinky2.r",
                     "c_pinky3.r",
                 ]:
-                    set_rotation(pose_bones[bone_name], target_rotation)
+                    set_rotation(bone_name, target_rotation)
 
-            dependency_graph.update()
+        solver.apply()
+        dependency_graph.update()
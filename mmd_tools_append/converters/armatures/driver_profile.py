@@ -0,0 +1,71 @@
+# Copyright 2026 MMD Tools Append authors
+# This file is part of MMD Tools Append.
+
+import time
+from dataclasses import dataclass
+from typing import Iterable, List
+
+import bpy
+
+
+@dataclass
+class DriverProfile:
+    driver_count: int
+    python_driver_count: int
+    seconds_per_frame: float
+    driver_seconds_per_frame: float
+
+
+class DriverProfiler:
+    """Step a frame window and measure the per frame cost of the drivers of objects.
+
+    The driver cost is the difference between the frame steps with the drivers enabled and muted.
+    """
+
+    def __init__(self, objects: Iterable[bpy.types.Object], frame_count: int):
+        self.objects = list(objects)
+        self.frame_count = frame_count
+
+    def list_drivers(self) -> List[bpy.types.FCurve]:
+        return [f for o in self.objects if o.animation_data is not None for f in o.animation_data.drivers]
+
+    @staticmethod
+    def is_python_driver(fcurve: bpy.types.FCurve) -> bool:
+        driver = fcurve.driver
+        return driver.type == "SCRIPTED" and not driver.is_simple_expression
+
+    def profile(self, context: bpy.types.Context) -> DriverProfile:
+        scene = context.scene
+        drivers = [f for f in self.list_drivers() if not f.mute]
+
+        original_frame = scene.frame_current
+        try:
+            seconds_per_frame = self._step_frames(scene)
+
+            for fcurve in drivers:
+                fcurve.mute = True
+            muted_seconds_per_frame = self._step_frames(scene)
+        finally:
+            for fcurve in drivers:
+                fcurve.mute = False
+
+            scene.frame_set(original_frame)
+
+        return DriverProfile(
+            len(drivers),
+            sum(1 for f in drivers if self.is_python_driver(f)),
+            seconds_per_frame,
+            max(seconds_per_frame - muted_seconds_per_frame, 0.0),
+        )
+
+    def _step_frames(self, scene: bpy.types.Scene) -> float:
+        frame_start = scene.frame_start
+        scene.frame_set(frame_start)
+
+        elapsed_time = 0.0
+        for frame in range(frame_start + 1, frame_start + 1 + self.frame_count):
+            start_time = time.perf_counter()
+            scene.frame_set(frame)
+            elapsed_time += time.perf_counter() - start_time
+
+        return elapsed_time / self.frame_count
@@ -4,12 +4,16 @@
 import math
 import re
 from collections import Counter
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 
 import bpy
+import numpy as np
 from mathutils import Vector
 
 from ...editors.armatures import ArmatureEditor
+from ...editors.dependency_index import ARMATURE_DEPENDENCY_INDEX, VERTEX_GROUP_MAX_WEIGHT_CACHE
+from ...editors.meshes import MeshEditor
 from ...utilities import import_mmd_tools
 
 # constants
@@ -288,6 +292,176 @@ class HumanoidTree(bpy.types.PropertyGroup):
         del bpy.types.Object.mmd_tools_append_humanoid_settings
 
 
+@dataclass(frozen=True)
+class BoneGraph:
+    """Immutable snapshot of the edit bones with the hierarchy and the geometry in arrays.
+
+    The lowest common ancestor queries use an Euler tour with a sparse table of the minimum depths.
+    """
+
+    names: tuple[str, ...]
+    name2index: dict[str, int]
+    heads: np.ndarray
+    tails: np.ndarray
+    vectors: np.ndarray
+    lengths: np.ndarray
+    directions: np.ndarray
+    parents: np.ndarray
+    parent_angles: np.ndarray
+    use_deforms: np.ndarray
+    children: tuple[tuple[int, ...], ...]
+    child_counts: np.ndarray
+    tree_ids: np.ndarray
+    preorders: np.ndarray
+    subtree_starts: np.ndarray
+    subtree_ends: np.ndarray
+    euler_bones: np.ndarray
+    euler_depths: np.ndarray
+    euler_firsts: np.ndarray
+    euler_sparse_table: tuple[np.ndarray, ...]
+
+    @staticmethod
+    def from_edit_bones(edit_bones: bpy.types.ArmatureEditBones) -> "BoneGraph":
+        bones = list(edit_bones)
+        bone_count = len(bones)
+        names = tuple(b.name for b in bones)
+        name2index = {n: i for i, n in enumerate(names)}
+
+        heads = np.array([b.head[:] for b in bones], dtype=np.float64).reshape(-1, 3)
+        tails = np.array([b.tail[:] for b in bones], dtype=np.float64).reshape(-1, 3)
+        parents = np.array([-1 if b.parent is None else name2index[b.parent.name] for b in bones], dtype=np.int64)
+        use_deforms = np.array([b.use_deform for b in bones], dtype=bool)
+
+        vectors = tails - heads
+        lengths = np.linalg.norm(vectors, axis=1)
+        directions = np.divide(vectors, lengths[:, np.newaxis], out=np.zeros_like(vectors), where=lengths[:, np.newaxis] > 0)
+
+        has_parents = parents >= 0
+        parent_angles = np.full(bone_count, np.nan)
+        parent_angles[has_parents] = BoneGraph._calc_angles(directions[has_parents], directions[parents[has_parents]])
+
+        children: list[list[int]] = [[] for _ in range(bone_count)]
+        for index in np.flatnonzero(has_parents).tolist():
+            children[parents[index]].append(index)
+
+        # depth first traversal of each tree in the bone order
+        tree_ids = np.full(bone_count, -1, dtype=np.int64)
+        depths = np.zeros(bone_count, dtype=np.int64)
+        subtree_starts = np.zeros(bone_count, dtype=np.int64)
+        subtree_ends = np.zeros(bone_count, dtype=np.int64)
+        euler_firsts = np.zeros(bone_count, dtype=np.int64)
+        preorders: list[int] = []
+        euler_bones: list[int] = []
+
+        for root in np.flatnonzero(~has_parents).tolist():
+            tree_ids[root] = root
+            subtree_starts[root] = len(preorders)
+            preorders.append(root)
+            euler_firsts[root] = len(euler_bones)
+            euler_bones.append(root)
+
+            stack = [root]
+            child_positions = [0]
+            while stack:
+                bone = stack[-1]
+                child_position = child_positions[-1]
+                if child_position < len(children[bone]):
+                    child_positions[-1] += 1
+                    child = children[bone][child_position]
+                    tree_ids[child] = root
+                    depths[child] = depths[bone] + 1
+                    subtree_starts[child] = len(preorders)
+                    preorders.append(child)
+                    euler_firsts[child] = len(euler_bones)
+                    euler_bones.append(child)
+                    stack.append(child)
+                    child_positions.append(0)
+                    continue
+
+                stack.pop()
+                child_positions.pop()
+                subtree_ends[bone] = len(preorders)
+                if stack:
+                    euler_bones.append(stack[-1])
+
+        euler_bone_array = np.array(euler_bones, dtype=np.int64)
+        euler_depths = depths[euler_bone_array]
+
+        # table[k][i] is the Euler position of the minimum depth in [i, i + 2**k)
+        sparse_table = [np.arange(len(euler_bone_array), dtype=np.int64)]
+        span = 1
+        while span * 2 <= len(euler_bone_array):
+            lefts = sparse_table[-1][:-span]
+            rights = sparse_table[-1][span:]
+            sparse_table.append(np.where(euler_depths[lefts] <= euler_depths[rights], lefts, rights))
+            span *= 2
+
+        return BoneGraph(
+            names=names,
+            name2index=name2index,
+            heads=heads,
+            tails=tails,
+            vectors=vectors,
+            lengths=lengths,
+            directions=directions,
+            parents=parents,
+            parent_angles=parent_angles,
+            use_deforms=use_deforms,
+            children=tuple(tuple(c) for c in children),
+            child_counts=np.array([len(c) for c in children], dtype=np.int64),
+            tree_ids=tree_ids,
+            preorders=np.array(preorders, dtype=np.int64),
+            subtree_starts=subtree_starts,
+            subtree_ends=subtree_ends,
+            euler_bones=euler_bone_array,
+            euler_depths=euler_depths,
+            euler_firsts=euler_firsts,
+            euler_sparse_table=tuple(sparse_table),
+        )
+
+    @staticmethod
+    def _calc_angles(directions0: np.ndarray, directions1: np.ndarray) -> np.ndarray:
+        return np.arccos(np.clip(np.sum(directions0 * directions1, axis=-1), -1.0, 1.0))
+
+    def calc_angle(self, index0: int, index1: int) -> float:
+        return float(self._calc_angles(self.directions[index0], self.directions[index1]))
+
+    def find_nearest(self, indices: Iterable[int], point: np.ndarray) -> int:
+        """Return the bone of the indices with the head nearest to the point."""
+        indices = np.fromiter(indices, dtype=np.int64)
+        return int(indices[np.argmin(np.linalg.norm(self.heads[indices] - point, axis=1))])
+
+    def get_descendants(self, index: int) -> np.ndarray:
+        return self.preorders[self.subtree_starts[index] + 1 : self.subtree_ends[index]]
+
+    def find_lowest_common_ancestor(self, index0: int, index1: int) -> int:
+        """Return the deepest bone that is an ancestor of or the same as both bones, -1 if none."""
+        if self.tree_ids[index0] != self.tree_ids[index1]:
+            return -1
+
+        start, end = sorted((int(self.euler_firsts[index0]), int(self.euler_firsts[index1])))
+        level = (end - start + 1).bit_length() - 1
+        position0 = self.euler_sparse_table[level][start]
+        position1 = self.euler_sparse_table[level][end - (1 << level) + 1]
+        return int(self.euler_bones[position0 if self.euler_depths[position0] <= self.euler_depths[position1] else position1])
+
+    def find_common_parent(self, indices: list[int]) -> int:
+        """Return the deepest bone that is a strict ancestor of all the bones, -1 if none."""
+        if not indices:
+            return -1
+
+        ancestor = indices[0]
+        for index in indices[1:]:
+            ancestor = self.find_lowest_common_ancestor(ancestor, index)
+            if ancestor < 0:
+                return -1
+
+        if ancestor in indices:
+            ancestor = int(self.parents[ancestor])
+
+        return ancestor
+
+
 class HumanoidEditor(ArmatureEditor):
     tree: HumanoidTree
 
@@ -296,39 +470,23 @@ class HumanoidEditor(ArmatureEditor):
         self.tree = armature_object.mmd_tools_append_humanoid_settings
 
     def _get_related_mesh(self) -> list[bpy.types.Object]:
-        related_meshes = []
-        for o in bpy.data.objects:
-            if o.type == "MESH":
-                if any(m.type == "ARMATURE" and m.object == self.raw_object for m in o.modifiers):
-                    related_meshes.append(o)
-        return related_meshes
-
-    def _get_deform_bones(self) -> list[str]:
+        return ARMATURE_DEPENDENCY_INDEX.find_objects(self.raw_object, "MESH")
+
+    def _get_deform_bones(self) -> set[str]:
         """Get vertex group names that have non-zero weights."""
-        meshes = self._get_related_mesh()
         vg_names = set()
 
-        for m in meshes:
+        for m in self._get_related_mesh():
             if not m.data or not m.vertex_groups:
                 continue
 
-            vg_map = {vg.index: vg.name for vg in m.vertex_groups}
-            vg_sets = set()
-
-            for v in m.data.vertices:
-                for g in v.groups:
-                    if g.weight > 0.0:
-                        vg_sets.add(g.group)
-
-                if len(vg_sets) == len(vg_map):
-                    break
-
-            for idx in vg_sets:
-                name = vg_map.get(idx)
-                if name and name in self.bones and self.bones[name].use_deform:
+            max_weights = VERTEX_GROUP_MAX_WEIGHT_CACHE.get_max_weights(m)
+            for vg in m.vertex_groups:
+                name = vg.name
+                if max_weights[vg.index] > 0.0 and name in self.bones and self.bones[name].use_deform:
                     vg_names.add(name)
 
-        return list(vg_names)
+        return vg_names
 
     @property
     def is_mmd_armature_object(self) -> bool:
@@ -491,38 +649,64 @@ class HumanoidEditor(ArmatureEditor):
 
     def dissolve_bone(self, target: bpy.types.EditBone):
         """Merge the bone (target) to its parent and combine related vertex groups."""
+        self.dissolve_bones({target.name: target.parent.name})
+
+    def dissolve_bones(self, child_to_parent: dict[str, str]):
+        """Merge the bones (keys) to their parents (values) and combine related vertex groups.
+
+        A parent that is dissolved too is followed up to the surviving bone,
+        and the weights of each related mesh are combined in a single pass.
+        """
+        if not child_to_parent:
+            return
 
         self.raw_armature.use_mirror_x = False
 
-        parent = target.parent
-        parent.tail = target.tail
-        target_name = target.name
-        self.edit_bones.remove(target)
+        child_to_survivor: dict[str, str] = {}
+        for child in child_to_parent:
+            survivor = child_to_parent[child]
+            visited = {child}
+            while survivor in child_to_parent and survivor not in visited:
+                visited.add(survivor)
+                survivor = child_to_parent[survivor]
+            child_to_survivor[child] = survivor
 
-        meshes = self._get_related_mesh()
-        for m in meshes:
-            self._combine_vertex_group(m, parent.name, target_name)
+        # parents first, so the survivor takes the tail of its last dissolved descendant
+        for child in sorted(child_to_survivor, key=lambda n: len(self.edit_bones[n].parent_recursive)):
+            target = self.edit_bones[child]
+            self.edit_bones[child_to_survivor[child]].tail = target.tail
+            self.edit_bones.remove(target)
+
+        for m in self._get_related_mesh():
+            self._combine_vertex_groups(m, child_to_survivor)
 
     @staticmethod
-    def _combine_vertex_group(mesh_obj: bpy.types.Object, parent: str, child: str):
+    def _combine_vertex_groups(mesh_obj: bpy.types.Object, child_to_parent: dict[str, str]):
         vgs = mesh_obj.vertex_groups
-        if child not in vgs:
-            return
 
-        if parent not in vgs:
-            vgs[child].name = parent
+        from_to_indices: dict[int, int] = {}
+        for child, parent in child_to_parent.items():
+            if child not in vgs:
+                continue
+
+            if parent not in vgs:
+                vgs[child].name = parent
+                continue
+
+            from_to_indices[vgs[child].index] = vgs[parent].index
+
+        if not from_to_indices:
             return
 
-        parent_vg = vgs[parent]
-        child_vg = vgs[child]
-        child_index = child_vg.index
+        MeshEditor(mesh_obj).merge_vertex_group_weights(from_to_indices)
+        VERTEX_GROUP_MAX_WEIGHT_CACHE.invalidate([mesh_obj.data])
+
+        combined_names = [(vgs[to_index].name, vgs[from_index].name) for from_index, to_index in from_to_indices.items()]
+        for child_vg in [vg for vg in vgs if vg.index in from_to_indices]:
+            vgs.remove(child_vg)
 
-        for v in mesh_obj.data.vertices:
-            for g in v.groups:
-                if g.group == child_index:
-                    parent_vg.add([v.index], g.weight, "ADD")
-        vgs.remove(child_vg)
-        print("Combined 2 vertex groups: ", parent, child)
+        for parent, child in combined_names:
+            print("Combined 2 vertex groups: ", parent, child)
 
     def add_leg_ik(self):
         """Leg IK maker. Adapted from MMD Tools Helper"""
@@ -597,14 +781,12 @@ class HumanoidEditor(ArmatureEditor):
         bpy.ops.object.mode_set(mode="EDIT")
 
         # merge leg twist bones if they exist (LowerLeg & UpperLeg)
-        if self.edit_bones[KNEE_L].parent != self.edit_bones[LEG_L]:
-            self.dissolve_bone(self.edit_bones[KNEE_L].parent)
-        if self.edit_bones[KNEE_R].parent != self.edit_bones[LEG_R]:
-            self.dissolve_bone(self.edit_bones[KNEE_R].parent)
-        if self.edit_bones[ANKLE_L].parent != self.edit_bones[KNEE_L]:
-            self.dissolve_bone(self.edit_bones[ANKLE_L].parent)
-        if self.edit_bones[ANKLE_R].parent != self.edit_bones[KNEE_R]:
-            self.dissolve_bone(self.edit_bones[ANKLE_R].parent)
+        twist_to_parent: dict[str, str] = {}
+        for upper, lower in ((LEG_L, KNEE_L), (LEG_R, KNEE_R), (KNEE_L, ANKLE_L), (KNEE_R, ANKLE_R)):
+            twist = self.edit_bones[lower].parent
+            if twist != self.edit_bones[upper]:
+                twist_to_parent[twist.name] = twist.parent.name
+        self.dissolve_bones(twist_to_parent)
 
         # move knees forward a little to prevent glitches
         if math.isclose(self.edit_bones[LEG_L].vector.angle(self.edit_bones[KNEE_L].vector), 0):
@@ -761,78 +943,60 @@ class HumanoidEditor(ArmatureEditor):
         Intended for non-MMD models, and the model must face Y- direction.
         """
 
-        def isclose_abs(a: float, b: float, tol: float) -> bool:
+        def isclose_abs(a: float | np.ndarray, b: float, tol: float) -> bool | np.ndarray:
             """Returns if the absolute values of a and b are close."""
-            return math.isclose(abs(a), abs(b), abs_tol=tol)
+            return np.isclose(np.abs(a), abs(b), rtol=1e-09, atol=tol)
 
         def traverse_parent_chain(
-            bone: bpy.types.EditBone,
+            index: int,
             threshold: float = 0.8,
             check_root: bool = False,
             allow_inverse: bool = False,
-            chain: list[str] = None,
-        ) -> list[str]:
+        ) -> list[int]:
             """
             Find connected parents that are pointing in a similar direction (bone chain).
             threshold = 1 means it will treat 90deg as part of the chain.
             """
+            chain = []
+            while True:
+                parent = int(graph.parents[index])
+                if parent < 0 or not graph.use_deforms[parent]:
+                    return chain
 
-            parent = bone.parent
-            if not parent or not parent.use_deform:
-                return chain if chain else []
+                angle = graph.parent_angles[index]
 
-            if chain is None:
-                chain = []
+                if allow_inverse:
+                    angle = min(angle, math.pi - angle)
 
-            angle = bone.vector.angle(parent.vector)
+                if not (angle < math.pi * 0.5 * threshold and (not check_root or np.linalg.norm(graph.heads[parent]) >= 0.001)):
+                    return chain
 
-            if allow_inverse:
-                angle = min(angle, math.pi - angle)
+                chain.append(parent)
+                index = parent
 
-            if angle < math.pi * 0.5 * threshold and (not check_root or parent.head.length >= 0.001):
-                chain.append(parent.name)
-                return traverse_parent_chain(parent, threshold=threshold, check_root=check_root, allow_inverse=allow_inverse, chain=chain)
-            else:
-                return chain
-
-        def traverse_child_chain(bone: bpy.types.EditBone, threshold: float = 0.8, chain: list[str] = None) -> list[str]:
+        def traverse_child_chain(index: int, threshold: float = 0.8) -> list[int]:
             """
             Find connected children that are pointing in a similar direction (bone chain).
             threshold = 1 means it will treat 90deg as part of the chain.
             """
-            deform_children = [b for b in bone.children if b.use_deform]
-
-            if not deform_children:
-                return chain if chain else []
-
-            if chain is None:
-                chain = []
-
-            child = min(deform_children, key=lambda b: (b.head - bone.tail).length)
-            angle = bone.vector.angle(child.vector)
-            distance = (child.head - bone.tail).length
-
-            if angle < math.pi * 0.5 * threshold and distance < child.vector.length:
-                chain.append(child.name)
-                return traverse_child_chain(child, threshold=threshold, chain=chain)
-            else:
-                return chain
+            chain = []
+            while True:
+                deform_children = [c for c in graph.children[index] if graph.use_deforms[c]]
+                if not deform_children:
+                    return chain
 
-        def find_mutual_parent(bone_names: list[str]) -> bpy.types.EditBone:
-            """Find the lowest common ancestor of the given bones."""
-            if not bone_names:
-                return None
+                child = graph.find_nearest(deform_children, graph.tails[index])
+                angle = graph.calc_angle(index, child)
+                distance = np.linalg.norm(graph.heads[child] - graph.tails[index])
 
-            ancestors_sets = [set(self.edit_bones[n].parent_recursive) for n in bone_names]
-            common_ancestors = set.intersection(*ancestors_sets)
+                if not (angle < math.pi * 0.5 * threshold and distance < graph.lengths[child]):
+                    return chain
 
-            if not common_ancestors:
-                return None
+                chain.append(child)
+                index = child
 
-            return max(common_ancestors, key=lambda b: len(b.parent_recursive))
-
-        def is_left(bone_name: str) -> bool:
-            return bone_map[bone_name]["head"].x > 0
+        def is_left(index: int) -> bool:
+            return graph.heads[index, 0] > 0
 
         def is_hidden(bone_name: str) -> bool:
             pbone = self.pose_bones[bone_name]
@@ -841,90 +1005,82 @@ class HumanoidEditor(ArmatureEditor):
             else:
                 return pbone.bone.hide
 
-        def is_deform(bone: bpy.types.Bone | bpy.types.EditBone) -> bool:
-            """Check if the bone actually deforms the mesh (weight check)."""
-            if deform_list:
-                return bone.name in deform_list
-            else:
-                # armature with no mesh
-                return bone.use_deform
-
-        def assign_bone(key: str, bone_name: str, index: int = None):
-            if index is None:
-                index = 0 if is_left(bone_name) else 1
-            item_map[key].slots[index].bone_name = bone_name
+        def assign_bone(key: str, index: int, slot_index: int = None):
+            if slot_index is None:
+                slot_index = 0 if is_left(index) else 1
+            item_map[key].slots[slot_index].bone_name = graph.names[index]
 
         # finders
-        def _find_hands(finger_count: int, fine_precision: float) -> list[str]:
+        def _find_hands(finger_count: int, fine_precision: float) -> list[int]:
             """finger count & furthest bone: thumb and index might be in the same parent. (5 finger but 4 children)"""
             hands = []
-            finger_parent = [k for k, v in children_map.items() if len(v) >= finger_count - 1]
-            if finger_parent:
-                hand_pos = max(abs(bone_map[n]["head"].x) for n in finger_parent)
-                hands = [n for n in finger_parent if isclose_abs(hand_pos, bone_map[n]["head"].x, fine_precision)]
+            finger_parents = np.flatnonzero(is_listeds & (listed_child_counts >= finger_count - 1))
+            if len(finger_parents) > 0:
+                hand_xs = graph.heads[finger_parents, 0]
+                hand_pos = np.abs(hand_xs).max()
+                hands = finger_parents[isclose_abs(hand_xs, hand_pos, fine_precision)].tolist()
                 for h in hands:
                     assign_bone("Arm.Hand", h)
             return hands
 
-        def _find_fingers(hands: list[str]):
+        def _find_fingers(hands: list[int]):
             """tip: the bottom children of hands. (HumanoidItem.auto will do the rest)"""
             for h in hands:
                 prefix = "Left Hand" if is_left(h) else "Right Hand"
-                dummies = {bone for bone in self.edit_bones[h].children if not bone.children}
-                fingers = [bone for bone in self.edit_bones[h].children_recursive if is_deform(bone) and bone not in dummies]
-                finger_tips = sorted([f for f in fingers if f.name in children_map and not children_map.get(f.name)], key=lambda a: a.head.y)
+                descendants = graph.get_descendants(h)
+                is_dummies = (graph.parents[descendants] == h) & (graph.child_counts[descendants] == 0)
+                finger_tips = descendants[is_deforms[descendants] & ~is_dummies & is_listeds[descendants] & (listed_child_counts[descendants] == 0)]
+                finger_tips = finger_tips[np.argsort(graph.heads[finger_tips, 1], kind="stable")]
                 if len(finger_tips) != finger_count:
                     print(f"The finger count does not match ({len(finger_tips)}).")
                     continue
 
                 ordered_names = ["Thumb", "Index", "Middle", "Ring", "Little"]
-                for idx, f in enumerate(finger_tips):
-                    assign_bone(f"{prefix}.{ordered_names[idx]}", f.name, 2)
+                for idx, f in enumerate(finger_tips.tolist()):
+                    assign_bone(f"{prefix}.{ordered_names[idx]}", f, 2)
 
-        def _find_arms(hands: list[str]):
+        def _find_arms(hands: list[int]):
             for h in hands:
-                arms = list(reversed(traverse_parent_chain(self.edit_bones[h])))
+                arms = list(reversed(traverse_parent_chain(h)))
                 if len(arms) >= 2:
-                    shoulder_name = arms[0]
-                    hand_head = self.edit_bones[h].head
-                    shoulder_tail = self.edit_bones[shoulder_name].tail
-                    mid_point = (shoulder_tail + hand_head) * 0.5
-                    lower_arm_name = min(arms[1:], key=lambda n: (self.edit_bones[n].head - mid_point).length)
-
-                    assign_bone("Arm.Shoulder", shoulder_name)
-                    assign_bone("Arm.LowerArm", lower_arm_name)
-                    if children_map.get(shoulder_name):
-                        assign_bone("Arm.UpperArm", children_map[shoulder_name][0])
-
-        def _find_spine(hands: list[str], rough_precision: float) -> str:
+                    shoulder = arms[0]
+                    mid_point = (graph.tails[shoulder] + graph.heads[h]) * 0.5
+                    lower_arm = graph.find_nearest(arms[1:], mid_point)
+
+                    assign_bone("Arm.Shoulder", shoulder)
+                    assign_bone("Arm.LowerArm", lower_arm)
+                    if listed_children[shoulder]:
+                        assign_bone("Arm.UpperArm", listed_children[shoulder][0])
+
+        def _find_spine(hands: list[int], rough_precision: float) -> int:
             """find head & spine using existing arm."""
-            chest = find_mutual_parent(hands)
+            chest = graph.find_common_parent(hands)
 
-            if not chest:
+            if chest < 0:
                 shoulder_name = item_map["Arm.Shoulder"].slots[0].bone_name or item_map["Arm.Shoulder"].slots[1].bone_name
-                if shoulder_name:
-                    chest = self.edit_bones[shoulder_name].parent
+                if shoulder_name in graph.name2index:
+                    chest = int(graph.parents[graph.name2index[shoulder_name]])
 
-            if not chest or abs(chest.vector.x) > rough_precision:
-                return None
+            if chest < 0 or abs(graph.vectors[chest, 0]) > rough_precision:
+                return -1
 
             upper_spines = list(reversed(traverse_child_chain(chest)))
             lower_spines = list(reversed(traverse_parent_chain(chest, check_root=True, allow_inverse=True)))
             if not lower_spines:
-                return None
+                return -1
 
             hips = lower_spines[0]
-            spine = lower_spines[1] if len(lower_spines) > 1 else chest.name
+            spine = lower_spines[1] if len(lower_spines) > 1 else chest
             assign_bone("Body.Hips", hips, 0)
             assign_bone("Body.Spine", spine, 0)
             if len(lower_spines) > 2:
                 assign_bone("Body.Chest", lower_spines[2], 0)
-                assign_bone("Body.UpperChest", chest.name, 0)
+                assign_bone("Body.UpperChest", chest, 0)
             elif len(lower_spines) > 1:
-                assign_bone("Body.Chest", chest.name, 0)
+                assign_bone("Body.Chest", chest, 0)
 
             if not upper_spines:
-                return None
+                return -1
 
             head = upper_spines[0]  # prefer top
             assign_bone("Head.Head", head, 0)
@@ -934,62 +1090,65 @@ class HumanoidEditor(ArmatureEditor):
 
             return head
 
-        def _find_eyes(head: str):
+        def _find_eyes(head: int):
             """direct children of Head, go straight in y- direction"""
-            head_children = self.edit_bones[head].children
-            eyes_candidate = [b for b in head_children if abs(b.vector.z) < fine_precision and b.vector.y < 0]
-            if eyes_candidate:
-                eyes = [b.name for b in eyes_candidate if (self.edit_bones[head].head - b.head).length < 0.3]
+            head_children = np.array(graph.children[head], dtype=np.int64)
+            child_vectors = graph.vectors[head_children]
+            eyes_candidate = head_children[(np.abs(child_vectors[:, 2]) < fine_precision) & (child_vectors[:, 1] < 0)]
+            if len(eyes_candidate) > 0:
+                eyes = eyes_candidate[np.linalg.norm(graph.heads[head] - graph.heads[eyes_candidate], axis=1) < 0.3]
                 if len(eyes) == 2:
-                    for e in eyes:
+                    for e in eyes.tolist():
                         if is_left(e):
                             assign_bone("Head.LeftEye", e, 0)
                         else:
                             assign_bone("Head.RightEye", e, 0)
 
-        def _find_toes(fine_precision: float, rough_precision: float) -> list[str]:
+        def _find_toes(fine_precision: float, rough_precision: float) -> list[int]:
             """lowest & furthest bone: heel bone might get detected as lowest"""
             toes = []
-            min_z = min(v["head"].z for v in bone_map.values())
-            bottom = [k for k, v in bone_map.items() if abs(v["head"].z - min_z) < rough_precision]
-            if bottom:
-                toes_vector = min(abs(bone_map[n]["vector"].z) for n in bottom)
-                toes = [n for n in bottom if bone_map[n]["tail"].y < 0 and isclose_abs(toes_vector, bone_map[n]["vector"].z, fine_precision)]
+            deform_bones = np.flatnonzero(graph.use_deforms)
+            if len(deform_bones) == 0:
+                return toes
+
+            head_zs = graph.heads[deform_bones, 2]
+            bottom = deform_bones[np.abs(head_zs - head_zs.min()) < rough_precision]
+            if len(bottom) > 0:
+                bottom_direction_zs = graph.directions[bottom, 2]
+                toes_vector = np.abs(bottom_direction_zs).min()
+                toes = bottom[(graph.tails[bottom, 1] < 0) & isclose_abs(bottom_direction_zs, toes_vector, fine_precision)].tolist()
                 for t in toes:
                     assign_bone("Leg.Toe", t)
             return toes
 
-        def _find_legs(toes: list[str]):
+        def _find_legs(toes: list[int]):
             """(broken on MMD because EX and ToeIK)"""
+            hips = graph.name2index.get(item_map["Body.Hips"].slots[0].bone_name, -1)
             for t in toes:
-                legs = list(reversed(traverse_parent_chain(self.edit_bones[t])))
-                hips = item_map["Body.Hips"].slots[0].bone_name
-                if hips and hips in legs:
+                legs = list(reversed(traverse_parent_chain(t)))
+                if hips in legs:
                     legs.remove(hips)
                 if len(legs) >= 2:
-                    upper_leg_name = legs[0]
-                    foot_head = self.edit_bones[t].parent.head
-                    upper_leg_head = self.edit_bones[upper_leg_name].head
-                    mid_point = (upper_leg_head + foot_head) * 0.5
-                    lower_leg_name = min(legs[1:], key=lambda n: (self.edit_bones[n].head - mid_point).length)
+                    upper_leg = legs[0]
+                    foot = int(graph.parents[t])
+                    mid_point = (graph.heads[upper_leg] + graph.heads[foot]) * 0.5
+                    lower_leg = graph.find_nearest(legs[1:], mid_point)
 
-                    assign_bone("Leg.UpperLeg", upper_leg_name)
-                    assign_bone("Leg.LowerLeg", lower_leg_name)
-                    assign_bone("Leg.Foot", self.edit_bones[t].parent.name)
+                    assign_bone("Leg.UpperLeg", upper_leg)
+                    assign_bone("Leg.LowerLeg", lower_leg)
+                    assign_bone("Leg.Foot", foot)
 
         # Gather bone and slot data
+        graph = BoneGraph.from_edit_bones(self.edit_bones)
         deform_list = self._get_deform_bones()
         item_map = {f"{frame.name}.{item.name}": item for frame, item in self.tree.iter_items()}
-        children_map = {b.name: [c.name for c in b.children if is_deform(c) and not is_hidden(c.name)] for b in self.bones if b.use_deform and not is_hidden(b.name)}
-        bone_map: dict[str, dict[str, Vector]] = {
-            b.name: {
-                "head": b.head,
-                "tail": b.tail,
-                "vector": b.vector.normalized(),
-            }
-            for b in self.edit_bones
-            if b.use_deform
-        }
+
+        # bones deforming the mesh (weight check), or flagged as deform for an armature with no mesh
+        is_deforms = np.array([n in deform_list for n in graph.names], dtype=bool) if deform_list else graph.use_deforms
+        is_shown = ~np.array([is_hidden(n) for n in graph.names], dtype=bool)
+        is_listeds = graph.use_deforms & is_shown
+        listed_children = [tuple(c for c in graph.children[i] if is_deforms[c] and is_shown[c]) if is_listeds[i] else () for i in range(len(graph.names))]
+        listed_child_counts = np.array([len(c) for c in listed_children], dtype=np.int64)
 
         hands = _find_hands(finger_count, fine_precision)
         if not hands:
@@ -1000,7 +1159,7 @@ class HumanoidEditor(ArmatureEditor):
         _find_arms(hands)
 
         head = _find_spine(hands, rough_precision)
-        if head:
+        if head >= 0:
             _find_eyes(head)
         else:
             print("Couldn't find head.")
@@ -8,6 +8,7 @@ from bpy.app.translations import pgettext as _
 
 from ...utilities import MessageException, import_mmd_tools
 from .autorig import AutoRigArmatureObject
+from .driver_profile import DriverProfiler
 from .humanoid import HumanoidEditor
 from .metarig import MetarigArmatureObject
 from .mmd import MMDArmatureObject
@@ -351,6 +352,35 @@ class MMDRigifyIntegrateFocusOnRigify(MMDRigifyOperatorABC, bpy.types.Operator):
         return {"FINISHED"}
 
 
+class MMDRigifyProfileDrivers(bpy.types.Operator):
+    bl_idname = "mmd_tools_append.mmd_rigify_profile_drivers"
+    bl_label = "Profile Drivers"
+    bl_description = "Step frames and report the driver count and the per frame driver cost of the selected armatures."
+    bl_options = {"REGISTER"}
+
+    frame_count: bpy.props.IntProperty(name="Frame Count", default=30, min=1)
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        return any(o.type == "ARMATURE" for o in context.selected_objects)
+
+    def execute(self, context: bpy.types.Context):
+        profiler = DriverProfiler((o for o in context.selected_objects if o.type == "ARMATURE"), self.frame_count)
+        profile = profiler.profile(context)
+
+        self.report(
+            {"INFO"},
+            _("{driver_count} drivers ({python_driver_count} evaluated in Python): {driver_msecs:.3f} ms of {frame_msecs:.3f} ms per frame").format(
+                driver_count=profile.driver_count,
+                python_driver_count=profile.python_driver_count,
+                driver_msecs=profile.driver_seconds_per_frame * 1000,
+                frame_msecs=profile.seconds_per_frame * 1000,
+            ),
+        )
+
+        return {"FINISHED"}
+
+
 class MMDRigifyConvert(bpy.types.Operator):
     bl_idname = "mmd_tools_append.rigify_to_mmd_compatible"
     bl_label = "Convert Rigify Armature to MMD compatible"
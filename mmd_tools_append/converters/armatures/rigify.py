@@ -9,7 +9,7 @@ from typing import Dict, Set, Tuple
 import bpy
 from mathutils import Color, Euler, Matrix, Vector
 
-from ...editors.armatures import DriverVariable, PoseBoneEditor
+from ...editors.armatures import DriverVariable, EditBonePlan, PoseBoneEditor, PoseMatrixSolver
 from .mmd import MMDArmatureObject, MMDBoneType
 from .mmd_bind import ControlType, DataPath, GroupType, MMDBindArmatureObjectABC, MMDBindInfo, MMDBindType, MMDBoneInfo
 
@@ -345,355 +345,347 @@ class RigifyArmatureObject(MMDBindArmatureObjectABC):
     def toe_r_mmd_rigify(self, value):
         self._set_property(ControlType.TOE_R_MMD_MMD_APPEND, value)
 
-    def _add_upper_arm_twist_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
+    def _add_upper_arm_twist_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
         # add upper arm twist (腕捩)
-        upper_arm_twist_fk_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_upper_arm_twist_fk.L")
-        self.bone_collections["Arm.L (FK)"].assign(upper_arm_twist_fk_l_bone)
-        upper_arm_twist_fk_l_bone.head = rig_edit_bones["upper_arm_fk.L"].tail - rig_edit_bones["upper_arm_fk.L"].vector / 3
-        upper_arm_twist_fk_l_bone.tail = rig_edit_bones["upper_arm_fk.L"].tail
-        upper_arm_twist_fk_l_bone.parent = rig_edit_bones["upper_arm_fk.L"]
-        self.fit_edit_bone_rotation(upper_arm_twist_fk_l_bone, rig_edit_bones["upper_arm_fk.L"])
-        rig_edit_bones["forearm_fk.L"].use_connect = False
-        rig_edit_bones["forearm_fk.L"].parent = upper_arm_twist_fk_l_bone
-
-        upper_arm_twist_fk_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_upper_arm_twist_fk.R")
-        self.bone_collections["Arm.R (FK)"].assign(upper_arm_twist_fk_r_bone)
-        upper_arm_twist_fk_r_bone.head = rig_edit_bones["upper_arm_fk.R"].tail - rig_edit_bones["upper_arm_fk.R"].vector / 3
-        upper_arm_twist_fk_r_bone.tail = rig_edit_bones["upper_arm_fk.R"].tail
-        upper_arm_twist_fk_r_bone.parent = rig_edit_bones["upper_arm_fk.R"]
-        self.fit_edit_bone_rotation(upper_arm_twist_fk_r_bone, rig_edit_bones["upper_arm_fk.R"])
-        rig_edit_bones["forearm_fk.R"].use_connect = False
-        rig_edit_bones["forearm_fk.R"].parent = upper_arm_twist_fk_r_bone
+        upper_arm_twist_fk_l_bone = plan.get_or_create_bone("mmd_append_upper_arm_twist_fk.L")
+        plan.assign("Arm.L (FK)", upper_arm_twist_fk_l_bone)
+        plan.set(
+            upper_arm_twist_fk_l_bone,
+            head=plan.tail("upper_arm_fk.L") - plan.vector("upper_arm_fk.L") / 3,
+            tail=plan.tail("upper_arm_fk.L"),
+        )
+        plan.set_parent(upper_arm_twist_fk_l_bone, "upper_arm_fk.L")
+        plan.fit_rotation(upper_arm_twist_fk_l_bone, "upper_arm_fk.L")
+        plan.set("forearm_fk.L", use_connect=False)
+        plan.set_parent("forearm_fk.L", upper_arm_twist_fk_l_bone)
+
+        upper_arm_twist_fk_r_bone = plan.get_or_create_bone("mmd_append_upper_arm_twist_fk.R")
+        plan.assign("Arm.R (FK)", upper_arm_twist_fk_r_bone)
+        plan.set(
+            upper_arm_twist_fk_r_bone,
+            head=plan.tail("upper_arm_fk.R") - plan.vector("upper_arm_fk.R") / 3,
+            tail=plan.tail("upper_arm_fk.R"),
+        )
+        plan.set_parent(upper_arm_twist_fk_r_bone, "upper_arm_fk.R")
+        plan.fit_rotation(upper_arm_twist_fk_r_bone, "upper_arm_fk.R")
+        plan.set("forearm_fk.R", use_connect=False)
+        plan.set_parent("forearm_fk.R", upper_arm_twist_fk_r_bone)
 
         return upper_arm_twist_fk_l_bone, upper_arm_twist_fk_r_bone
 
-    def _add_wrist_twist_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
+    def _add_wrist_twist_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
         # add wrist twist (手捩)
-        wrist_twist_fk_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_wrist_twist_fk.L")
-        self.bone_collections["Arm.L (FK)"].assign(wrist_twist_fk_l_bone)
-        wrist_twist_fk_l_bone.head = rig_edit_bones["forearm_fk.L"].tail - rig_edit_bones["forearm_fk.L"].vector / 3
-        wrist_twist_fk_l_bone.tail = rig_edit_bones["forearm_fk.L"].tail
-        wrist_twist_fk_l_bone.parent = rig_edit_bones["forearm_fk.L"]
-        self.fit_edit_bone_rotation(wrist_twist_fk_l_bone, rig_edit_bones["forearm_fk.L"])
-        rig_edit_bones["MCH-hand_fk.L"].use_connect = False
-        rig_edit_bones["MCH-hand_fk.L"].parent = wrist_twist_fk_l_bone
-
-        wrist_twist_fk_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_wrist_twist_fk.R")
-        self.bone_collections["Arm.R (FK)"].assign(wrist_twist_fk_r_bone)
-        wrist_twist_fk_r_bone.head = rig_edit_bones["forearm_fk.R"].tail - rig_edit_bones["forearm_fk.R"].vector / 3
-        wrist_twist_fk_r_bone.tail = rig_edit_bones["forearm_fk.R"].tail
-        wrist_twist_fk_r_bone.parent = rig_edit_bones["forearm_fk.R"]
-        self.fit_edit_bone_rotation(wrist_twist_fk_r_bone, rig_edit_bones["forearm_fk.R"])
-        rig_edit_bones["MCH-hand_fk.R"].use_connect = False
-        rig_edit_bones["MCH-hand_fk.R"].parent = wrist_twist_fk_r_bone
+        wrist_twist_fk_l_bone = plan.get_or_create_bone("mmd_append_wrist_twist_fk.L")
+        plan.assign("Arm.L (FK)", wrist_twist_fk_l_bone)
+        plan.set(
+            wrist_twist_fk_l_bone,
+            head=plan.tail("forearm_fk.L") - plan.vector("forearm_fk.L") / 3,
+            tail=plan.tail("forearm_fk.L"),
+        )
+        plan.set_parent(wrist_twist_fk_l_bone, "forearm_fk.L")
+        plan.fit_rotation(wrist_twist_fk_l_bone, "forearm_fk.L")
+        plan.set("MCH-hand_fk.L", use_connect=False)
+        plan.set_parent("MCH-hand_fk.L", wrist_twist_fk_l_bone)
+
+        wrist_twist_fk_r_bone = plan.get_or_create_bone("mmd_append_wrist_twist_fk.R")
+        plan.assign("Arm.R (FK)", wrist_twist_fk_r_bone)
+        plan.set(
+            wrist_twist_fk_r_bone,
+            head=plan.tail("forearm_fk.R") - plan.vector("forearm_fk.R") / 3,
+            tail=plan.tail("forearm_fk.R"),
+        )
+        plan.set_parent(wrist_twist_fk_r_bone, "forearm_fk.R")
+        plan.fit_rotation(wrist_twist_fk_r_bone, "forearm_fk.R")
+        plan.set("MCH-hand_fk.R", use_connect=False)
+        plan.set_parent("MCH-hand_fk.R", wrist_twist_fk_r_bone)
 
         return wrist_twist_fk_l_bone, wrist_twist_fk_r_bone
 
-    def _add_leg_ik_parent_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
+    def _add_leg_ik_parent_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
         # add Leg IKP (足IK親) bone
-        leg_ik_parent_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_leg_ik_parent.L")
-        self.bone_collections["Leg.L (Tweak)"].assign(leg_ik_parent_l_bone)
-        leg_ik_parent_l_bone.tail = rig_edit_bones["ORG-foot.L"].head
-        leg_ik_parent_l_bone.head = leg_ik_parent_l_bone.tail.copy()
-        leg_ik_parent_l_bone.head.z = rig_edit_bones["ORG-foot.L"].tail.z
-        leg_ik_parent_l_bone.roll = 0
-
-        if "MCH-foot_ik.parent.L" in rig_edit_bones:
-            leg_ik_parent_l_bone.parent = rig_edit_bones["MCH-foot_ik.parent.L"]
+        leg_ik_parent_l_bone = plan.get_or_create_bone("mmd_append_leg_ik_parent.L")
+        plan.assign("Leg.L (Tweak)", leg_ik_parent_l_bone)
+        leg_ik_parent_l_tail = plan.head("ORG-foot.L")
+        leg_ik_parent_l_head = leg_ik_parent_l_tail.copy()
+        leg_ik_parent_l_head.z = plan.tail("ORG-foot.L").z
+        plan.set(leg_ik_parent_l_bone, head=leg_ik_parent_l_head, tail=leg_ik_parent_l_tail, roll=0)
+
+        if "MCH-foot_ik.parent.L" in plan:
+            plan.set_parent(leg_ik_parent_l_bone, "MCH-foot_ik.parent.L")
         else:
-            leg_ik_parent_l_bone.parent = rig_edit_bones["root"]
-        rig_edit_bones["foot_ik.L"].parent = leg_ik_parent_l_bone
-
-        leg_ik_parent_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_leg_ik_parent.R")
-        self.bone_collections["Leg.R (Tweak)"].assign(leg_ik_parent_r_bone)
-        leg_ik_parent_r_bone.tail = rig_edit_bones["ORG-foot.R"].head
-        leg_ik_parent_r_bone.head = leg_ik_parent_r_bone.tail.copy()
-        leg_ik_parent_r_bone.head.z = rig_edit_bones["ORG-foot.R"].tail.z
-        leg_ik_parent_r_bone.roll = 0
-
-        if "MCH-foot_ik.parent.R" in rig_edit_bones:
-            leg_ik_parent_r_bone.parent = rig_edit_bones["MCH-foot_ik.parent.R"]
+            plan.set_parent(leg_ik_parent_l_bone, "root")
+        plan.set_parent("foot_ik.L", leg_ik_parent_l_bone)
+
+        leg_ik_parent_r_bone = plan.get_or_create_bone("mmd_append_leg_ik_parent.R")
+        plan.assign("Leg.R (Tweak)", leg_ik_parent_r_bone)
+        leg_ik_parent_r_tail = plan.head("ORG-foot.R")
+        leg_ik_parent_r_head = leg_ik_parent_r_tail.copy()
+        leg_ik_parent_r_head.z = plan.tail("ORG-foot.R").z
+        plan.set(leg_ik_parent_r_bone, head=leg_ik_parent_r_head, tail=leg_ik_parent_r_tail, roll=0)
+
+        if "MCH-foot_ik.parent.R" in plan:
+            plan.set_parent(leg_ik_parent_r_bone, "MCH-foot_ik.parent.R")
         else:
-            leg_ik_parent_r_bone.parent = rig_edit_bones["root"]
-        rig_edit_bones["foot_ik.R"].parent = leg_ik_parent_r_bone
+            plan.set_parent(leg_ik_parent_r_bone, "root")
+        plan.set_parent("foot_ik.R", leg_ik_parent_r_bone)
 
         return leg_ik_parent_l_bone, leg_ik_parent_r_bone
 
-    def _add_foot_dummy_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
+    def _add_foot_dummy_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
         """Add dummy foot bone for copying rotation, inspired by MMR."""
-        rig_foot_dummy_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_foot_dummy.L")
-        rig_foot_dummy_l_bone.head = rig_edit_bones["ORG-foot.L"].head
-        rig_foot_dummy_l_bone.tail = rig_edit_bones["ORG-foot.L"].tail
-        self.bone_collections["mmd_dummy"].assign(rig_foot_dummy_l_bone)
-        rig_foot_dummy_l_bone.parent = rig_edit_bones["ORG-foot.L"]
-        self.fit_edit_bone_rotation(rig_foot_dummy_l_bone, rig_edit_bones["ORG-foot.L"])
-
-        rig_foot_dummy_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_foot_dummy.R")
-        rig_foot_dummy_r_bone.head = rig_edit_bones["ORG-foot.R"].head
-        rig_foot_dummy_r_bone.tail = rig_edit_bones["ORG-foot.R"].tail
-        self.bone_collections["mmd_dummy"].assign(rig_foot_dummy_r_bone)
-        rig_foot_dummy_r_bone.parent = rig_edit_bones["ORG-foot.R"]
-        self.fit_edit_bone_rotation(rig_foot_dummy_r_bone, rig_edit_bones["ORG-foot.R"])
+        rig_foot_dummy_l_bone = plan.get_or_create_bone("mmd_append_foot_dummy.L")
+        plan.set(rig_foot_dummy_l_bone, head=plan.head("ORG-foot.L"), tail=plan.tail("ORG-foot.L"))
+        plan.assign("mmd_dummy", rig_foot_dummy_l_bone)
+        plan.set_parent(rig_foot_dummy_l_bone, "ORG-foot.L")
+        plan.fit_rotation(rig_foot_dummy_l_bone, "ORG-foot.L")
+
+        rig_foot_dummy_r_bone = plan.get_or_create_bone("mmd_append_foot_dummy.R")
+        plan.set(rig_foot_dummy_r_bone, head=plan.head("ORG-foot.R"), tail=plan.tail("ORG-foot.R"))
+        plan.assign("mmd_dummy", rig_foot_dummy_r_bone)
+        plan.set_parent(rig_foot_dummy_r_bone, "ORG-foot.R")
+        plan.fit_rotation(rig_foot_dummy_r_bone, "ORG-foot.R")
 
         return rig_foot_dummy_l_bone, rig_foot_dummy_r_bone
 
-    def _add_toe_ik_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
+    def _add_toe_ik_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
         # add toe IK (つま先ＩＫ)
-        toe_ik_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_toe_ik.L")
-        self.bone_collections["Leg.L (Tweak)"].assign(toe_ik_l_bone)
-        toe_ik_l_bone.head = rig_edit_bones["ORG-foot.L"].tail
-        toe_ik_l_bone.tail = toe_ik_l_bone.head - Vector([0, 0, rig_edit_bones["mmd_append_leg_ik_parent.L"].length])
-        toe_ik_l_bone.parent = rig_edit_bones["foot_ik.L"]
-        self.fit_edit_bone_rotation(toe_ik_l_bone, rig_edit_bones["foot_ik.L"])
-
-        toe_ik_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_toe_ik.R")
-        self.bone_collections["Leg.R (Tweak)"].assign(toe_ik_r_bone)
-        toe_ik_r_bone.head = rig_edit_bones["ORG-foot.R"].tail
-        toe_ik_r_bone.tail = toe_ik_r_bone.head - Vector([0, 0, rig_edit_bones["mmd_append_leg_ik_parent.R"].length])
-        toe_ik_r_bone.parent = rig_edit_bones["foot_ik.R"]
-        self.fit_edit_bone_rotation(toe_ik_r_bone, rig_edit_bones["foot_ik.R"])
+        toe_ik_l_bone = plan.get_or_create_bone("mmd_append_toe_ik.L")
+        plan.assign("Leg.L (Tweak)", toe_ik_l_bone)
+        toe_ik_l_head = plan.tail("ORG-foot.L")
+        plan.set(toe_ik_l_bone, head=toe_ik_l_head, tail=toe_ik_l_head - Vector([0, 0, plan.length("mmd_append_leg_ik_parent.L")]))
+        plan.set_parent(toe_ik_l_bone, "foot_ik.L")
+        plan.fit_rotation(toe_ik_l_bone, "foot_ik.L")
+
+        toe_ik_r_bone = plan.get_or_create_bone("mmd_append_toe_ik.R")
+        plan.assign("Leg.R (Tweak)", toe_ik_r_bone)
+        toe_ik_r_head = plan.tail("ORG-foot.R")
+        plan.set(toe_ik_r_bone, head=toe_ik_r_head, tail=toe_ik_r_head - Vector([0, 0, plan.length("mmd_append_leg_ik_parent.R")]))
+        plan.set_parent(toe_ik_r_bone, "foot_ik.R")
+        plan.fit_rotation(toe_ik_r_bone, "foot_ik.R")
 
         return toe_ik_l_bone, toe_ik_r_bone
 
-    def _add_eye_fk_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone, bpy.types.EditBone]:
-        rig_eyes_fk_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_eyes_fk")
-        rig_eyes_fk_bone.head = rig_edit_bones["ORG-spine.006"].tail + rig_edit_bones["ORG-spine.006"].vector
-        rig_eyes_fk_bone.head.y = rig_edit_bones["ORG-eye.L"].head.y
-        rig_eyes_fk_bone.tail = rig_eyes_fk_bone.head - Vector([0, rig_edit_bones["ORG-eye.L"].length * 2, 0])
-        self.bone_collections["Face"].assign(rig_eyes_fk_bone)
-        rig_eyes_fk_bone.parent = rig_edit_bones["ORG-face"]
-        self.fit_edit_bone_rotation(rig_eyes_fk_bone, rig_edit_bones["eye_master.L"])
-
-        rig_eye_fk_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_eye_fk.L")
-        rig_eye_fk_l_bone.head = rig_edit_bones["eye_master.L"].head
-        rig_eye_fk_l_bone.tail = rig_edit_bones["eye_master.L"].tail
-        self.bone_collections["Face"].assign(rig_eye_fk_l_bone)
-        rig_eye_fk_l_bone.parent = rig_edit_bones["ORG-face"]
-        self.fit_edit_bone_rotation(rig_eye_fk_l_bone, rig_edit_bones["eye_master.L"])
-
-        rig_eye_fk_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_eye_fk.R")
-        rig_eye_fk_r_bone.head = rig_edit_bones["eye_master.R"].head
-        rig_eye_fk_r_bone.tail = rig_edit_bones["eye_master.R"].tail
-        self.bone_collections["Face"].assign(rig_eye_fk_r_bone)
-        rig_eye_fk_r_bone.parent = rig_edit_bones["ORG-face"]
-        self.fit_edit_bone_rotation(rig_eye_fk_r_bone, rig_edit_bones["eye_master.R"])
+    def _add_eye_fk_bones(self, plan: EditBonePlan) -> Tuple[str, str, str]:
+        rig_eyes_fk_bone = plan.get_or_create_bone("mmd_append_eyes_fk")
+        rig_eyes_fk_head = plan.tail("ORG-spine.006") + plan.vector("ORG-spine.006")
+        rig_eyes_fk_head.y = plan.head("ORG-eye.L").y
+        plan.set(rig_eyes_fk_bone, head=rig_eyes_fk_head, tail=rig_eyes_fk_head - Vector([0, plan.length("ORG-eye.L") * 2, 0]))
+        plan.assign("Face", rig_eyes_fk_bone)
+        plan.set_parent(rig_eyes_fk_bone, "ORG-face")
+        plan.fit_rotation(rig_eyes_fk_bone, "eye_master.L")
+
+        rig_eye_fk_l_bone = plan.get_or_create_bone("mmd_append_eye_fk.L")
+        plan.set(rig_eye_fk_l_bone, head=plan.head("eye_master.L"), tail=plan.tail("eye_master.L"))
+        plan.assign("Face", rig_eye_fk_l_bone)
+        plan.set_parent(rig_eye_fk_l_bone, "ORG-face")
+        plan.fit_rotation(rig_eye_fk_l_bone, "eye_master.L")
+
+        rig_eye_fk_r_bone = plan.get_or_create_bone("mmd_append_eye_fk.R")
+        plan.set(rig_eye_fk_r_bone, head=plan.head("eye_master.R"), tail=plan.tail("eye_master.R"))
+        plan.assign("Face", rig_eye_fk_r_bone)
+        plan.set_parent(rig_eye_fk_r_bone, "ORG-face")
+        plan.fit_rotation(rig_eye_fk_r_bone, "eye_master.R")
 
         return rig_eye_fk_l_bone, rig_eye_fk_r_bone, rig_eyes_fk_bone
 
-    def _adjust_torso_bone(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> bpy.types.EditBone:
-        thigh_center = self.to_center(rig_edit_bones["ORG-thigh.L"].head, rig_edit_bones["ORG-thigh.R"].head)
-        length = (rig_edit_bones["ORG-spine.001"].tail.z - thigh_center.z) / 2
-        self.move_bone(
-            rig_edit_bones["torso"],
+    def _adjust_torso_bone(self, plan: EditBonePlan) -> str:
+        thigh_center = self.to_center(plan.head("ORG-thigh.L"), plan.head("ORG-thigh.R"))
+        length = (plan.tail("ORG-spine.001").z - thigh_center.z) / 2
+        plan.move(
+            "torso",
             head=Vector(
                 [
                     0,
-                    rig_edit_bones["ORG-spine.001"].tail.y + length,
+                    plan.tail("ORG-spine.001").y + length,
                     thigh_center.z + length,
                 ]
             ),
         )
-        rig_edit_bones["torso"].roll = 0
+        plan.set("torso", roll=0)
 
-        return rig_edit_bones["torso"]
+        return "torso"
 
-    def _add_root_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
+    def _add_root_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
         # add center (センター) bone
-        thigh_center = self.to_center(rig_edit_bones["ORG-thigh.L"].head, rig_edit_bones["ORG-thigh.L"].head)
+        thigh_center = self.to_center(plan.head("ORG-thigh.L"), plan.head("ORG-thigh.L"))
 
-        center_bone = self.get_or_create_bone(rig_edit_bones, "center")
-        self.bone_collections["Root"].assign(center_bone)
-        center_bone.head = Vector([0.0, 0.0, thigh_center.z * 0.7])
-        center_bone.tail = Vector([0.0, 0.0, 0.0])
-        center_bone.roll = 0
+        center_bone = plan.get_or_create_bone("center")
+        plan.assign("Root", center_bone)
+        plan.set(center_bone, head=Vector([0.0, 0.0, thigh_center.z * 0.7]), tail=Vector([0.0, 0.0, 0.0]), roll=0)
 
         # add groove (グルーブ) bone
-        groove_bone = self.get_or_create_bone(rig_edit_bones, "groove")
-        self.bone_collections["Root"].assign(groove_bone)
-        groove_bone.head = center_bone.head
-        groove_bone.tail = groove_bone.head + Vector([0.0, 0.0, center_bone.length / 6])
-        groove_bone.roll = 0
-
-        # Add to armature's Root collection
-        self.raw_armature.collections_all["Root"].assign(groove_bone)
+        groove_bone = plan.get_or_create_bone("groove")
+        plan.assign("Root", groove_bone)
+        groove_head = plan.head(center_bone)
+        plan.set(groove_bone, head=groove_head, tail=groove_head + Vector([0.0, 0.0, plan.length(center_bone) / 6]), roll=0)
 
         return center_bone, groove_bone
 
-    def _add_shoulder_parent_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
-        shoulder_parent_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_parent.L")
-        shoulder_parent_l_bone.head = rig_edit_bones["ORG-shoulder.L"].head
-        shoulder_parent_l_bone.tail = shoulder_parent_l_bone.head + Vector([0, 0, rig_edit_bones["ORG-shoulder.L"].length / 2])
-        self.bone_collections["Arm.L (FK)"].assign(shoulder_parent_l_bone)
-        shoulder_parent_l_bone.parent = rig_edit_bones["ORG-spine.003"]
-        rig_edit_bones["shoulder.L"].parent = shoulder_parent_l_bone
-        shoulder_parent_l_bone.roll = 0
-
-        shoulder_parent_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_parent.R")
-        shoulder_parent_r_bone.head = rig_edit_bones["ORG-shoulder.R"].head
-        shoulder_parent_r_bone.tail = shoulder_parent_r_bone.head + Vector([0, 0, rig_edit_bones["ORG-shoulder.R"].length / 2])
-        self.bone_collections["Arm.R (FK)"].assign(shoulder_parent_r_bone)
-        shoulder_parent_r_bone.parent = rig_edit_bones["ORG-spine.003"]
-        rig_edit_bones["shoulder.R"].parent = shoulder_parent_r_bone
-        shoulder_parent_r_bone.roll = 0
+    def _add_shoulder_parent_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
+        shoulder_parent_l_bone = plan.get_or_create_bone("mmd_append_shoulder_parent.L")
+        shoulder_parent_l_head = plan.head("ORG-shoulder.L")
+        plan.set(shoulder_parent_l_bone, head=shoulder_parent_l_head, tail=shoulder_parent_l_head + Vector([0, 0, plan.length("ORG-shoulder.L") / 2]))
+        plan.assign("Arm.L (FK)", shoulder_parent_l_bone)
+        plan.set_parent(shoulder_parent_l_bone, "ORG-spine.003")
+        plan.set_parent("shoulder.L", shoulder_parent_l_bone)
+        plan.set(shoulder_parent_l_bone, roll=0)
+
+        shoulder_parent_r_bone = plan.get_or_create_bone("mmd_append_shoulder_parent.R")
+        shoulder_parent_r_head = plan.head("ORG-shoulder.R")
+        plan.set(shoulder_parent_r_bone, head=shoulder_parent_r_head, tail=shoulder_parent_r_head + Vector([0, 0, plan.length("ORG-shoulder.R") / 2]))
+        plan.assign("Arm.R (FK)", shoulder_parent_r_bone)
+        plan.set_parent(shoulder_parent_r_bone, "ORG-spine.003")
+        plan.set_parent("shoulder.R", shoulder_parent_r_bone)
+        plan.set(shoulder_parent_r_bone, roll=0)
 
         # Add to rigify default IK bone collections
-        self.raw_armature.collections_all["Arm.L (IK)"].assign(shoulder_parent_l_bone)
-        self.raw_armature.collections_all["Arm.R (IK)"].assign(shoulder_parent_r_bone)
+        plan.assign("Arm.L (IK)", shoulder_parent_l_bone)
+        plan.assign("Arm.R (IK)", shoulder_parent_r_bone)
 
         return shoulder_parent_l_bone, shoulder_parent_r_bone
 
-    def _add_shoulder_cancel_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
-        shoulder_cancel_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel.L")
-        shoulder_cancel_l_bone.head = rig_edit_bones["ORG-shoulder.L"].tail
-        shoulder_cancel_l_bone.tail = shoulder_cancel_l_bone.head + Vector([0, 0, rig_edit_bones["ORG-shoulder.L"].length / 2])
-        self.bone_collections["Arm.L (FK)"].assign(shoulder_cancel_l_bone)
-        self.insert_edit_bone(shoulder_cancel_l_bone, parent_bone=rig_edit_bones["ORG-shoulder.L"])
-        shoulder_cancel_l_bone.roll = 0
-
-        shoulder_cancel_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel.R")
-        shoulder_cancel_r_bone.head = rig_edit_bones["ORG-shoulder.R"].tail
-        shoulder_cancel_r_bone.tail = shoulder_cancel_r_bone.head + Vector([0, 0, rig_edit_bones["ORG-shoulder.R"].length / 2])
-        self.bone_collections["Arm.R (FK)"].assign(shoulder_cancel_r_bone)
-        self.insert_edit_bone(shoulder_cancel_r_bone, parent_bone=rig_edit_bones["ORG-shoulder.R"])
-        shoulder_cancel_r_bone.roll = 0
+    def _add_shoulder_cancel_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
+        shoulder_cancel_l_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel.L")
+        shoulder_cancel_l_head = plan.tail("ORG-shoulder.L")
+        plan.set(shoulder_cancel_l_bone, head=shoulder_cancel_l_head, tail=shoulder_cancel_l_head + Vector([0, 0, plan.length("ORG-shoulder.L") / 2]))
+        plan.assign("Arm.L (FK)", shoulder_cancel_l_bone)
+        plan.insert(shoulder_cancel_l_bone, "ORG-shoulder.L")
+        plan.set(shoulder_cancel_l_bone, roll=0)
+
+        shoulder_cancel_r_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel.R")
+        shoulder_cancel_r_head = plan.tail("ORG-shoulder.R")
+        plan.set(shoulder_cancel_r_bone, head=shoulder_cancel_r_head, tail=shoulder_cancel_r_head + Vector([0, 0, plan.length("ORG-shoulder.R") / 2]))
+        plan.assign("Arm.R (FK)", shoulder_cancel_r_bone)
+        plan.insert(shoulder_cancel_r_bone, "ORG-shoulder.R")
+        plan.set(shoulder_cancel_r_bone, roll=0)
 
         # Add to rigify default IK bone collections
-        self.raw_armature.collections_all["Arm.L (IK)"].assign(shoulder_cancel_l_bone)
-        self.raw_armature.collections_all["Arm.R (IK)"].assign(shoulder_cancel_r_bone)
+        plan.assign("Arm.L (IK)", shoulder_cancel_l_bone)
+        plan.assign("Arm.R (IK)", shoulder_cancel_r_bone)
 
         return shoulder_cancel_l_bone, shoulder_cancel_r_bone
 
-    def _add_shoulder_cancel_dummy_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
-        shoulder_cancel_dummy_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel_dummy.L")
-        shoulder_cancel_dummy_l_bone.head = rig_edit_bones["ORG-shoulder.L"].head
-        shoulder_cancel_dummy_l_bone.tail = shoulder_cancel_dummy_l_bone.head + Vector([0, 0, rig_edit_bones["ORG-shoulder.L"].length / 2])
-        self.bone_collections["mmd_dummy"].assign(shoulder_cancel_dummy_l_bone)
-        shoulder_cancel_dummy_l_bone.parent = rig_edit_bones["mmd_append_shoulder_parent.L"]
-        shoulder_cancel_dummy_l_bone.roll = 0
-
-        shoulder_cancel_dummy_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel_dummy.R")
-        shoulder_cancel_dummy_r_bone.head = rig_edit_bones["ORG-shoulder.R"].head
-        shoulder_cancel_dummy_r_bone.tail = shoulder_cancel_dummy_r_bone.head + Vector([0, 0, rig_edit_bones["ORG-shoulder.R"].length / 2])
-        self.bone_collections["mmd_dummy"].assign(shoulder_cancel_dummy_r_bone)
-        shoulder_cancel_dummy_r_bone.parent = rig_edit_bones["mmd_append_shoulder_parent.R"]
-        shoulder_cancel_dummy_r_bone.roll = 0
+    def _add_shoulder_cancel_dummy_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
+        shoulder_cancel_dummy_l_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel_dummy.L")
+        shoulder_cancel_dummy_l_head = plan.head("ORG-shoulder.L")
+        plan.set(shoulder_cancel_dummy_l_bone, head=shoulder_cancel_dummy_l_head, tail=shoulder_cancel_dummy_l_head + Vector([0, 0, plan.length("ORG-shoulder.L") / 2]))
+        plan.assign("mmd_dummy", shoulder_cancel_dummy_l_bone)
+        plan.set_parent(shoulder_cancel_dummy_l_bone, "mmd_append_shoulder_parent.L")
+        plan.set(shoulder_cancel_dummy_l_bone, roll=0)
+
+        shoulder_cancel_dummy_r_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel_dummy.R")
+        shoulder_cancel_dummy_r_head = plan.head("ORG-shoulder.R")
+        plan.set(shoulder_cancel_dummy_r_bone, head=shoulder_cancel_dummy_r_head, tail=shoulder_cancel_dummy_r_head + Vector([0, 0, plan.length("ORG-shoulder.R") / 2]))
+        plan.assign("mmd_dummy", shoulder_cancel_dummy_r_bone)
+        plan.set_parent(shoulder_cancel_dummy_r_bone, "mmd_append_shoulder_parent.R")
+        plan.set(shoulder_cancel_dummy_r_bone, roll=0)
 
         return shoulder_cancel_dummy_l_bone, shoulder_cancel_dummy_r_bone
 
-    def _add_shoulder_cancel_shadow_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones) -> Tuple[bpy.types.EditBone, bpy.types.EditBone]:
-        shoulder_cancel_shadow_l_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel_shadow.L")
-        shoulder_cancel_shadow_l_bone.head = rig_edit_bones["ORG-shoulder.L"].head
-        shoulder_cancel_shadow_l_bone.tail = shoulder_cancel_shadow_l_bone.head + Vector([0, 0, rig_edit_bones["ORG-shoulder.L"].length / 2])
-        self.bone_collections["mmd_shadow"].assign(shoulder_cancel_shadow_l_bone)
-        shoulder_cancel_shadow_l_bone.parent = rig_edit_bones["ORG-spine.003"]
-        shoulder_cancel_shadow_l_bone.roll = 0
-
-        shoulder_cancel_shadow_r_bone = self.get_or_create_bone(rig_edit_bones, "mmd_append_shoulder_cancel_shadow.R")
-        shoulder_cancel_shadow_r_bone.head = rig_edit_bones["ORG-shoulder.R"].head
-        shoulder_cancel_shadow_r_bone.tail = shoulder_cancel_shadow_r_bone.head + Vector([0, 0, rig_edit_bones["ORG-shoulder.R"].length / 2])
-        self.bone_collections["mmd_shadow"].assign(shoulder_cancel_shadow_r_bone)
-        shoulder_cancel_shadow_r_bone.parent = rig_edit_bones["ORG-spine.003"]
-        shoulder_cancel_shadow_r_bone.roll = 0
+    def _add_shoulder_cancel_shadow_bones(self, plan: EditBonePlan) -> Tuple[str, str]:
+        shoulder_cancel_shadow_l_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel_shadow.L")
+        shoulder_cancel_shadow_l_head = plan.head("ORG-shoulder.L")
+        plan.set(shoulder_cancel_shadow_l_bone, head=shoulder_cancel_shadow_l_head, tail=shoulder_cancel_shadow_l_head + Vector([0, 0, plan.length("ORG-shoulder.L") / 2]))
+        plan.assign("mmd_shadow", shoulder_cancel_shadow_l_bone)
+        plan.set_parent(shoulder_cancel_shadow_l_bone, "ORG-spine.003")
+        plan.set(shoulder_cancel_shadow_l_bone, roll=0)
+
+        shoulder_cancel_shadow_r_bone = plan.get_or_create_bone("mmd_append_shoulder_cancel_shadow.R")
+        shoulder_cancel_shadow_r_head = plan.head("ORG-shoulder.R")
+        plan.set(shoulder_cancel_shadow_r_bone, head=shoulder_cancel_shadow_r_head, tail=shoulder_cancel_shadow_r_head + Vector([0, 0, plan.length("ORG-shoulder.R") / 2]))
+        plan.assign("mmd_shadow", shoulder_cancel_shadow_r_bone)
+        plan.set_parent(shoulder_cancel_shadow_r_bone, "ORG-spine.003")
+        plan.set(shoulder_cancel_shadow_r_bone, roll=0)
 
         return shoulder_cancel_shadow_l_bone, shoulder_cancel_shadow_r_bone
 
-    def _adjust_leg_bones(self, rig_edit_bones: bpy.types.ArmatureEditBones):
-        bone = rig_edit_bones["thigh_fk.L"]
-        for collections in rig_edit_bones["thigh_ik.L"].collections:
-            collections.assign(bone)
-        bone = rig_edit_bones["thigh_fk.R"]
-        for collections in rig_edit_bones["thigh_ik.R"].collections:
-            collections.assign(bone)
+    def _adjust_leg_bones(self, plan: EditBonePlan):
+        rig_edit_bones = self.edit_bones
+        for collection in rig_edit_bones["thigh_ik.L"].collections:
+            plan.assign(collection.name, "thigh_fk.L")
+        for collection in rig_edit_bones["thigh_ik.R"].collections:
+            plan.assign(collection.name, "thigh_fk.R")
 
     def imitate_mmd_bone_structure(self):
         """Only for converting Rigify to MMD compatible"""
         # pylint: disable=too-many-statements
-        rig_edit_bones = self.edit_bones
-
         # Add MMD Bone Collections if they don't exist
         if "mmd_dummy" not in self.bone_collections:
             self.bone_collections.new("mmd_dummy")
         if "mmd_shadow" not in self.bone_collections:
             self.bone_collections.new("mmd_shadow")
 
+        plan = EditBonePlan(self.raw_armature)
+
         # add center (センター) groove (グルーブ) bone
-        center_bone, groove_bone = self._add_root_bones(rig_edit_bones)
+        center_bone, groove_bone = self._add_root_bones(plan)
 
         # set spine parent-child relationship
-        if "MCH-torso.parent" in rig_edit_bones:
-            spine_root_bone = rig_edit_bones["MCH-torso.parent"]
+        if "MCH-torso.parent" in plan:
+            spine_root_bone = "MCH-torso.parent"
         else:
-            spine_root_bone = rig_edit_bones["root"]
+            spine_root_bone = "root"
 
-        center_bone.parent = spine_root_bone
-        groove_bone.parent = center_bone
-        rig_edit_bones["torso"].parent = groove_bone
+        plan.set_parent(center_bone, spine_root_bone)
+        plan.set_parent(groove_bone, center_bone)
+        plan.set_parent("torso", groove_bone)
 
-        self._add_shoulder_parent_bones(rig_edit_bones)
-        self._add_shoulder_cancel_bones(rig_edit_bones)
-        self._add_shoulder_cancel_dummy_bones(rig_edit_bones)
-        self._add_shoulder_cancel_shadow_bones(rig_edit_bones)
+        self._add_shoulder_parent_bones(plan)
+        self._add_shoulder_cancel_bones(plan)
+        self._add_shoulder_cancel_dummy_bones(plan)
+        self._add_shoulder_cancel_shadow_bones(plan)
 
-        self._add_upper_arm_twist_bones(rig_edit_bones)
+        self._add_upper_arm_twist_bones(plan)
 
-        self._add_wrist_twist_bones(rig_edit_bones)
+        self._add_wrist_twist_bones(plan)
 
-        self._add_leg_ik_parent_bones(rig_edit_bones)
+        self._add_leg_ik_parent_bones(plan)
 
-        self._add_toe_ik_bones(rig_edit_bones)
+        self._add_toe_ik_bones(plan)
 
         # add spine fk bones
-        spine_fk_bone = self.get_or_create_bone(rig_edit_bones, "spine_fk")
-        self.bone_collections["Torso (Tweak)"].assign(spine_fk_bone)
-        spine_fk_bone.head = rig_edit_bones["ORG-spine"].tail
-        spine_fk_bone.tail = rig_edit_bones["ORG-spine"].tail + rig_edit_bones["ORG-spine"].vector
-        spine_fk_bone.roll = 0
-        self.insert_edit_bone(spine_fk_bone, parent_bone=rig_edit_bones["MCH-spine"])
-
-        spine_fk_001_bone = self.get_or_create_bone(rig_edit_bones, "spine_fk.001")
-        self.bone_collections["Torso (Tweak)"].assign(spine_fk_001_bone)
-        spine_fk_001_bone.head = rig_edit_bones["ORG-spine.001"].tail
-        spine_fk_001_bone.tail = rig_edit_bones["ORG-spine.001"].tail + rig_edit_bones["ORG-spine.001"].vector
-        spine_fk_001_bone.roll = 0
-        self.insert_edit_bone(spine_fk_001_bone, parent_bone=rig_edit_bones["MCH-spine.001"])
-
-        spine_fk_002_bone = self.get_or_create_bone(rig_edit_bones, "spine_fk.002")
-        self.bone_collections["Torso (Tweak)"].assign(spine_fk_002_bone)
-        spine_fk_002_bone.head = rig_edit_bones["ORG-spine.002"].head
-        spine_fk_002_bone.tail = rig_edit_bones["ORG-spine.002"].tail
-        spine_fk_002_bone.roll = 0
-        self.insert_edit_bone(spine_fk_002_bone, parent_bone=rig_edit_bones["MCH-spine.002"])
-
-        spine_fk_003_bone = self.get_or_create_bone(rig_edit_bones, "spine_fk.003")
-        self.bone_collections["Torso (Tweak)"].assign(spine_fk_003_bone)
-        spine_fk_003_bone.head = rig_edit_bones["ORG-spine.003"].head
-        spine_fk_003_bone.tail = rig_edit_bones["ORG-spine.003"].tail
-        spine_fk_003_bone.roll = 0
-        self.insert_edit_bone(spine_fk_003_bone, parent_bone=rig_edit_bones["MCH-spine.003"])
+        spine_fk_bone = plan.get_or_create_bone("spine_fk")
+        plan.assign("Torso (Tweak)", spine_fk_bone)
+        plan.set(spine_fk_bone, head=plan.tail("ORG-spine"), tail=plan.tail("ORG-spine") + plan.vector("ORG-spine"), roll=0)
+        plan.insert(spine_fk_bone, "MCH-spine")
+
+        spine_fk_001_bone = plan.get_or_create_bone("spine_fk.001")
+        plan.assign("Torso (Tweak)", spine_fk_001_bone)
+        plan.set(spine_fk_001_bone, head=plan.tail("ORG-spine.001"), tail=plan.tail("ORG-spine.001") + plan.vector("ORG-spine.001"), roll=0)
+        plan.insert(spine_fk_001_bone, "MCH-spine.001")
+
+        spine_fk_002_bone = plan.get_or_create_bone("spine_fk.002")
+        plan.assign("Torso (Tweak)", spine_fk_002_bone)
+        plan.set(spine_fk_002_bone, head=plan.head("ORG-spine.002"), tail=plan.tail("ORG-spine.002"), roll=0)
+        plan.insert(spine_fk_002_bone, "MCH-spine.002")
+
+        spine_fk_003_bone = plan.get_or_create_bone("spine_fk.003")
+        plan.assign("Torso (Tweak)", spine_fk_003_bone)
+        plan.set(spine_fk_003_bone, head=plan.head("ORG-spine.003"), tail=plan.tail("ORG-spine.003"), roll=0)
+        plan.insert(spine_fk_003_bone, "MCH-spine.003")
 
         # split spine.002 (上半身) and spine.001 (下半身) bones
-        rig_edit_bones["ORG-spine.002"].use_connect = False
-        rig_edit_bones["DEF-spine.002"].use_connect = False
+        plan.set("ORG-spine.002", use_connect=False)
+        plan.set("DEF-spine.002", use_connect=False)
 
-        self.move_bone(rig_edit_bones["tweak_spine.002"], head=rig_edit_bones["ORG-spine.002"].head)
-        self.move_bone(rig_edit_bones["spine_fk.002"], head=rig_edit_bones["ORG-spine.002"].head)
-        self.move_bone(rig_edit_bones["MCH-spine.002"], head=rig_edit_bones["ORG-spine.002"].head)
-        self.move_bone(rig_edit_bones["chest"], head=rig_edit_bones["ORG-spine.002"].head)
+        plan.move("tweak_spine.002", head=plan.head("ORG-spine.002"))
+        plan.move("spine_fk.002", head=plan.head("ORG-spine.002"))
+        plan.move("MCH-spine.002", head=plan.head("ORG-spine.002"))
+        plan.move("chest", head=plan.head("ORG-spine.002"))
 
-        self.move_bone(rig_edit_bones["hips"], head=rig_edit_bones["ORG-spine.001"].tail)
+        plan.move("hips", head=plan.tail("ORG-spine.001"))
 
         # adjust torso bone
-        self._adjust_torso_bone(rig_edit_bones)
+        self._adjust_torso_bone(plan)
 
         # adjust leg bones
-        self._adjust_leg_bones(rig_edit_bones)
+        self._adjust_leg_bones(plan)
 
         # set face bones
-        if not self.has_face_bones():
-            # There are not enough bones for the setup.
-            return
+        if self.has_face_bones():
+            self._add_eye_fk_bones(plan)
 
-        self._add_eye_fk_bones(rig_edit_bones)
+        plan.apply()
 
     def setup_pose(self):
         pose_bones: Dict[str, bpy.types.PoseBone] = self.pose_bones
@@ -1089,20 +1081,31 @@ class RigifyArmatureObject(MMDBindArmatureObjectABC):
         # pylint: disable=too-many-arguments
         pose_bones = self.pose_bones
 
-        self.arm_l_ik_fk = 1.000  # use FK
-        self.arm_r_ik_fk = 1.000  # use FK
-        self.leg_l_ik_fk = 0.000  # use IK
-        self.leg_r_ik_fk = 0.000  # use IK
+        if (self.arm_l_ik_fk, self.arm_r_ik_fk, self.leg_l_ik_fk, self.leg_r_ik_fk) != (1.000, 1.000, 0.000, 0.000):
+            self.arm_l_ik_fk = 1.000  # use FK
+            self.arm_r_ik_fk = 1.000  # use FK
+            self.leg_l_ik_fk = 0.000  # use IK
+            self.leg_r_ik_fk = 0.000  # use IK
+            dependency_graph.update()
+
+        solver = PoseMatrixSolver(pose_bones)
+        solver.set_leader("ORG-foot.L", "foot_ik.L")
+        solver.set_leader("ORG-foot.R", "foot_ik.R")
+
+        def set_rotation(bone_name: str, rotation_matrix: Matrix):
+            solver.set_matrix(bone_name, Matrix.Translation(solver.matrix(bone_name).to_translation()) @ rotation_matrix)
 
-        def set_rotation(pose_bone: bpy.types.PoseBone, rotation_matrix: Matrix):
-            pose_bone.matrix = Matrix.Translation(pose_bone.matrix.to_translation()) @ rotation_matrix
+        def to_rotation_matrix(bone_name: str) -> Matrix:
+            return solver.matrix(bone_name).to_euler().to_matrix().to_4x4()
 
-        def to_rotation_matrix(pose_bone: bpy.types.PoseBone) -> Matrix:
-            return pose_bone.matrix.to_euler().to_matrix().to_4x4()
+        def translate_x(bone_name: str, distance: float):
+            solver.set_matrix(bone_name, solver.matrix(bone_name) @ Matrix.Translation(Vector([distance, 0, 0])))
 
         arm_l_target_rotation = Euler([math.radians(+90), math.radians(+123), math.radians(0)]).to_matrix().to_4x4()
         arm_r_target_rotation = Euler([math.radians(+90), math.radians(-123), math.radians(0)]).to_matrix().to_4x4()
 
+        # The arm and finger chains are solved parent first in the first iteration,
+        # the further iterations only converge the leg offsets measured on the IK chains.
         for _ in range(iterations):
             if pose_arms:
                 # arm.L
@@ -1111,7 +1114,7 @@ class RigifyArmatureObject(MMDBindArmatureObjectABC):
                     "forearm_fk.L",
                     "hand_fk.L",
                 ]:
-                    set_rotation(pose_bones[bone_name], arm_l_target_rotation)
+                    set_rotation(bone_name, arm_l_target_rotation)
 
                 # arm.R
                 for bone_name in [
@@ -1119,60 +1122,26 @@ class RigifyArmatureObject(MMDBindArmatureObjectABC):
                     "forearm_fk.R",
                     "hand_fk.R",
                 ]:
-                    set_rotation(pose_bones[bone_name], arm_r_target_rotation)
+                    set_rotation(bone_name, arm_r_target_rotation)
 
             if pose_legs:
                 # foot.L
-                if "mmd_append_leg_ik_parent.L" in pose_bones:
-                    pose_bones["mmd_append_leg_ik_parent.L"].matrix = pose_bones["mmd_append_leg_ik_parent.L"].matrix @ Matrix.Translation(
-                        Vector(
-                            [
-                                pose_bones["ORG-thigh.L"].head[0] - pose_bones["ORG-foot.L"].head[0],
-                                0,
-                                0,
-                            ]
-                        )
-                    )
-                else:
-                    pose_bones["foot_ik.L"].matrix = pose_bones["foot_ik.L"].matrix @ Matrix.Translation(
-                        Vector(
-                            [
-                                pose_bones["ORG-thigh.L"].head[0] - pose_bones["ORG-foot.L"].head[0],
-                                0,
-                                0,
-                            ]
-                        )
-                    )
-
-                pose_bones["foot_ik.L"].matrix = pose_bones["foot_ik.L"].matrix @ Matrix.Rotation(-pose_bones["ORG-foot.L"].matrix.to_euler().z, 4, "Z")
+                translate_x(
+                    "mmd_append_leg_ik_parent.L" if "mmd_append_leg_ik_parent.L" in pose_bones else "foot_ik.L",
+                    solver.matrix("ORG-thigh.L").translation[0] - solver.matrix("ORG-foot.L").translation[0],
+                )
+                solver.set_matrix("foot_ik.L", solver.matrix("foot_ik.L") @ Matrix.Rotation(-solver.matrix("ORG-foot.L").to_euler().z, 4, "Z"))
 
                 # foot.R
-                if "mmd_append_leg_ik_parent.R" in pose_bones:
-                    pose_bones["mmd_append_leg_ik_parent.R"].matrix = pose_bones["mmd_append_leg_ik_parent.R"].matrix @ Matrix.Translation(
-                        Vector(
-                            [
-                                pose_bones["ORG-thigh.R"].head[0] - pose_bones["ORG-foot.R"].head[0],
-                                0,
-                                0,
-                            ]
-                        )
-                    )
-                else:
-                    pose_bones["foot_ik.R"].matrix = pose_bones["foot_ik.R"].matrix @ Matrix.Translation(
-                        Vector(
-                            [
-                                pose_bones["ORG-thigh.R"].head[0] - pose_bones["ORG-foot.R"].head[0],
-                                0,
-                                0,
-                            ]
-                        )
-                    )
-
-                pose_bones["foot_ik.R"].matrix = pose_bones["foot_ik.R"].matrix @ Matrix.Rotation(-pose_bones["ORG-foot.R"].matrix.to_euler().z, 4, "Z")
+                translate_x(
+                    "mmd_append_leg_ik_parent.R" if "mmd_append_leg_ik_parent.R" in pose_bones else "foot_ik.R",
+                    solver.matrix("ORG-thigh.R").translation[0] - solver.matrix("ORG-foot.R").translation[0],
+                )
+                solver.set_matrix("foot_ik.R", solver.matrix("foot_ik.R") @ Matrix.Rotation(-solver.matrix("ORG-foot.R").to_euler().z, 4, "Z"))
 
             if pose_fingers:
                 # finger.L
-                target_rotation = to_rotation_matrix(pose_bones["f_middle.01.L"])
+                target_rotation = to_rotation_matrix("f_middle.01.L")
                 for bone_name in [
                     "f_index.01.L",
                     "f_index.02.L",
@@ -1187,10 +1156,10 @@ class RigifyArmatureObject(MMDBindArmatureObjectABC):
                     "f_pinky.02.L",
                     "f_pinky.03.L",
                 ]:
-                    set_rotation(pose_bones[bone_name], target_rotation)
+                    set_rotation(bone_name, target_rotation)
 
                 # finger.R
-                target_rotation = to_rotation_matrix(pose_bones["f_middle.01.R"])
+                target_rotation = to_rotation_matrix("f_middle.01.R")
                 for bone_name in [
                     "f_index.01.R",
                     "f_index.02.R",
@@ -1205,9 +1174,10 @@ class RigifyArmatureObject(MMDBindArmatureObjectABC):
                     "f_pinky.02.R",
                     "f_pinky.03.R",
                 ]:
-                    set_rotation(pose_bones[bone_name], target_rotation)
+                    set_rotation(bone_name, target_rotation)
 
-            dependency_graph.update()
+        solver.apply()
+        dependency_graph.update()
 
     def derig(
         self,
@@ -1451,10 +1421,10 @@ class MMDRigifyArmatureObject(RigifyArmatureObject):
 
         return True
 
-    @classmethod
+    @staticmethod
     def _fit_bone(
-        cls,
-        rig_edit_bone: bpy.types.EditBone,
+        plan: EditBonePlan,
+        rig_bone_name: str,
         mmd_edit_bones: bpy.types.ArmatureEditBones,
         mmd_bone_name: str,
     ):
@@ -1463,123 +1433,130 @@ class MMDRigifyArmatureObject(RigifyArmatureObject):
             return
 
         mmd_edit_bone: bpy.types.EditBone = mmd_edit_bones[mmd_bone_name]
-        rig_edit_bone.head = mmd_edit_bone.head
-        rig_edit_bone.tail = mmd_edit_bone.tail
-        cls.fit_edit_bone_rotation(mmd_edit_bone, rig_edit_bone)
+        plan.set(rig_bone_name, head=mmd_edit_bone.head, tail=mmd_edit_bone.tail)
+        plan.fit_external_rotation(mmd_edit_bone, rig_bone_name)
 
     def imitate_mmd_bone_structure_focus_on_mmd(self, mmd_armature_object: MMDArmatureObject):
         # pylint: disable=too-many-locals,too-many-statements
-        rig_edit_bones: bpy.types.ArmatureEditBones = self.edit_bones
         mmd_edit_bones: bpy.types.ArmatureEditBones = mmd_armature_object.strict_edit_bones
 
+        plan = EditBonePlan(self.raw_armature)
+
         # enable Local Location of foot_ik.L/R
-        rig_edit_bones["foot_ik.L"].use_local_location = True
-        rig_edit_bones["foot_ik.R"].use_local_location = True
+        plan.set("foot_ik.L", use_local_location=True)
+        plan.set("foot_ik.R", use_local_location=True)
 
         # add center (センター) groove (グルーブ) bone
-        center_bone, groove_bone = self._add_root_bones(rig_edit_bones)
-        self._fit_bone(center_bone, mmd_edit_bones, "センター")
+        center_bone, groove_bone = self._add_root_bones(plan)
+        self._fit_bone(plan, center_bone, mmd_edit_bones, "センター")
 
         if MMDBoneType.GROOVE in mmd_armature_object.exist_bone_types:
-            self._fit_bone(groove_bone, mmd_edit_bones, "グルーブ")
+            self._fit_bone(plan, groove_bone, mmd_edit_bones, "グルーブ")
         else:
-            groove_bone.head = mmd_edit_bones["センター"].head
-            groove_bone.tail = groove_bone.head + Vector([0.0, 0.0, mmd_edit_bones["センター"].length / 6])
-            groove_bone.roll = 0
+            groove_head = mmd_edit_bones["センター"].head.copy()
+            plan.set(groove_bone, head=groove_head, tail=groove_head + Vector([0.0, 0.0, mmd_edit_bones["センター"].length / 6]), roll=0)
 
         # set spine parent-child relationship
-        center_bone.parent = rig_edit_bones["MCH-torso.parent"]
-        groove_bone.parent = center_bone
-        rig_edit_bones["torso"].parent = groove_bone
+        plan.set_parent(center_bone, "MCH-torso.parent")
+        plan.set_parent(groove_bone, center_bone)
+        plan.set_parent("torso", groove_bone)
 
         # add shoulder parent, cancel (肩P, 肩C)
-        shoulder_parent_l_bone, shoulder_parent_r_bone = self._add_shoulder_parent_bones(rig_edit_bones)
-        shoulder_cancel_l_bone, shoulder_cancel_r_bone = self._add_shoulder_cancel_bones(rig_edit_bones)
-        shoulder_cancel_dummy_l_bone, shoulder_cancel_dummy_r_bone = self._add_shoulder_cancel_dummy_bones(rig_edit_bones)
-        shoulder_cancel_shadow_l_bone, shoulder_cancel_shadow_r_bone = self._add_shoulder_cancel_shadow_bones(rig_edit_bones)
+        shoulder_parent_l_bone, shoulder_parent_r_bone = self._add_shoulder_parent_bones(plan)
+        shoulder_cancel_l_bone, shoulder_cancel_r_bone = self._add_shoulder_cancel_bones(plan)
+        shoulder_cancel_dummy_l_bone, shoulder_cancel_dummy_r_bone = self._add_shoulder_cancel_dummy_bones(plan)
+        shoulder_cancel_shadow_l_bone, shoulder_cancel_shadow_r_bone = self._add_shoulder_cancel_shadow_bones(plan)
 
         if MMDBoneType.SHOULDER_CANCEL in mmd_armature_object.exist_bone_types:
-            self._fit_bone(shoulder_parent_l_bone, mmd_edit_bones, "左肩P")
-            self._fit_bone(shoulder_parent_r_bone, mmd_edit_bones, "右肩P")
+            self._fit_bone(plan, shoulder_parent_l_bone, mmd_edit_bones, "左肩P")
+            self._fit_bone(plan, shoulder_parent_r_bone, mmd_edit_bones, "右肩P")
 
-            self._fit_bone(shoulder_cancel_l_bone, mmd_edit_bones, "左肩C")
-            self._fit_bone(shoulder_cancel_r_bone, mmd_edit_bones, "右肩C")
+            self._fit_bone(plan, shoulder_cancel_l_bone, mmd_edit_bones, "左肩C")
+            self._fit_bone(plan, shoulder_cancel_r_bone, mmd_edit_bones, "右肩C")
 
-            self._fit_bone(shoulder_cancel_dummy_l_bone, mmd_edit_bones, "左肩P")
-            self._fit_bone(shoulder_cancel_dummy_r_bone, mmd_edit_bones, "右肩P")
+            self._fit_bone(plan, shoulder_cancel_dummy_l_bone, mmd_edit_bones, "左肩P")
+            self._fit_bone(plan, shoulder_cancel_dummy_r_bone, mmd_edit_bones, "右肩P")
 
-            self._fit_bone(shoulder_cancel_shadow_l_bone, mmd_edit_bones, "左肩P")
-            self._fit_bone(shoulder_cancel_shadow_r_bone, mmd_edit_bones, "右肩P")
+            self._fit_bone(plan, shoulder_cancel_shadow_l_bone, mmd_edit_bones, "左肩P")
+            self._fit_bone(plan, shoulder_cancel_shadow_r_bone, mmd_edit_bones, "右肩P")
 
         # add arm twist (腕捩)
-        upper_arm_twist_fk_l_bone, upper_arm_twist_fk_r_bone = self._add_upper_arm_twist_bones(rig_edit_bones)
+        upper_arm_twist_fk_l_bone, upper_arm_twist_fk_r_bone = self._add_upper_arm_twist_bones(plan)
         if MMDBoneType.UPPER_ARM_TWIST in mmd_armature_object.exist_bone_types:
-            self._fit_bone(upper_arm_twist_fk_l_bone, mmd_edit_bones, "左腕捩")
-            self._fit_bone(upper_arm_twist_fk_r_bone, mmd_edit_bones, "右腕捩")
+            self._fit_bone(plan, upper_arm_twist_fk_l_bone, mmd_edit_bones, "左腕捩")
+            self._fit_bone(plan, upper_arm_twist_fk_r_bone, mmd_edit_bones, "右腕捩")
 
         # add wrist twist (手捩)
-        wrist_twist_fk_l_bone, wrist_twist_fk_r_bone = self._add_wrist_twist_bones(rig_edit_bones)
+        wrist_twist_fk_l_bone, wrist_twist_fk_r_bone = self._add_wrist_twist_bones(plan)
         if MMDBoneType.WRIST_TWIST in mmd_armature_object.exist_bone_types:
-            self._fit_bone(wrist_twist_fk_l_bone, mmd_edit_bones, "左手捩")
-            self._fit_bone(wrist_twist_fk_r_bone, mmd_edit_bones, "右手捩")
+            self._fit_bone(plan, wrist_twist_fk_l_bone, mmd_edit_bones, "左手捩")
+            self._fit_bone(plan, wrist_twist_fk_r_bone, mmd_edit_bones, "右手捩")
 
         # adjust palm
-        self._adjust_palm_bone(mmd_armature_object, rig_edit_bones)
+        self._adjust_palm_bone(mmd_armature_object, plan)
 
         # add Leg IKP (足IK親)
-        leg_ik_parent_l_bone, leg_ik_parent_r_bone = self._add_leg_ik_parent_bones(rig_edit_bones)
+        leg_ik_parent_l_bone, leg_ik_parent_r_bone = self._add_leg_ik_parent_bones(plan)
         if MMDBoneType.LEG_IK_PARENT in mmd_armature_object.exist_bone_types:
-            self._fit_bone(leg_ik_parent_l_bone, mmd_edit_bones, "左足IK親")
-            self._fit_bone(leg_ik_parent_r_bone, mmd_edit_bones, "右足IK親")
+            self._fit_bone(plan, leg_ik_parent_l_bone, mmd_edit_bones, "左足IK親")
+            self._fit_bone(plan, leg_ik_parent_r_bone, mmd_edit_bones, "右足IK親")
 
-        self._adjust_toe_bones(mmd_armature_object, rig_edit_bones)
+        self._adjust_toe_bones(mmd_armature_object, plan)
 
         # add toe IK (つま先ＩＫ)
-        toe_ik_l_bone, toe_ik_r_bone = self._add_toe_ik_bones(rig_edit_bones)
-        self._fit_bone(toe_ik_l_bone, mmd_edit_bones, "左つま先ＩＫ")
-        self.move_bone(
+        toe_ik_l_bone, toe_ik_r_bone = self._add_toe_ik_bones(plan)
+        self._fit_bone(plan, toe_ik_l_bone, mmd_edit_bones, "左つま先ＩＫ")
+        plan.move(
             toe_ik_l_bone,
-            head=toe_ik_l_bone.head + rig_edit_bones["ORG-foot.L"].tail - mmd_edit_bones["左足首"].tail,
+            head=plan.head(toe_ik_l_bone) + plan.tail("ORG-foot.L") - mmd_edit_bones["左足首"].tail,
         )
-        self._fit_bone(toe_ik_r_bone, mmd_edit_bones, "右つま先ＩＫ")
-        self.move_bone(
+        self._fit_bone(plan, toe_ik_r_bone, mmd_edit_bones, "右つま先ＩＫ")
+        plan.move(
             toe_ik_r_bone,
-            head=toe_ik_r_bone.head + rig_edit_bones["ORG-foot.R"].tail - mmd_edit_bones["右足首"].tail,
+            head=plan.head(toe_ik_r_bone) + plan.tail("ORG-foot.R") - mmd_edit_bones["右足首"].tail,
         )
 
-        self._split_upper_and_lower_body(rig_edit_bones, mmd_edit_bones)
+        self._split_upper_and_lower_body(plan, mmd_edit_bones)
 
         # adjust torso
-        torso_bone = self._adjust_torso_bone(rig_edit_bones)
+        torso_bone = self._adjust_torso_bone(plan)
         if MMDBoneType.TOLSO in mmd_armature_object.exist_bone_types:
-            self.move_bone(torso_bone, head=mmd_edit_bones["腰"].head)
-            self.fit_edit_bone_rotation(mmd_edit_bones["腰"], torso_bone)
+            plan.move(torso_bone, head=mmd_edit_bones["腰"].head)
+            plan.fit_external_rotation(mmd_edit_bones["腰"], torso_bone)
 
         # adjust leg bones
-        self._adjust_foot_bones(mmd_armature_object, rig_edit_bones)
-        self._adjust_leg_bones(rig_edit_bones)
+        self._adjust_foot_bones(mmd_armature_object, plan)
+        self._adjust_leg_bones(plan)
+
+        self.imitate_mmd_face_bone_structure(mmd_armature_object, plan)
 
-        self.imitate_mmd_face_bone_structure(mmd_armature_object)
+        plan.apply()
 
     def _adjust_palm_bone(
         self,
         mmd_armature_object: MMDArmatureObject,
-        rig_edit_bones: bpy.types.ArmatureEditBones,
+        plan: EditBonePlan,
     ):
         mmd_edit_bones: bpy.types.ArmatureEditBones = mmd_armature_object.strict_edit_bones
 
         if "左小指０" not in mmd_edit_bones:
-            rig_edit_bones["palm.L"].head = self.to_center(mmd_edit_bones["左ひじ"].tail, mmd_edit_bones["左小指１"].head)
-            rig_edit_bones["palm.L"].tail = mmd_edit_bones["左小指１"].head
+            plan.set(
+                "palm.L",
+                head=self.to_center(mmd_edit_bones["左ひじ"].tail, mmd_edit_bones["左小指１"].head),
+                tail=mmd_edit_bones["左小指１"].head,
+            )
 
         if "右小指０" not in mmd_edit_bones:
-            rig_edit_bones["palm.R"].head = self.to_center(mmd_edit_bones["右ひじ"].tail, mmd_edit_bones["右小指１"].head)
-            rig_edit_bones["palm.R"].tail = mmd_edit_bones["右小指１"].head
+            plan.set(
+                "palm.R",
+                head=self.to_center(mmd_edit_bones["右ひじ"].tail, mmd_edit_bones["右小指１"].head),
+                tail=mmd_edit_bones["右小指１"].head,
+            )
 
     def _adjust_toe_bones(
         self,
         mmd_armature_object: MMDArmatureObject,
-        rig_edit_bones: bpy.types.ArmatureEditBones,
+        plan: EditBonePlan,
     ):
         # adjust toe (つま先)
         if MMDBoneType.TOE_EX not in mmd_armature_object.exist_bone_types:
@@ -1587,91 +1564,90 @@ class MMDRigifyArmatureObject(RigifyArmatureObject):
 
         mmd_edit_bones: bpy.types.ArmatureEditBones = mmd_armature_object.strict_edit_bones
 
-        rig_edit_bones["ORG-toe.L"].align_roll(mmd_edit_bones["左足先EX"].z_axis)
-        rig_edit_bones["DEF-toe.L"].align_roll(mmd_edit_bones["左足先EX"].z_axis)
-        rig_edit_bones["toe.L"].align_roll(mmd_edit_bones["左足先EX"].z_axis)
+        plan.align_roll("ORG-toe.L", mmd_edit_bones["左足先EX"].z_axis)
+        plan.align_roll("DEF-toe.L", mmd_edit_bones["左足先EX"].z_axis)
+        plan.align_roll("toe.L", mmd_edit_bones["左足先EX"].z_axis)
 
-        rig_edit_bones["ORG-toe.R"].align_roll(mmd_edit_bones["左足先EX"].z_axis)
-        rig_edit_bones["DEF-toe.R"].align_roll(mmd_edit_bones["右足先EX"].z_axis)
-        rig_edit_bones["toe.R"].align_roll(mmd_edit_bones["右足先EX"].z_axis)
+        plan.align_roll("ORG-toe.R", mmd_edit_bones["左足先EX"].z_axis)
+        plan.align_roll("DEF-toe.R", mmd_edit_bones["右足先EX"].z_axis)
+        plan.align_roll("toe.R", mmd_edit_bones["右足先EX"].z_axis)
 
     def _adjust_foot_bones(
         self,
         mmd_armature_object: MMDArmatureObject,
-        rig_edit_bones: bpy.types.ArmatureEditBones,
+        plan: EditBonePlan,
     ):
         mmd_edit_bones: bpy.types.ArmatureEditBones = mmd_armature_object.strict_edit_bones
 
-        rig_foot_dummy_l_bone, rig_foot_dummy_r_bone = self._add_foot_dummy_bones(rig_edit_bones)
-        self._fit_bone(rig_foot_dummy_l_bone, mmd_edit_bones, "左足首")
-        self._fit_bone(rig_foot_dummy_r_bone, mmd_edit_bones, "右足首")
+        rig_foot_dummy_l_bone, rig_foot_dummy_r_bone = self._add_foot_dummy_bones(plan)
+        self._fit_bone(plan, rig_foot_dummy_l_bone, mmd_edit_bones, "左足首")
+        self._fit_bone(plan, rig_foot_dummy_r_bone, mmd_edit_bones, "右足首")
 
     def _split_upper_and_lower_body(
         self,
-        rig_edit_bones: bpy.types.ArmatureEditBones,
+        plan: EditBonePlan,
         mmd_edit_bones: bpy.types.ArmatureEditBones,
     ):
         # split spine.002 (上半身) and spine.001 (下半身)
-        rig_edit_bones["ORG-spine.002"].use_connect = False
-        rig_edit_bones["DEF-spine.002"].use_connect = False
-        rig_edit_bones["ORG-spine.002"].head = mmd_edit_bones["上半身"].head
-        rig_edit_bones["DEF-spine.002"].head = mmd_edit_bones["上半身"].head
-        self.move_bone(rig_edit_bones["tweak_spine.002"], head=mmd_edit_bones["上半身"].head)
-        self.move_bone(
-            rig_edit_bones["spine_fk.002"],
+        plan.set("ORG-spine.002", use_connect=False)
+        plan.set("DEF-spine.002", use_connect=False)
+        plan.set("ORG-spine.002", head=mmd_edit_bones["上半身"].head)
+        plan.set("DEF-spine.002", head=mmd_edit_bones["上半身"].head)
+        plan.move("tweak_spine.002", head=mmd_edit_bones["上半身"].head)
+        plan.move(
+            "spine_fk.002",
             head=mmd_edit_bones["上半身"].head,
             tail=mmd_edit_bones["上半身"].tail,
         )
-        self.move_bone(rig_edit_bones["MCH-spine.002"], head=mmd_edit_bones["上半身"].head)
+        plan.move("MCH-spine.002", head=mmd_edit_bones["上半身"].head)
 
-        rig_edit_bones["ORG-spine.001"].tail = mmd_edit_bones["下半身"].head
-        rig_edit_bones["DEF-spine.001"].tail = mmd_edit_bones["下半身"].head
-        self.move_bone(rig_edit_bones["spine_fk.001"], head=mmd_edit_bones["下半身"].head)
-        self.move_bone(rig_edit_bones["MCH-spine.001"], head=mmd_edit_bones["下半身"].head)
-        self.move_bone(rig_edit_bones["chest"], head=mmd_edit_bones["下半身"].head)
-        self.move_bone(rig_edit_bones["hips"], head=mmd_edit_bones["下半身"].head)
+        plan.set("ORG-spine.001", tail=mmd_edit_bones["下半身"].head)
+        plan.set("DEF-spine.001", tail=mmd_edit_bones["下半身"].head)
+        plan.move("spine_fk.001", head=mmd_edit_bones["下半身"].head)
+        plan.move("MCH-spine.001", head=mmd_edit_bones["下半身"].head)
+        plan.move("chest", head=mmd_edit_bones["下半身"].head)
+        plan.move("hips", head=mmd_edit_bones["下半身"].head)
 
-    def imitate_mmd_face_bone_structure(self, mmd_armature_object: MMDArmatureObject):
+    def imitate_mmd_face_bone_structure(self, mmd_armature_object: MMDArmatureObject, plan: EditBonePlan):
         if not self.has_face_bones():
             # There are not enough bones for the setup.
             return
 
-        rig_edit_bones: bpy.types.ArmatureEditBones = self.edit_bones
         mmd_edit_bones: bpy.types.ArmatureEditBones = mmd_armature_object.strict_edit_bones
 
         eye_height_translation_vector = Vector(
             [
                 0.0,
                 0.0,
-                mmd_edit_bones["左目"].head[2] - rig_edit_bones["ORG-eye.L"].head[2],
+                mmd_edit_bones["左目"].head[2] - plan.head("ORG-eye.L")[2],
             ]
         )
 
-        rig_edit_bones["ORG-eye.L"].parent = rig_edit_bones["ORG-face"]
-        rig_edit_bones["ORG-eye.L"].length = mmd_edit_bones["左目"].length
-        self.move_bone(rig_edit_bones["ORG-eye.L"], head=mmd_edit_bones["左目"].head)
-        self._fit_bone(rig_edit_bones["ORG-eye.L"], mmd_edit_bones, "左目")
+        plan.set_parent("ORG-eye.L", "ORG-face")
+        plan.set_length("ORG-eye.L", mmd_edit_bones["左目"].length)
+        plan.move("ORG-eye.L", head=mmd_edit_bones["左目"].head)
+        self._fit_bone(plan, "ORG-eye.L", mmd_edit_bones, "左目")
 
-        rig_edit_bones["ORG-eye.R"].parent = rig_edit_bones["ORG-face"]
-        rig_edit_bones["ORG-eye.R"].length = mmd_edit_bones["右目"].length
-        self.move_bone(rig_edit_bones["ORG-eye.R"], head=mmd_edit_bones["右目"].head)
-        self._fit_bone(rig_edit_bones["ORG-eye.R"], mmd_edit_bones, "右目")
+        plan.set_parent("ORG-eye.R", "ORG-face")
+        plan.set_length("ORG-eye.R", mmd_edit_bones["右目"].length)
+        plan.move("ORG-eye.R", head=mmd_edit_bones["右目"].head)
+        self._fit_bone(plan, "ORG-eye.R", mmd_edit_bones, "右目")
 
-        rig_edit_bones["eye_common"].translate(eye_height_translation_vector)
-        rig_edit_bones["eye.L"].translate(eye_height_translation_vector)
-        rig_edit_bones["eye.R"].translate(eye_height_translation_vector)
-        rig_edit_bones["eye_master.L"].translate(eye_height_translation_vector)
-        rig_edit_bones["eye_master.R"].translate(eye_height_translation_vector)
-        rig_edit_bones["MCH-eye.R"].translate(eye_height_translation_vector)
-        rig_edit_bones["MCH-eye.L"].translate(eye_height_translation_vector)
+        plan.translate("eye_common", eye_height_translation_vector)
+        plan.translate("eye.L", eye_height_translation_vector)
+        plan.translate("eye.R", eye_height_translation_vector)
+        plan.translate("eye_master.L", eye_height_translation_vector)
+        plan.translate("eye_master.R", eye_height_translation_vector)
+        plan.translate("MCH-eye.R", eye_height_translation_vector)
+        plan.translate("MCH-eye.L", eye_height_translation_vector)
 
         # add eyes fk bones
-        rig_eye_fk_l_bone, rig_eye_fk_r_bone, rig_eyes_fk_bone = self._add_eye_fk_bones(rig_edit_bones)
-        rig_eyes_fk_bone.head = mmd_edit_bones["両目"].head
-        rig_eyes_fk_bone.tail = rig_eyes_fk_bone.head - Vector([0, mmd_edit_bones["両目"].length, 0])
-        self.fit_edit_bone_rotation(mmd_edit_bones["両目"], rig_eyes_fk_bone)
-        self.fit_edit_bone_rotation(mmd_edit_bones["左目"], rig_eye_fk_l_bone)
-        self.fit_edit_bone_rotation(mmd_edit_bones["右目"], rig_eye_fk_r_bone)
+        rig_eye_fk_l_bone, rig_eye_fk_r_bone, rig_eyes_fk_bone = self._add_eye_fk_bones(plan)
+        rig_eyes_fk_head = mmd_edit_bones["両目"].head.copy()
+        plan.set(rig_eyes_fk_bone, head=rig_eyes_fk_head, tail=rig_eyes_fk_head - Vector([0, mmd_edit_bones["両目"].length, 0]))
+        plan.fit_external_rotation(mmd_edit_bones["両目"], rig_eyes_fk_bone)
+        plan.fit_external_rotation(mmd_edit_bones["左目"], rig_eye_fk_l_bone)
+        plan.fit_external_rotation(mmd_edit_bones["右目"], rig_eye_fk_r_bone)
 
     def bind_bones(self, mmd_armature_object: MMDArmatureObject, bind_leg_d: bool = False):
         bind_mmd_rigify_data_path = f"pose.bones{self.datapaths[ControlType.BIND_MMD_MMD_APPEND].data_path}"
@@ -1813,18 +1789,21 @@ class MMDRigifyArmatureObject(RigifyArmatureObject):
             mmd_edit_bones[mmd_bone_name].roll = rig_edit_bones[bind_bone_name].roll
 
     def imitate_mmd_bone_structure_focus_on_rigify(self, mmd_armature_object: MMDArmatureObject):
-        rig_edit_bones: bpy.types.ArmatureEditBones = self.edit_bones
         mmd_edit_bones: bpy.types.ArmatureEditBones = mmd_armature_object.strict_edit_bones
 
-        self._adjust_palm_bone(mmd_armature_object, rig_edit_bones)
+        plan = EditBonePlan(self.raw_armature)
+
+        self._adjust_palm_bone(mmd_armature_object, plan)
+
+        self._adjust_toe_bones(mmd_armature_object, plan)
 
-        self._adjust_toe_bones(mmd_armature_object, rig_edit_bones)
+        self._adjust_foot_bones(mmd_armature_object, plan)
 
-        self._adjust_foot_bones(mmd_armature_object, rig_edit_bones)
+        self._split_upper_and_lower_body(plan, mmd_edit_bones)
 
-        self._split_upper_and_lower_body(rig_edit_bones, mmd_edit_bones)
+        self.imitate_mmd_face_bone_structure(mmd_armature_object, plan)
 
-        self.imitate_mmd_face_bone_structure(mmd_armature_object)
+        plan.apply()
 
     def imitate_mmd_pose_behavior_focus_on_rigify(self):
         self.setup_pose()
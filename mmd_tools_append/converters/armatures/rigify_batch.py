@@ -0,0 +1,293 @@
+# Copyright 2026 MMD Tools Append authors
+# This file is part of MMD Tools Append.
+
+# Convert MMD models to Rigify rigs in headless Blender processes:
+#   blender -b --python rigify_batch.py -- [--output-dir DIR] [--workers N] [--focus-on-mmd] <file.blend|file.pmx>...
+# Each input file is converted in its own worker process, so a failure or a crash only loses that file.
+# The workers run the add-on operators, MMD Tools, MMD Tools Append and Rigify must be enabled in the preferences.
+# Keep this module free of add-on imports, it is executed as a plain script.
+
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List
+
+import bpy
+
+STAGE_LINE_PREFIX = "MMD_TOOLS_APPEND_RIGIFY_STAGE:"
+ERROR_LINE_PREFIX = "MMD_TOOLS_APPEND_RIGIFY_ERROR:"
+REPORT_FILE_NAME = "rigify_batch_report.json"
+
+
+class StageError(Exception):
+    pass
+
+
+def _to_output_filepaths(input_filepaths: List[str], output_dir: str) -> Dict[str, str]:
+    """Map each input file to its own output file, numbering the names shared by files in different folders or formats."""
+    output_filepaths: Dict[str, str] = {}
+    used_names = set()
+    for input_filepath in input_filepaths:
+        stem = os.path.splitext(os.path.basename(input_filepath))[0]
+        name = stem + "_rigify"
+        number = 1
+        while os.path.normcase(name) in used_names:
+            number += 1
+            name = f"{stem}_{number}_rigify"
+        used_names.add(os.path.normcase(name))
+        output_filepaths[input_filepath] = os.path.join(output_dir, name + ".blend")
+    return output_filepaths
+
+
+def _find_mmd_armature_object() -> bpy.types.Object:
+    for obj in bpy.context.scene.objects:
+        if obj.type == "ARMATURE" and obj.parent is not None and getattr(obj.parent, "mmd_type", None) == "ROOT":
+            return obj
+    raise StageError("No MMD armature found.")
+
+
+def _select_objects(objects: List[bpy.types.Object]):
+    if bpy.context.mode != "OBJECT":
+        bpy.ops.object.mode_set(mode="OBJECT")
+
+    for obj in bpy.context.view_layer.objects:
+        obj.select_set(False)
+
+    for obj in objects:
+        obj.select_set(True)
+
+    bpy.context.view_layer.objects.active = objects[-1]
+
+
+def _call_operator(operator, **kwargs):
+    result = operator(**kwargs)
+    if "FINISHED" not in result:
+        raise StageError(f"{operator.idname_py()} returned {result}")
+
+
+def _load(input_filepath: str):
+    if os.path.splitext(input_filepath)[1].lower() == ".pmx":
+        bpy.ops.wm.read_homefile(use_empty=True)
+        _call_operator(bpy.ops.mmd_tools.import_model, filepath=input_filepath)
+    else:
+        bpy.ops.wm.open_mainfile(filepath=input_filepath)
+
+
+def _fit_metarig(mmd_armature_object: bpy.types.Object) -> bpy.types.Object:
+    # runs MetarigArmatureObject.fit_bones
+    _select_objects([mmd_armature_object])
+    _call_operator(bpy.ops.mmd_tools_append.mmd_armature_add_metarig)
+    return bpy.context.view_layer.objects.active
+
+
+def _generate_rigify(metarig_object: bpy.types.Object) -> bpy.types.Object:
+    _select_objects([metarig_object])
+    _call_operator(bpy.ops.pose.rigify_generate)
+
+    rigify_object = getattr(metarig_object.data, "rigify_target_rig", None)
+    if rigify_object is None:
+        raise StageError("No generated Rigify rig found.")
+    return rigify_object
+
+
+def _bind(rigify_object: bpy.types.Object, mmd_armature_object: bpy.types.Object, focus_on_mmd: bool):
+    # runs MMDRigifyArmatureObject.bind_bones
+    _select_objects([mmd_armature_object, rigify_object])
+    if focus_on_mmd:
+        _call_operator(bpy.ops.mmd_tools_append.mmd_rigify_mmd_focused_integrate)
+    else:
+        _call_operator(bpy.ops.mmd_tools_append.mmd_rigify_rigify_focused_integrate)
+
+
+def convert(input_filepath: str, output_filepath: str, focus_on_mmd: bool):
+    """Convert a single file, print the seconds taken by each stage."""
+
+    def run_stage(stage_name: str, function, *args):
+        start_time = time.perf_counter()
+        result = function(*args)
+        print(STAGE_LINE_PREFIX + json.dumps({"stage": stage_name, "seconds": time.perf_counter() - start_time}), flush=True)
+        return result
+
+    run_stage("load", _load, input_filepath)
+    mmd_armature_object = _find_mmd_armature_object()
+    metarig_object = run_stage("fit_metarig", _fit_metarig, mmd_armature_object)
+    rigify_object = run_stage("generate_rigify", _generate_rigify, metarig_object)
+    run_stage("bind_bones", _bind, rigify_object, mmd_armature_object, focus_on_mmd)
+    run_stage("save", lambda: _call_operator(bpy.ops.wm.save_as_mainfile, filepath=output_filepath))
+
+
+class RigifyBatchJob:
+    """Convert the input files in a pool of headless Blender processes, one process per file."""
+
+    def __init__(self, input_filepaths: List[str], output_dir: str, worker_count: int, focus_on_mmd: bool):
+        self.output_dir = output_dir
+        self.worker_count = max(1, worker_count)
+        self.focus_on_mmd = focus_on_mmd
+
+        # the same file given twice is converted once
+        input_filepaths = list(dict.fromkeys(input_filepaths))
+
+        # input filepath -> {"output": str, "stages": {stage name: seconds}, "error": Optional[str]}
+        self.results: Dict[str, Dict] = {p: {"output": o, "stages": {}, "error": None} for p, o in _to_output_filepaths(input_filepaths, output_dir).items()}
+
+        self._pending_filepaths: List[str] = list(input_filepaths)
+        self._processes: Dict[str, subprocess.Popen] = {}
+        self._output_readers: Dict[str, threading.Thread] = {}
+        self._process_output_tails: Dict[str, List[str]] = {}
+        self._line_queue: "queue.Queue[tuple]" = queue.Queue()
+        self._start_time = 0.0
+        self.elapsed_time = 0.0
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._start_processes()
+
+    def _start_processes(self):
+        while self._pending_filepaths and len(self._processes) < self.worker_count:
+            input_filepath = self._pending_filepaths.pop(0)
+            command = [bpy.app.binary_path, "-b", "--python-exit-code", "1", "--python", __file__, "--", "--worker", "--output", self.results[input_filepath]["output"]]
+            if self.focus_on_mmd:
+                command.append("--focus-on-mmd")
+            command.append(input_filepath)
+
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                errors="ignore",
+            )
+            self._processes[input_filepath] = process
+            output_reader = threading.Thread(target=self._read_output, args=(input_filepath, process), daemon=True)
+            output_reader.start()
+            self._output_readers[input_filepath] = output_reader
+
+    def _read_output(self, input_filepath: str, process: subprocess.Popen):
+        tail = self._process_output_tails.setdefault(input_filepath, [])
+        for line in process.stdout:
+            line = line.rstrip()
+            if line.startswith(STAGE_LINE_PREFIX) or line.startswith(ERROR_LINE_PREFIX):
+                self._line_queue.put((input_filepath, line))
+                continue
+
+            tail.append(line)
+            del tail[:-20]
+
+    def _collect_lines(self):
+        while not self._line_queue.empty():
+            input_filepath, line = self._line_queue.get_nowait()
+            result = self.results[input_filepath]
+            if line.startswith(STAGE_LINE_PREFIX):
+                stage = json.loads(line[len(STAGE_LINE_PREFIX) :])
+                result["stages"][stage["stage"]] = stage["seconds"]
+            else:
+                result["error"] = line[len(ERROR_LINE_PREFIX) :]
+
+    def update(self) -> bool:
+        """Collect the worker progress and start the pending files, return True when all files are finished."""
+        self._collect_lines()
+
+        for input_filepath, process in list(self._processes.items()):
+            if process.poll() is None:
+                continue
+
+            # the output reader may still hold the last lines
+            self._output_readers.pop(input_filepath).join()
+            del self._processes[input_filepath]
+            self._collect_lines()
+
+            result = self.results[input_filepath]
+            if process.returncode != 0 and result["error"] is None:
+                result["error"] = "\n".join(self._process_output_tails.get(input_filepath, [])) or f"Exit code {process.returncode}"
+
+        self._start_processes()
+
+        if self._processes or self._pending_filepaths:
+            return False
+
+        self.elapsed_time = time.perf_counter() - self._start_time
+        return True
+
+    def cancel(self):
+        self._pending_filepaths.clear()
+
+        for process in self._processes.values():
+            if process.poll() is None:
+                process.terminate()
+
+        for process in self._processes.values():
+            process.wait()
+
+    def format_report(self) -> str:
+        stage_names = ["load", "fit_metarig", "generate_rigify", "bind_bones", "save"]
+        lines = ["\t".join(["file", *stage_names, "status"])]
+        for input_filepath, result in self.results.items():
+            stages = result["stages"]
+            lines.append(
+                "\t".join(
+                    [
+                        os.path.basename(input_filepath),
+                        *(f"{stages[s]:.2f}" if s in stages else "-" for s in stage_names),
+                        "FAILED" if result["error"] is not None else "OK",
+                    ]
+                )
+            )
+
+        failed_count = sum(1 for r in self.results.values() if r["error"] is not None)
+        lines.append(f"{len(self.results) - failed_count} converted, {failed_count} failed in {self.elapsed_time:.2f} sec")
+        return "\n".join(lines)
+
+    def write_report(self) -> str:
+        report_filepath = os.path.join(self.output_dir, REPORT_FILE_NAME)
+        with open(report_filepath, "w", encoding="utf-8") as file:
+            json.dump({"elapsed_time": self.elapsed_time, "results": self.results}, file, indent=2, ensure_ascii=False)
+        return report_filepath
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="rigify_batch.py", description="Convert MMD models to Rigify rigs.")
+    parser.add_argument("--output-dir", default=os.getcwd(), help="directory to write the converted blend files and the report")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="number of parallel Blender processes")
+    parser.add_argument("--focus-on-mmd", action="store_true", help="use the MMD compatibility focused integration")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    parser.add_argument("inputs", nargs="+", help=".blend or .pmx files")
+    return parser.parse_args(argv[argv.index("--") + 1 :] if "--" in argv else [])
+
+
+def main():
+    args = _parse_args(sys.argv)
+
+    if args.worker:
+        try:
+            convert(os.path.abspath(args.inputs[0]), args.output, args.focus_on_mmd)
+        except Exception as ex:  # pylint: disable=broad-except
+            traceback.print_exc()
+            print(ERROR_LINE_PREFIX + (str(ex) or type(ex).__name__).replace("\n", " "), flush=True)
+            sys.exit(1)
+        return
+
+    job = RigifyBatchJob([os.path.abspath(p) for p in args.inputs], os.path.abspath(args.output_dir), args.workers, args.focus_on_mmd)
+    job.start()
+    try:
+        while not job.update():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        job.cancel()
+        raise
+
+    print(job.format_report())
+    print(f"Report written to {job.write_report()}")
+
+
+if __name__ == "__main__":
+    main()
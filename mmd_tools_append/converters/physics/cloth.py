@@ -1,14 +1,19 @@
 # Copyright 2021 UuuNyaa <UuuNyaa@gmail.com>
 # This file is part of MMD Tools Append.
 
-from typing import Iterable, Iterator, List
+import time
+from typing import Iterable, Iterator, List, Set
 
 import bpy
 from bpy.app.translations import pgettext as _
 
+from ... import UNREGISTER_HOOKS
+from ...editors.dependency_index import PHYSICS_OBJECT_INDEX, SURFACE_DEFORM_DEPENDENCY_INDEX
 from ...editors.meshes import MeshEditor
 from ...tuners import TunerABC, TunerRegistry
 from ...utilities import MMD_TOOLS_IMPORT_HOOKS, MessageException, import_mmd_tools
+from .cloth_bake import BakeClothsInBackground
+from .cloth_profile import ApplyClothProfileResult, ClothProfileResultPropertyGroup, ProfileClothSettings
 from .rigid_body_to_cloth import (
     PhysicsMode,
     RigidBodyToClothConverter,
@@ -247,6 +252,9 @@ class MMDAppendClothAdjuster(bpy.types.Panel):
         row = col.row(align=True)
         row.prop(cloth_settings, "frame_start", text="Simulation Start")
         row.prop(cloth_settings, "frame_end", text="Simulation End")
+        col.operator(BakeClothsInBackground.bl_idname, icon="RENDER_ANIMATION")
+
+        self.draw_profile_results(layout, cloth_settings)
 
         if MeshEditor(mesh_object).find_subsurface_modifier("physics_cloth_subsurface") is None:
             return
@@ -255,6 +263,36 @@ class MMDAppendClothAdjuster(bpy.types.Panel):
         col.label(text="Subdivision:")
         col.prop(cloth_settings, "subdivision_levels", text="Subdivision Levels")
 
+    @staticmethod
+    def draw_profile_results(layout: bpy.types.UILayout, cloth_settings):
+        col = layout.column(align=True)
+        col.label(text="Profile:")
+        col.operator(ProfileClothSettings.bl_idname, icon="TIME")
+
+        if len(cloth_settings.profile_results) == 0:
+            return
+
+        box = col.box()
+        grid = box.grid_flow(row_major=True, columns=6, even_columns=False, align=True)
+        grid.label(text="Quality")
+        grid.label(text="Collision")
+        grid.label(text="Subdivision")
+        grid.label(text="Sec/Frame")
+        grid.label(text="Max Velocity")
+        grid.label(text="")
+
+        for index, result in enumerate(cloth_settings.profile_results):
+            grid.label(text=str(result.quality))
+            grid.label(text=str(result.collision_quality))
+            grid.label(text=str(result.subdivision_levels))
+            grid.label(text=f"{result.seconds_per_frame:.3f}")
+            grid.label(text=f"{result.max_velocity:.2f}", icon="CHECKMARK" if result.is_stable else "ERROR")
+            grid.operator(
+                ApplyClothProfileResult.bl_idname,
+                text="",
+                icon="SOLO_ON" if result.is_suggested else "IMPORT",
+            ).index = index
+
 
 class CopyClothAdjusterSettings(bpy.types.Operator):
     bl_idname = "mmd_tools_append.copy_cloth_adjuster_settings"
@@ -318,30 +356,18 @@ class SelectClothMesh(bpy.types.Operator):
     def filter_only_in_mmd_model(
         key_object: bpy.types.Object,
     ) -> Iterable[bpy.types.Object]:
-        mmd_tools = import_mmd_tools()
-        mmd_root = mmd_tools.core.model.FnModel.find_root_object(key_object)
+        mmd_root = import_mmd_tools().core.model.FnModel.find_root_object(key_object)
         if mmd_root is None:
-            return
+            return []
 
-        mmd_model = mmd_tools.core.model.Model(mmd_root)
-
-        for obj in mmd_model.meshes():
-            yield obj
-
-        yield from mmd_model.cloths()
+        return PHYSICS_OBJECT_INDEX.find_objects("CLOTH", mmd_root)
 
     def execute(self, context: bpy.types.Context):
         key_object = context.active_object
         key_settings = key_object.mmd_tools_append_cloth_settings
 
         obj: bpy.types.Object
-        for obj in self.filter_only_in_mmd_model(key_object) if self.only_in_mmd_model else bpy.data.objects:
-            if obj.type != "MESH":
-                continue
-
-            if MeshEditor(obj).find_cloth_modifier() is None:
-                continue
-
+        for obj in self.filter_only_in_mmd_model(key_object) if self.only_in_mmd_model else PHYSICS_OBJECT_INDEX.find_objects("CLOTH"):
             if self.only_physics_equals and not key_settings.physics_equals(obj.mmd_tools_append_cloth_settings):
                 continue
 
@@ -387,6 +413,10 @@ class RemoveMeshCloth(bpy.types.Operator):
             self.report(type={"ERROR"}, message=str(ex))
             return {"CANCELLED"}
 
+        finally:
+            # the depsgraph is not updated between the operator calls of a script
+            PHYSICS_OBJECT_INDEX.mark_dirty()
+
         return {"FINISHED"}
 
 
@@ -404,6 +434,11 @@ class ConvertRigidBodyToClothOperator(bpy.types.Operator):
         default=PhysicsMode.AUTO.name,
     )
     extend_ribbon_area: bpy.props.BoolProperty(name="Extend Ribbon Area", default=True)
+    separate_by_joints: bpy.props.BoolProperty(
+        name="Separate by Joints",
+        description="Convert each group of rigid bodies connected by joints into its own cloth",
+        default=False,
+    )
 
     @classmethod
     def poll(cls, context: bpy.types.Context):
@@ -458,7 +493,8 @@ class ConvertRigidBodyToClothOperator(bpy.types.Operator):
                 elif obj.mmd_type == "NONE":
                     mesh_objects.append(obj)
 
-            RigidBodyToClothConverter.convert(
+            convert = RigidBodyToClothConverter.convert_batch if self.separate_by_joints else RigidBodyToClothConverter.convert
+            skipped_group_count = convert(
                 target_mmd_root_object,
                 rigid_body_objects,
                 mesh_objects,
@@ -468,13 +504,99 @@ class ConvertRigidBodyToClothOperator(bpy.types.Operator):
                 self.extend_ribbon_area,
             )
 
+            if skipped_group_count:
+                self.report(type={"WARNING"}, message=_("Skipped {count} rigid bodies without joints to the others.").format(count=skipped_group_count))
+
         except MessageException as ex:
             self.report(type={"ERROR"}, message=str(ex))
             return {"CANCELLED"}
 
+        finally:
+            # the depsgraph is not updated between the operator calls of a script
+            PHYSICS_OBJECT_INDEX.mark_dirty()
+
         return {"FINISHED"}
 
 
+CLOTH_REBIND_DELAY_SECONDS = 0.5
+
+_pending_rebind_cloth_names: Set[str] = set()
+_rebind_deadline = 0.0
+
+
+def schedule_cloth_rebind(cloth_mesh_object: bpy.types.Object):
+    global _rebind_deadline  # pylint: disable=global-statement
+
+    _pending_rebind_cloth_names.add(cloth_mesh_object.name)
+    _rebind_deadline = time.monotonic() + CLOTH_REBIND_DELAY_SECONDS
+
+    if not bpy.app.timers.is_registered(_rebind_pending_cloths):
+        bpy.app.timers.register(_rebind_pending_cloths, first_interval=CLOTH_REBIND_DELAY_SECONDS)
+
+
+def _rebind_pending_cloths():
+    remaining_seconds = _rebind_deadline - time.monotonic()
+    if remaining_seconds > 0:
+        return remaining_seconds
+
+    modifiers: List[bpy.types.Modifier] = []
+    for cloth_name in _pending_rebind_cloth_names:
+        cloth_mesh_object = bpy.data.objects.get(cloth_name)
+        if cloth_mesh_object is None:
+            continue
+
+        cloth_corrective_smooth_modifier = MeshEditor(cloth_mesh_object).find_corrective_smooth_modifier()
+        if cloth_corrective_smooth_modifier is not None and cloth_corrective_smooth_modifier.show_viewport:
+            modifiers.append(cloth_corrective_smooth_modifier)
+
+        modifiers.extend(SURFACE_DEFORM_DEPENDENCY_INDEX.find_modifiers(cloth_mesh_object))
+
+    _pending_rebind_cloth_names.clear()
+
+    if len(modifiers) == 0:
+        return None
+
+    rebind_modifiers(modifiers)
+
+    # the timer runs outside of any operator, so the rebind gets its own undo step
+    bpy.ops.ed.undo_push(message="Rebind Cloths")
+    return None
+
+
+def _cancel_cloth_rebind():
+    if bpy.app.timers.is_registered(_rebind_pending_cloths):
+        bpy.app.timers.unregister(_rebind_pending_cloths)
+    _pending_rebind_cloth_names.clear()
+
+
+UNREGISTER_HOOKS.append(_cancel_cloth_rebind)
+
+
+def rebind_modifiers(modifiers: Iterable[bpy.types.Modifier]):
+    def set_bind_modifier(modifier: bpy.types.Modifier, bind: bool):
+        if bind and not modifier.show_viewport:
+            return
+
+        if modifier.type == "SURFACE_DEFORM":
+            if bind == modifier.is_bound:
+                return
+            with bpy.context.temp_override(object=modifier.id_data):
+                bpy.ops.object.surfacedeform_bind(modifier=modifier.name)
+        elif modifier.type == "CORRECTIVE_SMOOTH":
+            if bind == modifier.is_bind:
+                return
+            with bpy.context.temp_override(object=modifier.id_data):
+                bpy.ops.object.correctivesmooth_bind(modifier=modifier.name)
+
+    modifiers = list(modifiers)
+
+    for modifier in modifiers:
+        set_bind_modifier(modifier, False)
+
+    for modifier in modifiers:
+        set_bind_modifier(modifier, True)
+
+
 class ClothAdjusterSettingsPropertyGroup(bpy.types.PropertyGroup):
     @staticmethod
     def _update_presets(prop, _):
@@ -601,43 +723,15 @@ class ClothAdjusterSettingsPropertyGroup(bpy.types.PropertyGroup):
         if cloth_subsurface_modifier is None:
             return
 
-        def set_bind_modifier(modifier: bpy.types.Modifier, bind: bool):
-            if modifier is None:
-                return
-
-            if bind and not modifier.show_viewport:
-                return
-
-            if modifier.type == "SURFACE_DEFORM":
-                if bind == modifier.is_bound:
-                    return
-                bpy.ops.object.surfacedeform_bind({"object": modifier.id_data}, modifier=modifier.name)
-            elif modifier.type == "CORRECTIVE_SMOOTH":
-                if bind == modifier.is_bind:
-                    return
-                bpy.ops.object.correctivesmooth_bind({"object": modifier.id_data}, modifier=modifier.name)
-
-        def set_bind_modifiers(modifiers: Iterable[bpy.types.Modifier], bind: bool):
-            for modifier in modifiers:
-                set_bind_modifier(modifier, bind)
-
         cloth_corrective_smooth_modifier = cloth_mesh_editor.find_corrective_smooth_modifier()
-        target_mesh_modifiers: List[bpy.types.SurfaceDeformModifier] = [m for o in bpy.data.objects for m in o.modifiers if m.type == "SURFACE_DEFORM" and m.target == cloth_mesh_object]
-
         if cloth_corrective_smooth_modifier is not None:
-            if subdivision_level == 0:
-                cloth_corrective_smooth_modifier.show_viewport = False
-            else:
-                cloth_corrective_smooth_modifier.show_viewport = True
-                set_bind_modifier(cloth_corrective_smooth_modifier, False)
-
-        set_bind_modifiers(target_mesh_modifiers, False)
+            cloth_corrective_smooth_modifier.show_viewport = subdivision_level != 0
 
         cloth_subsurface_modifier.levels = subdivision_level
         cloth_subsurface_modifier.render_levels = subdivision_level
 
-        set_bind_modifier(cloth_corrective_smooth_modifier, True)
-        set_bind_modifiers(target_mesh_modifiers, True)
+        # binding is expensive, rebind once the value stops changing
+        schedule_cloth_rebind(cloth_mesh_object)
 
     subdivision_levels: bpy.props.IntProperty(
         name="Subdivision Levels",
@@ -652,6 +746,8 @@ class ClothAdjusterSettingsPropertyGroup(bpy.types.PropertyGroup):
         set=_set_subdivision_levels.__func__,
     )
 
+    profile_results: bpy.props.CollectionProperty(type=ClothProfileResultPropertyGroup)
+
     def physics_equals(self, obj):
         return (
             isinstance(obj, ClothAdjusterSettingsPropertyGroup)
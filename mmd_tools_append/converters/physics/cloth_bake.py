@@ -0,0 +1,237 @@
+# Copyright 2026 MMD Tools Append authors
+# This file is part of MMD Tools Append.
+
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import bpy
+from bpy.app.translations import pgettext_iface as iface_
+
+from ...editors.meshes import MeshEditor
+from ...utilities import MessageException, import_mmd_tools
+from . import cloth_bake_worker
+
+
+def split_cloths(cloth_objects: List[bpy.types.Object], worker_count: int) -> List[List[str]]:
+    """Distribute the cloths over the workers, the heaviest first to the least loaded worker."""
+    loads = [0] * worker_count
+    chunks: List[List[str]] = [[] for _ in range(worker_count)]
+
+    for obj in sorted(cloth_objects, key=lambda o: len(o.data.vertices), reverse=True):
+        cloth_modifier = MeshEditor(obj).find_cloth_modifier()
+        point_cache = cloth_modifier.point_cache
+        frame_count = max(1, point_cache.frame_end - point_cache.frame_start + 1)
+
+        worker_index = loads.index(min(loads))
+        loads[worker_index] += len(obj.data.vertices) * frame_count
+        chunks[worker_index].append(obj.name)
+
+    return [c for c in chunks if c]
+
+
+class ClothBakeJob:
+    """Bake cloths in headless Blender processes on a copy of the current blend file."""
+
+    def __init__(self, cloth_objects: List[bpy.types.Object], worker_count: int):
+        if not bpy.data.is_saved:
+            raise MessageException(iface_("Save the blend file before baking cloths in background."))
+
+        self.cloth_object_names: List[str] = [o.name for o in cloth_objects]
+        self.chunks: List[List[str]] = split_cloths(cloth_objects, max(1, worker_count))
+        self.baked_object_names: List[str] = []
+        self.error_messages: List[str] = []
+
+        self._processes: List[subprocess.Popen] = []
+        self._process_output_tails: Dict[int, List[str]] = {}
+        self._baked_queue: "queue.Queue[str]" = queue.Queue()
+        self._temp_dir: Optional[str] = None
+        self._start_time = 0.0
+        self.elapsed_time = 0.0
+
+        for obj in cloth_objects:
+            MeshEditor(obj).find_cloth_modifier().point_cache.use_disk_cache = True
+
+    @property
+    def cache_dir_name(self) -> str:
+        return "blendcache_" + os.path.splitext(os.path.basename(bpy.data.filepath))[0]
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        self._temp_dir = tempfile.mkdtemp(prefix="mmd_tools_append_bake_")
+
+        blend_filepath = os.path.join(self._temp_dir, os.path.basename(bpy.data.filepath))
+        bpy.ops.wm.save_as_mainfile(filepath=blend_filepath, copy=True)
+
+        for object_names in self.chunks:
+            process = subprocess.Popen(
+                [bpy.app.binary_path, "-b", blend_filepath, "--python", cloth_bake_worker.__file__, "--", *object_names],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                errors="ignore",
+            )
+            self._processes.append(process)
+            threading.Thread(target=self._read_output, args=(process,), daemon=True).start()
+
+    def _read_output(self, process: subprocess.Popen):
+        tail = self._process_output_tails.setdefault(process.pid, [])
+        for line in process.stdout:
+            line = line.rstrip()
+            if line.startswith(cloth_bake_worker.BAKED_LINE_PREFIX):
+                self._baked_queue.put(line[len(cloth_bake_worker.BAKED_LINE_PREFIX) :])
+                continue
+
+            tail.append(line)
+            del tail[:-20]
+
+    def update(self) -> bool:
+        """Collect the worker progress, return True when all workers are finished."""
+        while not self._baked_queue.empty():
+            self.baked_object_names.append(self._baked_queue.get_nowait())
+
+        if any(p.poll() is None for p in self._processes):
+            return False
+
+        for process in self._processes:
+            if process.returncode != 0:
+                self.error_messages.append("\n".join(self._process_output_tails.get(process.pid, [])))
+
+        self.elapsed_time = time.perf_counter() - self._start_time
+        return True
+
+    def cancel(self):
+        for process in self._processes:
+            if process.poll() is None:
+                process.terminate()
+
+        for process in self._processes:
+            process.wait()
+
+        self._cleanup()
+
+    def link_results(self):
+        """Move the baked caches next to the current blend file and mark them as baked."""
+        cache_dir_name = self.cache_dir_name
+        from_dir = os.path.join(self._temp_dir, cache_dir_name)
+        to_dir = bpy.path.abspath("//" + cache_dir_name)
+        os.makedirs(to_dir, exist_ok=True)
+
+        if os.path.isdir(from_dir):
+            for file_name in os.listdir(from_dir):
+                shutil.move(os.path.join(from_dir, file_name), os.path.join(to_dir, file_name))
+
+        baked_object_names = set(self.baked_object_names)
+        for object_name in self.cloth_object_names:
+            if object_name not in baked_object_names:
+                continue
+
+            obj = bpy.data.objects.get(object_name)
+            if obj is None:
+                continue
+
+            point_cache = MeshEditor(obj).find_cloth_modifier().point_cache
+            with bpy.context.temp_override(point_cache=point_cache):
+                bpy.ops.ptcache.bake_from_cache()
+
+        self._cleanup()
+
+    def _cleanup(self):
+        if self._temp_dir is None:
+            return
+
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+        self._temp_dir = None
+
+
+class BakeClothsInBackground(bpy.types.Operator):
+    bl_idname = "mmd_tools_append.bake_cloths_in_background"
+    bl_label = "Bake Cloths in Background"
+    bl_description = "Bake all cloths of the MMD model in parallel headless Blender processes.\nThe blend file must be saved"
+    bl_options = {"REGISTER"}
+
+    worker_count: bpy.props.IntProperty(name="Workers", min=1, max=64, default=max(1, (os.cpu_count() or 2) // 2))
+
+    _job: Optional[ClothBakeJob] = None
+    _timer = None
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        if context.mode != "OBJECT":
+            return False
+
+        active_object = context.active_object
+        if active_object is None or active_object.type != "MESH":
+            return False
+
+        return import_mmd_tools().core.model.FnModel.find_root_object(active_object) is not None
+
+    def invoke(self, context: bpy.types.Context, event):
+        mmd_tools = import_mmd_tools()
+        mmd_model = mmd_tools.core.model.Model(mmd_tools.core.model.FnModel.find_root_object(context.active_object))
+        cloth_objects = list(mmd_model.cloths())
+
+        if len(cloth_objects) == 0:
+            self.report(type={"ERROR"}, message=iface_("No cloths found in the MMD model."))
+            return {"CANCELLED"}
+
+        try:
+            self._job = ClothBakeJob(cloth_objects, min(self.worker_count, len(cloth_objects)))
+            self._job.start()
+        except MessageException as ex:
+            self.report(type={"ERROR"}, message=str(ex))
+            return {"CANCELLED"}
+
+        window_manager = context.window_manager
+        self._timer = window_manager.event_timer_add(0.5, window=context.window)
+        window_manager.modal_handler_add(self)
+        window_manager.progress_begin(0, len(self._job.cloth_object_names))
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context: bpy.types.Context, event):
+        if event.type == "ESC":
+            self._job.cancel()
+            self._finish(context)
+            self.report(type={"WARNING"}, message=iface_("Cloth baking cancelled."))
+            return {"CANCELLED"}
+
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+
+        finished = self._job.update()
+        baked_count = len(self._job.baked_object_names)
+        context.window_manager.progress_update(baked_count)
+        context.workspace.status_text_set(iface_("Baking cloths: {baked_count}/{total_count} (Esc to cancel)").format(baked_count=baked_count, total_count=len(self._job.cloth_object_names)))
+
+        if not finished:
+            return {"PASS_THROUGH"}
+
+        self._job.link_results()
+        self._finish(context)
+
+        if self._job.error_messages:
+            self.report(type={"ERROR"}, message="\n".join(self._job.error_messages))
+            return {"CANCELLED"}
+
+        self.report(
+            type={"INFO"},
+            message=iface_("Baked {baked_count} cloths with {worker_count} workers in {elapsed_time:.1f} seconds.").format(
+                baked_count=baked_count,
+                worker_count=len(self._job.chunks),
+                elapsed_time=self._job.elapsed_time,
+            ),
+        )
+        return {"FINISHED"}
+
+    def _finish(self, context: bpy.types.Context):
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self._timer)
+        window_manager.progress_end()
+        context.workspace.status_text_set(None)
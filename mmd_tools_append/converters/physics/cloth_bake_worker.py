@@ -0,0 +1,50 @@
+# Copyright 2026 MMD Tools Append authors
+# This file is part of MMD Tools Append.
+
+# Run by ClothBakeJob inside a headless Blender:
+#   blender -b <file.blend> --python cloth_bake_worker.py -- <object name>...
+# Keep this module free of add-on imports, it is executed as a plain script.
+
+import sys
+
+import bpy
+
+BAKED_LINE_PREFIX = "MMD_TOOLS_APPEND_CLOTH_BAKED:"
+
+
+def bake_cloths(object_names):
+    scene = bpy.context.scene
+
+    # cloths of the other workers must not be simulated here
+    for obj in bpy.data.objects:
+        if obj.name in object_names:
+            continue
+
+        for modifier in obj.modifiers:
+            if modifier.type != "CLOTH":
+                continue
+            modifier.show_viewport = False
+            modifier.show_render = False
+
+    for object_name in object_names:
+        obj = bpy.data.objects[object_name]
+        for modifier in obj.modifiers:
+            if modifier.type != "CLOTH":
+                continue
+
+            point_cache = modifier.point_cache
+            point_cache.use_disk_cache = True
+            with bpy.context.temp_override(scene=scene, active_object=obj, point_cache=point_cache):
+                bpy.ops.ptcache.free_bake()
+                bpy.ops.ptcache.bake(bake=True)
+
+        print(BAKED_LINE_PREFIX + object_name, flush=True)
+
+
+def main():
+    argv = sys.argv
+    bake_cloths(set(argv[argv.index("--") + 1 :]) if "--" in argv else set())
+
+
+if __name__ == "__main__":
+    main()
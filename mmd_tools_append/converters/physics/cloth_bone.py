@@ -1,11 +1,11 @@
 # Copyright 2022 UuuNyaa <UuuNyaa@gmail.com>
 # This file is part of MMD Tools Append.
 
-from typing import Dict, List, Optional, Tuple
+from typing import List, Optional, Tuple
 
 import bpy
-import mathutils
-from mathutils import Matrix, Vector
+
+from ...editors.spatial_index import VERTEX_SPATIAL_INDEX
 
 
 class StretchBoneToVertexOperator(bpy.types.Operator):
@@ -35,19 +35,6 @@ class StretchBoneToVertexOperator(bpy.types.Operator):
         target_pose_bones: List[bpy.types.PoseBone] = list(context.selected_pose_bones)
         target_mesh_objects: List[bpy.types.Object] = [o for o in context.selected_objects if o.type == "MESH" and not o.hide]
 
-        i2vm: Dict[int, Tuple[bpy.types.MeshVertex, bpy.types.Object]] = dict(enumerate((v, m) for m in target_mesh_objects for v in m.data.vertices))
-
-        mesh_object: Optional[bpy.types.Object] = None
-        mesh_matrix: Matrix = Matrix()
-        vertex_index = mathutils.kdtree.KDTree(len(i2vm))
-        for i, (v, m) in i2vm.items():
-            if m != mesh_object:
-                mesh_object = m
-                mesh_matrix = m.matrix_world
-
-            vertex_index.insert(mesh_matrix @ v.co, i)
-        vertex_index.balance()
-
         distance_threshold: float = self.distance_threshold
 
         def clear_and_new_constraint(constraints: bpy.types.PoseBoneConstraints, type_name: str):
@@ -58,18 +45,22 @@ class StretchBoneToVertexOperator(bpy.types.Operator):
                 pose_bone.constraints.remove(c)
             return constraints.new(type=type_name)
 
-        def set_vertex_group(co: Vector, name: str) -> Tuple[Optional[bpy.types.MeshVertex], Optional[bpy.types.Object]]:
-            _co, index, distance = vertex_index.find(co)
+        def set_vertex_group(nearest: Optional[Tuple[bpy.types.Object, int, float]], name: str) -> Optional[bpy.types.Object]:
+            if nearest is None:
+                return None
+
+            mesh_object, vertex_index, distance = nearest
             if distance > distance_threshold:
-                return None, None
+                return None
 
-            vertex, mesh_object = i2vm[index]
             vertex_group: bpy.types.VertexGroup = mesh_object.vertex_groups[name] if name in mesh_object.vertex_groups else mesh_object.vertex_groups.new(name=name)
-            vertex_group.add([vertex.index], 1.0, "REPLACE")
-            return vertex, mesh_object
+            vertex_group.add([vertex_index], 1.0, "REPLACE")
+            return mesh_object
+
+        nearests = VERTEX_SPATIAL_INDEX.find_nearest(target_mesh_objects, [b.tail for b in target_pose_bones])
 
-        for pose_bone in target_pose_bones:
-            _vertex, mesh_object = set_vertex_group(pose_bone.tail, pose_bone.name)
+        for pose_bone, nearest in zip(target_pose_bones, nearests):
+            mesh_object = set_vertex_group(nearest, pose_bone.name)
             if mesh_object is None:
                 continue
 
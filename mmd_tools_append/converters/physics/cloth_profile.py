@@ -0,0 +1,208 @@
+# Copyright 2026 MMD Tools Append authors
+# This file is part of MMD Tools Append.
+
+import itertools
+import time
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import bpy
+import numpy as np
+from bpy.app.translations import pgettext_iface as iface_
+
+from ...editors.meshes import MeshEditor
+from ...utilities import MessageException
+
+
+@dataclass
+class ClothProfile:
+    quality: int
+    collision_quality: int
+    subdivision_levels: int
+    seconds_per_frame: float
+    max_velocity: float
+    is_stable: bool
+
+
+class ClothProfiler:
+    """Simulate a short frame window of a cloth with several settings and measure the cost."""
+
+    QUALITIES: Tuple[int, ...] = (3, 5, 10)
+    COLLISION_QUALITIES: Tuple[int, ...] = (2, 5)
+    SUBDIVISION_LEVELS: Tuple[int, ...] = (0, 1, 2)
+
+    def __init__(self, cloth_object: bpy.types.Object, frame_count: int, velocity_limit: float):
+        self.cloth_object = cloth_object
+        self.frame_count = frame_count
+        self.velocity_limit = velocity_limit
+
+        mesh_editor = MeshEditor(cloth_object)
+        self.cloth_modifier: bpy.types.ClothModifier = mesh_editor.find_cloth_modifier()
+        self.subsurface_modifier = mesh_editor.find_subsurface_modifier("physics_cloth_subsurface")
+
+        if self.cloth_modifier.point_cache.is_baked:
+            raise MessageException(iface_("Free the baked cache of {cloth_name} before profiling.").format(cloth_name=cloth_object.name))
+
+    def profile(self, context: bpy.types.Context) -> List[ClothProfile]:
+        scene = context.scene
+        cloth_settings = self.cloth_modifier.settings
+        collision_settings = self.cloth_modifier.collision_settings
+
+        subdivision_levels = self.SUBDIVISION_LEVELS if self.subsurface_modifier is not None else (0,)
+
+        original_frame = scene.frame_current
+        original_quality = cloth_settings.quality
+        original_collision_quality = collision_settings.collision_quality
+        original_subdivision_levels = (self.subsurface_modifier.levels, self.subsurface_modifier.render_levels) if self.subsurface_modifier is not None else None
+
+        # measure this cloth only
+        other_cloth_modifiers = [m for o in scene.objects if o != self.cloth_object for m in o.modifiers if m.type == "CLOTH" and m.show_viewport]
+        for modifier in other_cloth_modifiers:
+            modifier.show_viewport = False
+
+        profiles: List[ClothProfile] = []
+        try:
+            for quality, collision_quality, subdivision_level in itertools.product(self.QUALITIES, self.COLLISION_QUALITIES, subdivision_levels):
+                cloth_settings.quality = quality
+                collision_settings.collision_quality = collision_quality
+                if self.subsurface_modifier is not None:
+                    self.subsurface_modifier.levels = subdivision_level
+
+                profiles.append(self._simulate(context, quality, collision_quality, subdivision_level))
+        finally:
+            cloth_settings.quality = original_quality
+            collision_settings.collision_quality = original_collision_quality
+            if original_subdivision_levels is not None:
+                self.subsurface_modifier.levels, self.subsurface_modifier.render_levels = original_subdivision_levels
+
+            for modifier in other_cloth_modifiers:
+                modifier.show_viewport = True
+
+            scene.frame_set(original_frame)
+
+        return profiles
+
+    def _simulate(self, context: bpy.types.Context, quality: int, collision_quality: int, subdivision_level: int) -> ClothProfile:
+        scene = context.scene
+        frame_start = self.cloth_modifier.point_cache.frame_start
+        fps = scene.render.fps / scene.render.fps_base
+
+        scene.frame_set(frame_start)
+        previous_positions = self._evaluated_positions(context)
+
+        max_velocity = 0.0
+        elapsed_time = 0.0
+        for frame in range(frame_start + 1, frame_start + 1 + self.frame_count):
+            start_time = time.perf_counter()
+            scene.frame_set(frame)
+            elapsed_time += time.perf_counter() - start_time
+
+            positions = self._evaluated_positions(context)
+            if len(positions) == len(previous_positions) and len(positions) > 0:
+                max_velocity = max(max_velocity, float(np.max(np.linalg.norm(positions - previous_positions, axis=1))) * fps)
+            previous_positions = positions
+
+        is_stable = bool(np.isfinite(max_velocity)) and max_velocity <= self.velocity_limit
+
+        return ClothProfile(quality, collision_quality, subdivision_level, elapsed_time / self.frame_count, max_velocity, is_stable)
+
+    def _evaluated_positions(self, context: bpy.types.Context) -> np.ndarray:
+        mesh: bpy.types.Mesh = self.cloth_object.evaluated_get(context.evaluated_depsgraph_get()).data
+        positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", positions)
+        return positions.reshape(-1, 3)
+
+    @staticmethod
+    def suggest(profiles: List[ClothProfile]) -> int:
+        """Return the index of the cheapest stable profile, or -1 when none is stable."""
+        stable_indices = [i for i, p in enumerate(profiles) if p.is_stable]
+        if len(stable_indices) == 0:
+            return -1
+        return min(stable_indices, key=lambda i: profiles[i].seconds_per_frame)
+
+
+class ClothProfileResultPropertyGroup(bpy.types.PropertyGroup):
+    quality: bpy.props.IntProperty(name="Quality Steps")
+    collision_quality: bpy.props.IntProperty(name="Collision Quality")
+    subdivision_levels: bpy.props.IntProperty(name="Subdivision Levels")
+    seconds_per_frame: bpy.props.FloatProperty(name="Seconds per Frame", unit="TIME_ABSOLUTE")
+    max_velocity: bpy.props.FloatProperty(name="Max Velocity", unit="VELOCITY")
+    is_stable: bpy.props.BoolProperty(name="Stable")
+    is_suggested: bpy.props.BoolProperty(name="Suggested")
+
+
+class ProfileClothSettings(bpy.types.Operator):
+    bl_idname = "mmd_tools_append.profile_cloth_settings"
+    bl_label = "Profile Cloth Settings"
+    bl_description = "Simulate a short frame window with several quality, collision and subdivision settings\nand suggest the cheapest stable one"
+    bl_options = {"REGISTER", "UNDO"}
+
+    frame_count: bpy.props.IntProperty(name="Frames", min=2, soft_max=100, default=20)
+    velocity_limit: bpy.props.FloatProperty(name="Velocity Limit", min=0, default=10.0, unit="VELOCITY")
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        if context.mode != "OBJECT":
+            return False
+
+        active_object = context.active_object
+        if active_object is None or active_object.type != "MESH":
+            return False
+
+        return MeshEditor(active_object).find_cloth_modifier() is not None
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context: bpy.types.Context):
+        cloth_object = context.active_object
+
+        try:
+            profiles = ClothProfiler(cloth_object, self.frame_count, self.velocity_limit).profile(context)
+        except MessageException as ex:
+            self.report(type={"ERROR"}, message=str(ex))
+            return {"CANCELLED"}
+
+        suggested_index = ClothProfiler.suggest(profiles)
+
+        profile_results = cloth_object.mmd_tools_append_cloth_settings.profile_results
+        profile_results.clear()
+        for i, profile in enumerate(profiles):
+            result = profile_results.add()
+            result.quality = profile.quality
+            result.collision_quality = profile.collision_quality
+            result.subdivision_levels = profile.subdivision_levels
+            result.seconds_per_frame = profile.seconds_per_frame
+            result.max_velocity = profile.max_velocity
+            result.is_stable = profile.is_stable
+            result.is_suggested = i == suggested_index
+
+        if suggested_index < 0:
+            self.report(type={"WARNING"}, message=iface_("No stable settings found."))
+
+        return {"FINISHED"}
+
+
+class ApplyClothProfileResult(bpy.types.Operator):
+    bl_idname = "mmd_tools_append.apply_cloth_profile_result"
+    bl_label = "Apply Cloth Profile Result"
+    bl_options = {"REGISTER", "UNDO"}
+
+    index: bpy.props.IntProperty(min=0)
+
+    @classmethod
+    def poll(cls, context: bpy.types.Context):
+        active_object = context.active_object
+        return active_object is not None and MeshEditor(active_object).find_cloth_modifier() is not None
+
+    def execute(self, context: bpy.types.Context):
+        cloth_settings = context.active_object.mmd_tools_append_cloth_settings
+        result = cloth_settings.profile_results[self.index]
+
+        cloth_modifier = MeshEditor(context.active_object).find_cloth_modifier()
+        cloth_modifier.settings.quality = result.quality
+        cloth_modifier.collision_settings.collision_quality = result.collision_quality
+        if cloth_settings.subdivision_levels != result.subdivision_levels:
+            cloth_settings.subdivision_levels = result.subdivision_levels
+
+        return {"FINISHED"}
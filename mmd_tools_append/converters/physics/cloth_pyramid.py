@@ -15,6 +15,7 @@ from bpy.app.translations import pgettext as _
 from mathutils import Matrix, Vector
 
 from ...editors.armatures import ArmatureEditor
+from ...editors.dependency_index import PHYSICS_OBJECT_INDEX
 from ...editors.meshes import MeshEditor
 from ...utilities import MessageException
 
@@ -1013,6 +1014,10 @@ class ConvertPyramidMeshToClothOperator(bpy.types.Operator):
             self.report(type={"ERROR"}, message=str(ex))
             return {"CANCELLED"}
 
+        finally:
+            # the depsgraph is not updated between the operator calls of a script
+            PHYSICS_OBJECT_INDEX.mark_dirty()
+
         return {"FINISHED"}
 
 
@@ -5,6 +5,7 @@ from typing import Iterable
 
 import bpy
 
+from ...editors.dependency_index import PHYSICS_OBJECT_INDEX
 from ...editors.meshes import MeshEditor
 from ...tuners import TunerABC, TunerRegistry
 from ...utilities import MessageException, import_mmd_tools
@@ -108,6 +109,9 @@ class CopyCollisionAdjusterSettings(bpy.types.Operator):
             to_settings.thickness_inner = from_settings.thickness_inner
             to_settings.cloth_friction = from_settings.cloth_friction
 
+        # the depsgraph is not updated between the operator calls of a script, so the added collision modifiers are not indexed yet
+        PHYSICS_OBJECT_INDEX.mark_dirty()
+
         return {"FINISHED"}
 
 
@@ -135,25 +139,18 @@ class SelectCollisionMesh(bpy.types.Operator):
 
     @staticmethod
     def filter_only_in_mmd_model(key_object: bpy.types.Object) -> Iterable[bpy.types.Object]:
-        mmd_tools = import_mmd_tools()
-        mmd_root = mmd_tools.core.model.FnModel.find_root_object(key_object)
+        mmd_root = import_mmd_tools().core.model.FnModel.find_root_object(key_object)
         if mmd_root is None:
-            return
+            return []
 
-        return mmd_tools.core.model.FnModel.iterate_child_objects(mmd_root)
+        return PHYSICS_OBJECT_INDEX.find_objects("COLLISION", mmd_root)
 
     def execute(self, context: bpy.types.Context):
         key_object = context.active_object
         key_settings = key_object.mmd_tools_append_collision_settings
 
         obj: bpy.types.Object
-        for obj in self.filter_only_in_mmd_model(key_object) if self.same_mmd_model else bpy.data.objects:
-            if obj.type != "MESH":
-                continue
-
-            if MeshEditor(obj).find_collision_modifier() is None:
-                continue
-
+        for obj in self.filter_only_in_mmd_model(key_object) if self.same_mmd_model else PHYSICS_OBJECT_INDEX.find_objects("COLLISION"):
             if self.same_physics_settings and not key_settings.physics_equals(obj.mmd_tools_append_collision_settings):
                 continue
 
@@ -5,6 +5,7 @@ from typing import Iterable
 
 import bpy
 
+from ...editors.dependency_index import PHYSICS_OBJECT_INDEX
 from ...editors.meshes import MeshEditor
 from ...utilities import import_mmd_tools
 
@@ -53,27 +54,19 @@ class SelectMeshRigidBody(bpy.types.Operator):
 
     @staticmethod
     def filter_only_in_mmd_model(key_object: bpy.types.Object) -> Iterable[bpy.types.Object]:
-        mmd_tools = import_mmd_tools()
-        mmd_root = mmd_tools.core.model.FnModel.find_root_object(key_object)
+        mmd_root = import_mmd_tools().core.model.FnModel.find_root_object(key_object)
         if mmd_root is None:
             return []
 
-        return mmd_tools.core.model.FnModel.iterate_child_objects(mmd_root)
+        return PHYSICS_OBJECT_INDEX.find_objects("RIGID_BODY", mmd_root)
 
     def execute(self, context: bpy.types.Context):
         key_object = context.active_object
-        key_rigid_body_object = key_object.find_rigid_body_object()
+        key_rigid_body_object = MeshEditor(key_object).find_rigid_body_object()
 
         obj: bpy.types.Object
-        for obj in self.filter_only_in_mmd_model(key_object) if self.only_in_mmd_model else bpy.data.objects:
-            if obj.type != "MESH":
-                continue
-
-            rigid_body_object = MeshEditor(obj).find_rigid_body_object()
-            if rigid_body_object is None:
-                continue
-
-            if self.only_same_settings and rigid_body_object != key_rigid_body_object:
+        for obj in self.filter_only_in_mmd_model(key_object) if self.only_in_mmd_model else PHYSICS_OBJECT_INDEX.find_objects("RIGID_BODY"):
+            if self.only_same_settings and MeshEditor(obj).find_rigid_body_object() != key_rigid_body_object:
                 continue
 
             obj.select_set(True)
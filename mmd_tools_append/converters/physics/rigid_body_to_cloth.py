@@ -45,6 +45,59 @@ class Vertices:
     all_ribbon: bool = False
 
 
+class JointGraph:
+    """Compact adjacency (CSR) of the rigid bodies connected by joints."""
+
+    def __init__(self, vertex_count: int, edge_indices: Iterable[Tuple[int, int]]):
+        self.edge_keys: Set[Tuple[int, int]] = {(min(i, j), max(i, j)) for i, j in edge_indices if i != j}
+
+        offsets = [0] * (vertex_count + 1)
+        for i, j in self.edge_keys:
+            offsets[i + 1] += 1
+            offsets[j + 1] += 1
+
+        for i in range(vertex_count):
+            offsets[i + 1] += offsets[i]
+
+        neighbors = [0] * offsets[vertex_count]
+        cursors = offsets[:vertex_count]
+        for i, j in self.edge_keys:
+            neighbors[cursors[i]] = j
+            cursors[i] += 1
+            neighbors[cursors[j]] = i
+            cursors[j] += 1
+
+        self.offsets: List[int] = offsets
+        self.neighbors: List[int] = neighbors
+
+    def has_edge(self, index1: int, index2: int) -> bool:
+        return (min(index1, index2), max(index1, index2)) in self.edge_keys
+
+    def neighbors_of(self, index: int) -> List[int]:
+        return self.neighbors[self.offsets[index] : self.offsets[index + 1]]
+
+    def flood(self, seed_indices: Iterable[int]) -> Set[int]:
+        """Return all indices reachable from the seeds."""
+        reached = set(seed_indices)
+        boundary = list(reached)
+        while boundary:
+            index = boundary.pop()
+            for neighbor in self.neighbors_of(index):
+                if neighbor in reached:
+                    continue
+                reached.add(neighbor)
+                boundary.append(neighbor)
+        return reached
+
+
+@dataclass
+class ClothBuild:
+    cloth_mesh_object: bpy.types.Object
+    deform_vertex_group: bpy.types.VertexGroup
+    from_to_vertex_group_indices: Dict[int, int]
+    all_ribbon: bool
+
+
 class RigidBodyToClothConverter:
     @classmethod
     def convert(
@@ -56,29 +109,173 @@ class RigidBodyToClothConverter:
         ribbon_stiffness: float,
         physics_mode: PhysicsMode,
         extend_ribbon_area: bool,
+    ) -> int:  # pylint: disable=too-many-arguments
+        """Convert all the rigid bodies into a single cloth, return the number of skipped groups, always 0."""
+        cls.convert_groups(
+            mmd_root_object,
+            [rigid_body_objects],
+            mesh_objects,
+            subdivision_level,
+            ribbon_stiffness,
+            physics_mode,
+            extend_ribbon_area,
+        )
+        return 0
+
+    @classmethod
+    def convert_batch(
+        cls,
+        mmd_root_object: bpy.types.Object,
+        rigid_body_objects: List[bpy.types.Object],
+        mesh_objects: List[bpy.types.Object],
+        subdivision_level: int,
+        ribbon_stiffness: float,
+        physics_mode: PhysicsMode,
+        extend_ribbon_area: bool,
+    ) -> int:  # pylint: disable=too-many-arguments
+        """Convert each group of rigid bodies connected by joints into its own cloth, return the number of skipped groups.
+
+        A rigid body without joints to the others makes a one vertex cloth, so the groups of a single rigid body are skipped.
+        """
+        mmd_model = import_mmd_tools().core.model.Model(mmd_root_object)
+        rigid_body_groups = cls.group_rigid_bodies(mmd_model.joints(), rigid_body_objects)
+        convertible_groups = [g for g in rigid_body_groups if len(g) >= 2]
+        if len(convertible_groups) == 0:
+            raise MessageException(iface_("No rigid bodies connected by joints found."))
+
+        cls.convert_groups(
+            mmd_root_object,
+            convertible_groups,
+            mesh_objects,
+            subdivision_level,
+            ribbon_stiffness,
+            physics_mode,
+            extend_ribbon_area,
+        )
+        return len(rigid_body_groups) - len(convertible_groups)
+
+    @staticmethod
+    def group_rigid_bodies(joint_objects: Iterable[bpy.types.Object], rigid_body_objects: List[bpy.types.Object]) -> List[List[bpy.types.Object]]:
+        rigid_body_index_dict = {rigid_body_objects[i]: i for i in range(len(rigid_body_objects))}
+        parent_indices = list(range(len(rigid_body_objects)))
+
+        def find_root(index: int) -> int:
+            while parent_indices[index] != index:
+                parent_indices[index] = parent_indices[parent_indices[index]]
+                index = parent_indices[index]
+            return index
+
+        for obj in joint_objects:
+            index1 = rigid_body_index_dict.get(obj.rigid_body_constraint.object1)
+            index2 = rigid_body_index_dict.get(obj.rigid_body_constraint.object2)
+            if index1 is None or index2 is None:
+                continue
+            parent_indices[find_root(index1)] = find_root(index2)
+
+        groups: Dict[int, List[bpy.types.Object]] = {}
+        for i, rigid_body_object in enumerate(rigid_body_objects):
+            groups.setdefault(find_root(i), []).append(rigid_body_object)
+
+        return list(groups.values())
+
+    @classmethod
+    def convert_groups(
+        cls,
+        mmd_root_object: bpy.types.Object,
+        rigid_body_groups: List[List[bpy.types.Object]],
+        mesh_objects: List[bpy.types.Object],
+        subdivision_level: int,
+        ribbon_stiffness: float,
+        physics_mode: PhysicsMode,
+        extend_ribbon_area: bool,
     ):  # pylint: disable=too-many-arguments
-        # pylint: disable=too-many-locals, too-many-statements
+        # pylint: disable=too-many-locals
         mmd_model = import_mmd_tools().core.model.Model(mmd_root_object)
         mmd_mesh_object = mesh_objects[0]
         mmd_armature_object = mmd_model.armature()
 
-        rigid_bodys_count = len(rigid_body_objects)
-        rigid_body_index_dict = {rigid_body_objects[i]: i for i in range(rigid_bodys_count)}
+        pose_bones_groups: List[List[bpy.types.PoseBone]] = []
+        for rigid_body_objects in rigid_body_groups:
+            pose_bones: List[bpy.types.PoseBone] = []
+            for rigid_body_object in rigid_body_objects:
+                pose_bone = mmd_armature_object.pose.bones.get(rigid_body_object.mmd_rigid.bone)
+
+                if pose_bone is None:
+                    raise MessageException(iface_("No bones related with {rigid_body_name}, Please relate a bone to the Rigid Body.").format(rigid_body_name=rigid_body_object.name))
+
+                pose_bones.append(pose_bone)
+            pose_bones_groups.append(pose_bones)
+
+        # collect all joints before removing any of them
+        joint_objects = list(mmd_model.joints())
+        rigid_body_index_dicts = [{rigid_body_objects[i]: i for i in range(len(rigid_body_objects))} for rigid_body_objects in rigid_body_groups]
+        joints_groups = [cls.collect_joints(joint_objects, rigid_body_index_dict) for rigid_body_index_dict in rigid_body_index_dicts]
+
+        cloth_builds = [
+            cls.build_cloth(
+                mmd_model,
+                mmd_armature_object,
+                mmd_mesh_object,
+                rigid_body_objects,
+                pose_bones,
+                rigid_body_index_dict,
+                joints,
+                subdivision_level,
+                ribbon_stiffness,
+                physics_mode,
+                extend_ribbon_area,
+            )
+            for rigid_body_objects, pose_bones, rigid_body_index_dict, joints in zip(rigid_body_groups, pose_bones_groups, rigid_body_index_dicts, joints_groups)
+        ]
+
+        # merge deform vertex weights of all cloths at once
+        from_to_vertex_group_indices: Dict[int, int] = {}
+        for cloth_build in cloth_builds:
+            from_to_vertex_group_indices.update(cloth_build.from_to_vertex_group_indices)
+
+        if len(from_to_vertex_group_indices) > 0:
+            vertex_groups = mmd_mesh_object.vertex_groups
+            unnecessary_vertex_groups = [vertex_groups[i] for i in from_to_vertex_group_indices]
+            MeshEditor(mmd_mesh_object).merge_vertex_group_weights(from_to_vertex_group_indices)
+            for vertex_group in unnecessary_vertex_groups:
+                vertex_groups.remove(vertex_group)
+
+        for rigid_body_objects in rigid_body_groups:
+            for obj in rigid_body_objects:
+                bpy.data.objects.remove(obj)
 
-        pose_bones: List[bpy.types.PoseBone] = []
-        for rigid_body_object in rigid_body_objects:
-            pose_bone = mmd_armature_object.pose.bones.get(rigid_body_object.mmd_rigid.bone)
+        if physics_mode not in {PhysicsMode.AUTO, PhysicsMode.SURFACE_DEFORM}:
+            return
 
-            if pose_bone is None:
-                raise MessageException(iface_("No bones related with {rigid_body_name}, Please relate a bone to the Rigid Body.").format(rigid_body_name=rigid_body_object.name))
+        mmd_mesh_editor = MeshEditor(mmd_mesh_object)
+        bpy.context.view_layer.objects.active = mmd_mesh_object
+        for cloth_build in cloth_builds:
+            if cloth_build.all_ribbon:
+                continue
 
-            pose_bones.append(pose_bone)
+            bpy.ops.object.surfacedeform_bind(modifier=mmd_mesh_editor.add_surface_deform_modifier("physics_cloth_deform", target=cloth_build.cloth_mesh_object, vertex_group=cloth_build.deform_vertex_group.name).name)
 
+    @classmethod
+    def build_cloth(
+        cls,
+        mmd_model,
+        mmd_armature_object: bpy.types.Object,
+        mmd_mesh_object: bpy.types.Object,
+        rigid_body_objects: List[bpy.types.Object],
+        pose_bones: List[bpy.types.PoseBone],
+        rigid_body_index_dict: Dict[bpy.types.Object, int],
+        joints: Tuple[List[bpy.types.Object], List[Tuple[int, int]], List[bpy.types.Object]],
+        subdivision_level: int,
+        ribbon_stiffness: float,
+        physics_mode: PhysicsMode,
+        extend_ribbon_area: bool,
+    ) -> ClothBuild:
+        # pylint: disable=too-many-arguments, too-many-locals
         def remove_objects(objects: Iterable[bpy.types.Object]):
             for obj in objects:
                 bpy.data.objects.remove(obj)
 
-        joint_objects, joint_edge_indices, side_joint_objects = cls.collect_joints(mmd_model, rigid_body_index_dict)
+        joint_objects, joint_edge_indices, side_joint_objects = joints
 
         remove_objects(joint_objects)
 
@@ -96,14 +293,15 @@ class RigidBodyToClothConverter:
         cloth_bm: bmesh.types.BMesh = bmesh.new()
         cloth_bm.from_mesh(cloth_mesh)
 
-        cls.clean_mesh(cloth_bm, joint_edge_indices)
+        joint_graph = JointGraph(len(rigid_body_objects), joint_edge_indices)
+        cls.clean_mesh(cloth_bm, joint_graph)
 
         # 标出头部，尾部，飘带顶点
         # try mark head,tail,ribbon vertex
         cloth_bm.verts.ensure_lookup_table()
         cloth_bm.edges.ensure_lookup_table()
 
-        vertices = cls.collect_vertices(cloth_bm, pose_bones, physics_mode, extend_ribbon_area)
+        vertices = cls.collect_vertices(cloth_bm, pose_bones, joint_graph, physics_mode, extend_ribbon_area)
         edges = cls.collect_edges(cloth_bm, vertices)
 
         new_up_verts = cls.extend_up_edges(cloth_bm, pose_bones, vertices, edges, physics_mode)
@@ -139,32 +337,28 @@ class RigidBodyToClothConverter:
         mesh_editor.edit_cloth_modifier("physics_cloth", vertex_group_mass=pin_vertex_group.name)
 
         corrective_smooth_modifier = mesh_editor.add_corrective_smooth_modifier("physics_cloth_smooth", smooth_type="LENGTH_WEIGHTED", rest_source="BIND")
-        bpy.ops.object.correctivesmooth_bind(modifier=corrective_smooth_modifier.name)
+        with bpy.context.temp_override(object=cloth_mesh_object):
+            bpy.ops.object.correctivesmooth_bind(modifier=corrective_smooth_modifier.name)
         if subdivision_level == 0:
             corrective_smooth_modifier.show_viewport = False
 
-        deform_vertex_group_index = deform_vertex_group.index
         vertices_ribbon_verts = vertices.ribbon_verts
 
-        cls.bind_mmd_mesh(
+        from_to_vertex_group_indices = cls.bind_mmd_mesh(
             mmd_mesh_object,
             cloth_mesh_object,
             cloth_bm,
             pose_bones,
-            deform_vertex_group_index,
+            deform_vertex_group.index,
             vertices_ribbon_verts,
             physics_mode,
         )
         cls.set_pin_vertex_weight(pin_vertex_group, vertices_ribbon_verts, ribbon_stiffness, physics_mode)
 
-        remove_objects(rigid_body_objects)
-
-        if not vertices.all_ribbon and physics_mode in {PhysicsMode.AUTO, PhysicsMode.SURFACE_DEFORM}:
-            bpy.context.view_layer.objects.active = mmd_mesh_object
-            bpy.ops.object.surfacedeform_bind(modifier=MeshEditor(mmd_mesh_object).add_surface_deform_modifier("physics_cloth_deform", target=cloth_mesh_object, vertex_group=deform_vertex_group.name).name)
-
         cloth_bm.free()
 
+        return ClothBuild(cloth_mesh_object, deform_vertex_group, from_to_vertex_group_indices, vertices.all_ribbon)
+
     @staticmethod
     def bind_mmd_mesh(
         mmd_mesh_object: bpy.types.Object,
@@ -174,17 +368,10 @@ class RigidBodyToClothConverter:
         deform_vertex_group_index,
         vertices_ribbon_verts,
         physics_mode,
-    ):
-        # pylint: disable=too-many-arguments, too-many-locals
-
-        unnecessary_vertex_groups: List[bpy.types.VertexGroup] = []
-
-        mmd_mesh: bpy.types.Mesh = mmd_mesh_object.data
-        mmd_bm: bmesh.types.BMesh = bmesh.new()
-        mmd_bm.from_mesh(mmd_mesh)
-
-        mmd_bm.verts.layers.deform.verify()
-        deform_layer = mmd_bm.verts.layers.deform.active
+    ) -> Dict[int, int]:
+        """Bind ribbon bones to the cloth and return the vertex group indices to merge into the deform vertex group."""
+        # pylint: disable=too-many-arguments
+        from_to_vertex_group_indices: Dict[int, int] = {}
 
         bone: bpy.types.PoseBone
         for i, bone in enumerate(pose_bones):
@@ -200,25 +387,9 @@ class RigidBodyToClothConverter:
                 con.subtarget = name
                 con.rest_length = bone.length
             else:
-                # merge deform vertex weights
-                from_vertex_group = mmd_mesh_object.vertex_groups.get(name)
-                from_index = from_vertex_group.index
-                unnecessary_vertex_groups.append(from_vertex_group)
-
-                vert: bmesh.types.BMVert
-                for vert in mmd_bm.verts:
-                    deform_vert: bmesh.types.BMDeformVert = vert[deform_layer]
-                    if from_index not in deform_vert:
-                        continue
-
-                    to_index = deform_vertex_group_index
-                    deform_vert[to_index] = deform_vert.get(to_index, 0.0) + deform_vert[from_index]
+                from_to_vertex_group_indices[mmd_mesh_object.vertex_groups.get(name).index] = deform_vertex_group_index
 
-        mmd_bm.to_mesh(mmd_mesh)
-        mmd_bm.free()
-
-        for vertex_group in unnecessary_vertex_groups:
-            mmd_mesh_object.vertex_groups.remove(vertex_group)
+        return from_to_vertex_group_indices
 
     @staticmethod
     def new_pin_vertex_group(
@@ -386,12 +557,12 @@ class RigidBodyToClothConverter:
         return new_down_verts
 
     @staticmethod
-    def collect_joints(mmd_model, rigid_body_index_dict: Dict[bpy.types.Object, int]) -> Tuple[List[bpy.types.Object], List[Tuple[int, int]], List[bpy.types.Object]]:
+    def collect_joints(all_joint_objects: Iterable[bpy.types.Object], rigid_body_index_dict: Dict[bpy.types.Object, int]) -> Tuple[List[bpy.types.Object], List[Tuple[int, int]], List[bpy.types.Object]]:
         joint_objects: List[bpy.types.Object] = []
         joint_edge_indices: List[Tuple[int, int]] = []
         side_joint_objects: List[bpy.types.Object] = []
 
-        for obj in mmd_model.joints():
+        for obj in all_joint_objects:
             obj1 = obj.rigid_body_constraint.object1
             obj2 = obj.rigid_body_constraint.object2
             if obj1 in rigid_body_index_dict and obj2 in rigid_body_index_dict:
@@ -403,47 +574,37 @@ class RigidBodyToClothConverter:
         return joint_objects, joint_edge_indices, side_joint_objects
 
     @staticmethod
-    def collect_vertices(cloth_bm: bmesh.types.BMesh, pose_bones: List[bpy.types.PoseBone], physics_mode: PhysicsMode, extend_ribbon_area: bool) -> Vertices:
+    def collect_vertices(
+        cloth_bm: bmesh.types.BMesh,
+        pose_bones: List[bpy.types.PoseBone],
+        joint_graph: JointGraph,
+        physics_mode: PhysicsMode,
+        extend_ribbon_area: bool,
+    ) -> Vertices:
         vertices = Vertices()
 
-        for vert in cloth_bm.verts:
-            if not vert.is_wire:
-                continue
-            vertices.ribbon_verts.add(vert)
+        ribbon_indices = {vert.index for vert in cloth_bm.verts if vert.is_wire}
 
         if extend_ribbon_area:
-            boundary_verts = vertices.ribbon_verts
-            boundary_verts_next = []
-            while len(boundary_verts) != 0:
-                for vert in [v2 for v in boundary_verts for e in v.link_edges for v2 in e.verts if v2 not in vertices.ribbon_verts]:
-                    vertices.ribbon_verts.add(vert)
-                    boundary_verts_next.append(vert)
-                boundary_verts = boundary_verts_next.copy()
-                boundary_verts_next.clear()
-
-        vertices.all_ribbon = True
-        for face in cloth_bm.faces:
-            ribbon_face: bool = False
-            for vert in face.verts:
-                if vert in vertices.ribbon_verts:
-                    ribbon_face = True
-                    break
+            ribbon_indices = joint_graph.flood(ribbon_indices)
+
+        vertices.ribbon_verts = {cloth_bm.verts[i] for i in ribbon_indices}
+
+        vertices.all_ribbon = all(any(vert.index in ribbon_indices for vert in face.verts) for face in cloth_bm.faces)
 
-            if not ribbon_face:
-                vertices.all_ribbon = False
-                break
+        pose_bone_names = {bone.name for bone in pose_bones}
 
         vert: bmesh.types.BMVert
         for vert in cloth_bm.verts:
             bone = pose_bones[vert.index]
-            if bone.parent not in pose_bones:
+            if bone.parent is None or bone.parent.name not in pose_bone_names:
                 vertices.up_verts.add(vert)
             elif len(bone.children) == 0:
                 vertices.down_verts.add(vert)
-            elif bone.children[0] not in pose_bones:
+            elif bone.children[0].name not in pose_bone_names:
                 vertices.down_verts.add(vert)
 
-            if vert in vertices.ribbon_verts and physics_mode == PhysicsMode.AUTO or physics_mode == PhysicsMode.BONE_CONSTRAINT:
+            if vert.index in ribbon_indices and physics_mode == PhysicsMode.AUTO or physics_mode == PhysicsMode.BONE_CONSTRAINT:
                 vert.co = bone.tail
 
         return vertices
@@ -471,19 +632,10 @@ class RigidBodyToClothConverter:
         return edges
 
     @staticmethod
-    def clean_mesh(cloth_bm: bmesh.types.BMesh, save_edges: List[Tuple[int, int]]):
-        def remove_edges(cloth_bm: bmesh.types.BMesh, save_edges):
-            # 删除多余边
-            # remove extra edge
-            for edge in cloth_bm.edges:
-                is_save_edge = False
-                for i in save_edges:
-                    if edge.verts[0].index in i and edge.verts[1].index in i:
-                        is_save_edge = True
-                        break
-
-                if not is_save_edge:
-                    cloth_bm.edges.remove(edge)
-
+    def clean_mesh(cloth_bm: bmesh.types.BMesh, joint_graph: JointGraph):
         bmesh.ops.holes_fill(cloth_bm, edges=cloth_bm.edges, sides=4)
-        remove_edges(cloth_bm, save_edges)
+
+        # 删除多余边
+        # remove extra edge
+        for edge in [e for e in cloth_bm.edges if not joint_graph.has_edge(e.verts[0].index, e.verts[1].index)]:
+            cloth_bm.edges.remove(edge)
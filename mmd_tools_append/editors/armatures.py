@@ -6,14 +6,14 @@ import os
 import re
 from abc import ABC
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import bpy
 import rna_prop_ui
 from mathutils import Matrix, Vector
 
 from .. import PACKAGE_PATH
-from ..utilities import raise_installation_error
+from .libraries import LIBRARY_MANAGER
 
 PATH_BLENDS_RIGSHAPELIBRARY = os.path.join(PACKAGE_PATH, "blends", "RigShapeLibrary.blend")
 
@@ -27,19 +27,24 @@ class DriverVariable:
 
 class PoseBoneEditor(ABC):
     @staticmethod
-    def add_driver(constraint: bpy.types.Constraint, driver_path: str, driver_expression: str, *driver_variables: DriverVariable):
+    def add_driver(constraint: bpy.types.Constraint, driver_path: str, driver_expression: Optional[str], *driver_variables: DriverVariable):
+        """Add a driver. Without an expression, the driver sums the variables and skips the expression evaluation."""
         driver: bpy.types.Driver = constraint.driver_add(driver_path).driver
         for driver_variable in driver_variables:
             variable: bpy.types.DriverVariable = driver.variables.new()
             variable.name = driver_variable.name
             variable.targets[0].id = driver_variable.target
             variable.targets[0].data_path = driver_variable.data_path
-        driver.expression = driver_expression
+
+        if driver_expression is None:
+            driver.type = "SUM"
+        else:
+            driver.expression = driver_expression
 
     @classmethod
     def add_influence_driver(cls, constraint: bpy.types.Constraint, target: bpy.types.Object, data_path: str, invert_influence=False):
         variable = DriverVariable("mmd_append_influence", target, data_path)
-        cls.add_driver(constraint, "influence", ("1-" if invert_influence else "+") + variable.name, variable)
+        cls.add_driver(constraint, "influence", f"1-{variable.name}" if invert_influence else None, variable)
 
     @classmethod
     def update_influence_driver(cls, constraint: bpy.types.Constraint, target: bpy.types.Object, data_path: str, invert_influence=False):
@@ -246,6 +251,86 @@ class PoseBoneEditor(ABC):
                 pose_bone.constraints.remove(constraint)
 
 
+class PoseMatrixSolver:
+    """Pose bone matrices predicted from the evaluated pose and the planned changes, without updating the depsgraph.
+
+    A changed bone gets its pose matrix from its planned matrix_basis and the predicted matrix of its parent.
+    An unchanged bone keeps its pose relative to its parent, or to its leader for the bones moved by the constraints.
+    The planned matrix_basis are written to the pose bones in a single pass by apply.
+    """
+
+    def __init__(self, pose_bones: Dict[str, bpy.types.PoseBone]):
+        self._pose_bones = pose_bones
+        self._evaluated_matrices: Dict[str, Matrix] = {}
+        # bone name -> planned matrix_basis
+        self._bases: Dict[str, Matrix] = {}
+        # bone name -> leader bone name
+        self._leaders: Dict[str, str] = {}
+
+    def set_leader(self, bone_name: str, leader_bone_name: str):
+        """Predict the bone as rigidly following the leader, e.g. the end of an IK chain following its target."""
+        self._leaders[bone_name] = leader_bone_name
+
+    def _get_evaluated_matrix(self, bone_name: str) -> Matrix:
+        matrix = self._evaluated_matrices.get(bone_name)
+        if matrix is None:
+            matrix = self._pose_bones[bone_name].matrix.copy()
+            self._evaluated_matrices[bone_name] = matrix
+        return matrix
+
+    def _convert_basis(self, bone_name: str, matrix: Matrix, invert: bool) -> Matrix:
+        pose_bone = self._pose_bones[bone_name]
+        bone = pose_bone.bone
+        parent = pose_bone.parent
+        if parent is None:
+            return bone.convert_local_to_pose(matrix, bone.matrix_local, invert=invert)
+
+        return bone.convert_local_to_pose(
+            matrix,
+            bone.matrix_local,
+            parent_matrix=self.matrix(parent.name),
+            parent_matrix_local=parent.bone.matrix_local,
+            invert=invert,
+        )
+
+    def matrix(self, bone_name: str) -> Matrix:
+        """Return the predicted pose matrix, the counterpart of PoseBone.matrix."""
+        basis = self._bases.get(bone_name)
+        if basis is not None:
+            return self._convert_basis(bone_name, basis, invert=False)
+
+        leader_bone_name = self._leaders.get(bone_name)
+        if leader_bone_name is None:
+            parent = self._pose_bones[bone_name].parent
+            if parent is None:
+                return self._get_evaluated_matrix(bone_name).copy()
+            leader_bone_name = parent.name
+
+        return self.matrix(leader_bone_name) @ self._get_evaluated_matrix(leader_bone_name).inverted_safe() @ self._get_evaluated_matrix(bone_name)
+
+    def set_matrix(self, bone_name: str, matrix: Matrix):
+        """Plan the counterpart of the PoseBone.matrix assignment against the predicted parent matrix."""
+        self._bases[bone_name] = self._convert_basis(bone_name, matrix, invert=True)
+
+    def basis(self, bone_name: str) -> Matrix:
+        """Return the planned matrix_basis, or the current one if the bone is unchanged."""
+        basis = self._bases.get(bone_name)
+        if basis is None:
+            return self._pose_bones[bone_name].matrix_basis.copy()
+        return basis.copy()
+
+    def set_basis(self, bone_name: str, basis: Matrix):
+        self._bases[bone_name] = basis.copy()
+
+    def apply(self):
+        """Write the planned matrix_basis to the pose bones, the depsgraph has to be updated afterwards."""
+        for bone_name, basis in self._bases.items():
+            self._pose_bones[bone_name].matrix_basis = basis
+
+        self._bases.clear()
+        self._evaluated_matrices.clear()
+
+
 class EditBoneEditor(ABC):
     @staticmethod
     def to_center(left: Vector, right: Vector) -> Vector:
@@ -321,14 +406,200 @@ class EditBoneEditor(ABC):
 
     @staticmethod
     def load_custom_shapes(custom_shape_names: List[str]):
-        if len(custom_shape_names) == 0:
-            return
-
-        try:
-            with bpy.data.libraries.load(PATH_BLENDS_RIGSHAPELIBRARY, link=False) as (_, data_to):
-                data_to.objects = custom_shape_names
-        except OSError as exception:
-            raise_installation_error(exception)
+        LIBRARY_MANAGER.append(PATH_BLENDS_RIGSHAPELIBRARY, "objects", custom_shape_names)
+
+
+class EditBonePlan:
+    """Edit bone creations and modifications collected as plain data, then applied in a single pass.
+
+    The planned geometry is tracked, so the later steps read the result of the earlier ones without touching the edit bones.
+    The edit bones are looked up by name only once, when the plan is created.
+    The connected bones are tracked as Blender updates them: a head moves the parent tail and a tail moves the children heads.
+    """
+
+    def __init__(self, armature: bpy.types.Armature):
+        self._armature = armature
+        self._edit_bones: Dict[str, bpy.types.EditBone] = {b.name: b for b in armature.edit_bones}
+        self._new_bone_names: List[str] = []
+
+        # bone name -> planned value
+        self._heads: Dict[str, Vector] = {}
+        self._tails: Dict[str, Vector] = {}
+        self._rolls: Dict[str, Optional[float]] = {}
+        self._parents: Dict[str, Optional[str]] = {b.name: None if b.parent is None else b.parent.name for b in armature.edit_bones}
+        self._connects: Dict[str, bool] = {b.name: b.use_connect for b in armature.edit_bones}
+
+        # (operation, bone name, value) in the planned order
+        self._operations: List[Tuple[str, str, Any]] = []
+        # (edit bone of another armature, tail, roll)
+        self._external_operations: List[Tuple[bpy.types.EditBone, Vector, float]] = []
+
+    def __contains__(self, bone_name: str) -> bool:
+        return bone_name in self._edit_bones or bone_name in self._new_bone_names
+
+    def get_or_create_bone(self, bone_name: str) -> str:
+        if bone_name not in self:
+            self._new_bone_names.append(bone_name)
+            self._parents[bone_name] = None
+            self._connects[bone_name] = False
+        return bone_name
+
+    def head(self, bone_name: str) -> Vector:
+        if bone_name in self._heads:
+            return self._heads[bone_name].copy()
+        return self._edit_bones[bone_name].head.copy()
+
+    def tail(self, bone_name: str) -> Vector:
+        if bone_name in self._tails:
+            return self._tails[bone_name].copy()
+        return self._edit_bones[bone_name].tail.copy()
+
+    def roll(self, bone_name: str) -> float:
+        if bone_name not in self._rolls:
+            return self._edit_bones[bone_name].roll
+
+        roll = self._rolls[bone_name]
+        if roll is None:
+            raise ValueError(f"The roll of {bone_name} is unknown until the plan is applied")
+        return roll
+
+    def vector(self, bone_name: str) -> Vector:
+        return self.tail(bone_name) - self.head(bone_name)
+
+    def length(self, bone_name: str) -> float:
+        return self.vector(bone_name).length
+
+    def _update_connected_bones(self, bone_name: str):
+        """Track the connected bones moved by Blender after the head or the tail of the edit bone is set."""
+        parent_bone_name = self._parents[bone_name]
+        if parent_bone_name is not None and self._connects[bone_name]:
+            self._tails[parent_bone_name] = self.head(bone_name)
+
+        tail = self.tail(bone_name)
+        for child_bone_name, child_parent_bone_name in self._parents.items():
+            if child_parent_bone_name == bone_name and self._connects[child_bone_name]:
+                self._heads[child_bone_name] = tail.copy()
+
+    def set(self, bone_name: str, head: Optional[Vector] = None, tail: Optional[Vector] = None, roll: Optional[float] = None, **attributes):
+        # the attributes like use_connect go first, as they change how the geometry is applied
+        for attribute, value in attributes.items():
+            self._operations.append(("attribute", bone_name, (attribute, value)))
+
+            if attribute == "use_connect":
+                self._connects[bone_name] = value
+                parent_bone_name = self._parents[bone_name]
+                if value and parent_bone_name is not None:
+                    # the connected bone head snaps to the parent tail
+                    self._heads[bone_name] = self.tail(parent_bone_name)
+
+        if head is not None:
+            self._heads[bone_name] = head.copy()
+            self._operations.append(("head", bone_name, head.copy()))
+            self._update_connected_bones(bone_name)
+
+        if tail is not None:
+            self._tails[bone_name] = tail.copy()
+            self._operations.append(("tail", bone_name, tail.copy()))
+            self._update_connected_bones(bone_name)
+
+        if roll is not None:
+            self._rolls[bone_name] = roll
+            self._operations.append(("roll", bone_name, roll))
+
+    def move(self, bone_name: str, head: Optional[Vector] = None, tail: Optional[Vector] = None):
+        """Plan EditBoneEditor.move_bone."""
+        vector = self.vector(bone_name)
+
+        if head is not None and tail is not None:
+            self.set(bone_name, head=head, tail=tail)
+
+        elif head is not None:
+            self.set(bone_name, head=head, tail=head + vector)
+
+        elif tail is not None:
+            self.set(bone_name, head=tail - vector, tail=tail)
+
+    def translate(self, bone_name: str, vector: Vector):
+        self.set(bone_name, head=self.head(bone_name) + vector, tail=self.tail(bone_name) + vector)
+
+    def set_length(self, bone_name: str, length: float):
+        head = self.head(bone_name)
+        self.set(bone_name, tail=head + (self.tail(bone_name) - head).normalized() * length)
+
+    def fit_rotation(self, bone_name: str, reference_bone_name: str):
+        """Plan EditBoneEditor.fit_edit_bone_rotation, keeping the head and the length."""
+        head = self.head(bone_name)
+        self.set(
+            bone_name,
+            tail=head + self.vector(reference_bone_name).normalized() * self.length(bone_name),
+            roll=self.roll(reference_bone_name),
+        )
+
+    def fit_external_rotation(self, edit_bone: bpy.types.EditBone, reference_bone_name: str):
+        """Plan EditBoneEditor.fit_edit_bone_rotation for an edit bone of another armature."""
+        tail = edit_bone.head + self.vector(reference_bone_name).normalized() * edit_bone.length
+        self._external_operations.append((edit_bone, tail, self.roll(reference_bone_name)))
+
+    def align_roll(self, bone_name: str, axis: Vector):
+        self._rolls[bone_name] = None
+        self._operations.append(("align_roll", bone_name, axis.copy()))
+
+    def set_parent(self, bone_name: str, parent_bone_name: Optional[str]):
+        self._parents[bone_name] = parent_bone_name
+        self._operations.append(("parent", bone_name, parent_bone_name))
+
+    def insert(self, bone_name: str, parent_bone_name: str):
+        """Plan EditBoneEditor.insert_edit_bone."""
+        for child_bone_name, child_parent_bone_name in list(self._parents.items()):
+            if child_parent_bone_name == parent_bone_name:
+                self._parents[child_bone_name] = bone_name
+        self._parents[bone_name] = parent_bone_name
+        self._operations.append(("insert", bone_name, parent_bone_name))
+
+    def assign(self, collection_name: str, bone_name: str):
+        self._operations.append(("assign", bone_name, collection_name))
+
+    def apply(self) -> Dict[str, bpy.types.EditBone]:
+        """Create and modify the edit bones in the planned order. The armature must be in edit mode."""
+        edit_bones = self._edit_bones
+
+        armature_edit_bones = self._armature.edit_bones
+        for bone_name in self._new_bone_names:
+            edit_bones[bone_name] = armature_edit_bones.new(bone_name)
+
+        collections = self._armature.collections_all
+
+        for operation, bone_name, value in self._operations:
+            edit_bone = edit_bones[bone_name]
+
+            if operation == "head":
+                edit_bone.head = value
+            elif operation == "tail":
+                edit_bone.tail = value
+            elif operation == "roll":
+                edit_bone.roll = value
+            elif operation == "attribute":
+                setattr(edit_bone, *value)
+            elif operation == "align_roll":
+                edit_bone.align_roll(value)
+            elif operation == "parent":
+                edit_bone.parent = None if value is None else edit_bones[value]
+            elif operation == "insert":
+                EditBoneEditor.insert_edit_bone(edit_bone, edit_bones[value])
+            elif operation == "assign":
+                collections[value].assign(edit_bone)
+            else:
+                raise ValueError(f"unknown operation: {operation}")
+
+        for edit_bone, tail, roll in self._external_operations:
+            edit_bone.tail = tail
+            edit_bone.roll = roll
+
+        self._new_bone_names.clear()
+        self._operations.clear()
+        self._external_operations.clear()
+
+        return edit_bones
 
 
 class ArmatureEditor(EditBoneEditor, PoseBoneEditor):
@@ -0,0 +1,323 @@
+# Copyright 2026 MMD Tools Append authors
+# This file is part of MMD Tools Append.
+
+from abc import ABC, abstractmethod
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import bpy
+import numpy as np
+
+from .. import REGISTER_HOOKS, UNREGISTER_HOOKS
+from ..utilities import import_mmd_tools
+from .meshes import VertexGroupWeightMatrix
+
+
+class DependencyIndex(ABC):
+    """Scene index updated incrementally from the depsgraph updates.
+
+    The index is fully rebuilt only after file loads, undo and redo, or when a stale entry is found.
+    """
+
+    def __init__(self):
+        self._is_dirty = True
+
+    def mark_dirty(self):
+        self._is_dirty = True
+
+    @abstractmethod
+    def _clear(self):
+        pass
+
+    @abstractmethod
+    def _index_object(self, obj: bpy.types.Object):
+        pass
+
+    @abstractmethod
+    def _unindex_object(self, object_name: str):
+        pass
+
+    def _rebuild(self):
+        self._clear()
+
+        for obj in bpy.data.objects:
+            self._index_object(obj)
+
+        self._is_dirty = False
+
+    def _ensure_built(self):
+        if self._is_dirty:
+            self._rebuild()
+
+    def update_objects(self, objects: Iterable[bpy.types.Object]):
+        if self._is_dirty:
+            return
+
+        for obj in objects:
+            self._unindex_object(obj.name)
+            self._index_object(obj)
+
+
+class ModifierDependencyIndex(DependencyIndex):
+    """Reverse index from a target object to the modifiers referring to it."""
+
+    def __init__(self, modifier_type: str, target_attribute: str):
+        super().__init__()
+        self.modifier_type = modifier_type
+        self.target_attribute = target_attribute
+
+        # target session_uid -> {(object name, modifier name)}
+        self._target2dependents: Dict[int, Set[Tuple[str, str]]] = {}
+        # object name -> {(target session_uid, modifier name)}
+        self._object2targets: Dict[str, Set[Tuple[int, str]]] = {}
+
+    def _clear(self):
+        self._target2dependents.clear()
+        self._object2targets.clear()
+
+    def _index_object(self, obj: bpy.types.Object):
+        targets: Set[Tuple[int, str]] = set()
+        for modifier in obj.modifiers:
+            if modifier.type != self.modifier_type:
+                continue
+
+            target = getattr(modifier, self.target_attribute)
+            if target is None:
+                continue
+
+            targets.add((target.session_uid, modifier.name))
+            self._target2dependents.setdefault(target.session_uid, set()).add((obj.name, modifier.name))
+
+        if targets:
+            self._object2targets[obj.name] = targets
+
+    def _unindex_object(self, object_name: str):
+        for target_session_uid, modifier_name in self._object2targets.pop(object_name, ()):
+            dependents = self._target2dependents.get(target_session_uid)
+            if dependents is None:
+                continue
+
+            dependents.discard((object_name, modifier_name))
+            if not dependents:
+                del self._target2dependents[target_session_uid]
+
+    def find_modifiers(self, target: bpy.types.Object) -> List[bpy.types.Modifier]:
+        self._ensure_built()
+
+        modifiers = self._resolve(target)
+        if modifiers is None:
+            self._rebuild()
+            modifiers = self._resolve(target) or []
+
+        return modifiers
+
+    def _resolve(self, target: bpy.types.Object):
+        """Return the modifiers depending on the target, or None if the index is stale."""
+        modifiers: List[bpy.types.Modifier] = []
+        for object_name, modifier_name in self._target2dependents.get(target.session_uid, ()):
+            obj = bpy.data.objects.get(object_name)
+            modifier = None if obj is None else obj.modifiers.get(modifier_name)
+            if modifier is None or modifier.type != self.modifier_type or getattr(modifier, self.target_attribute) != target:
+                return None
+            modifiers.append(modifier)
+        return modifiers
+
+    def find_objects(self, target: bpy.types.Object, object_type: str) -> List[bpy.types.Object]:
+        """Return the objects of the type having a modifier referring to the target, each once."""
+        objects: List[bpy.types.Object] = []
+        for modifier in self.find_modifiers(target):
+            obj = modifier.id_data
+            if obj.type == object_type and obj not in objects:
+                objects.append(obj)
+        return objects
+
+
+class PhysicsObjectIndex(DependencyIndex):
+    """Index from an MMD root object to its cloth, collision and rigid body mesh objects.
+
+    The objects outside of any MMD model are indexed under the None root.
+    """
+
+    KINDS: Tuple[str, ...] = ("CLOTH", "COLLISION", "RIGID_BODY")
+
+    def __init__(self):
+        super().__init__()
+        # kind -> {object name}
+        self._kind2objects: Dict[str, Set[str]] = {k: set() for k in self.KINDS}
+        # root session_uid or None -> {object name}
+        self._root2objects: Dict[Optional[int], Set[str]] = {}
+        # object name -> (root session_uid or None, {kind})
+        self._object2entry: Dict[str, Tuple[Optional[int], FrozenSet[str]]] = {}
+
+    def _clear(self):
+        for object_names in self._kind2objects.values():
+            object_names.clear()
+        self._root2objects.clear()
+        self._object2entry.clear()
+
+    @staticmethod
+    def _get_kinds(obj: bpy.types.Object) -> FrozenSet[str]:
+        if obj.type != "MESH":
+            return frozenset()
+
+        kinds = {m.type for m in obj.modifiers if m.type in {"CLOTH", "COLLISION"}}
+        if obj.rigid_body is not None:
+            kinds.add("RIGID_BODY")
+        return frozenset(kinds)
+
+    @staticmethod
+    def _get_root_session_uid(obj: bpy.types.Object) -> Optional[int]:
+        mmd_root = import_mmd_tools().core.model.FnModel.find_root_object(obj)
+        return None if mmd_root is None else mmd_root.session_uid
+
+    def _index_object(self, obj: bpy.types.Object):
+        kinds = self._get_kinds(obj)
+        if not kinds:
+            return
+
+        root_session_uid = self._get_root_session_uid(obj)
+        self._object2entry[obj.name] = (root_session_uid, kinds)
+        self._root2objects.setdefault(root_session_uid, set()).add(obj.name)
+        for kind in kinds:
+            self._kind2objects[kind].add(obj.name)
+
+    def _unindex_object(self, object_name: str):
+        entry = self._object2entry.pop(object_name, None)
+        if entry is None:
+            return
+
+        root_session_uid, kinds = entry
+        object_names = self._root2objects[root_session_uid]
+        object_names.discard(object_name)
+        if not object_names:
+            del self._root2objects[root_session_uid]
+
+        for kind in kinds:
+            self._kind2objects[kind].discard(object_name)
+
+    def find_objects(self, kind: str, mmd_root: Optional[bpy.types.Object] = None) -> List[bpy.types.Object]:
+        """Return the objects of the kind, only in the MMD model of the root if given."""
+        self._ensure_built()
+
+        objects = self._resolve(kind, mmd_root)
+        if objects is None:
+            self._rebuild()
+            objects = self._resolve(kind, mmd_root) or []
+
+        return objects
+
+    def _resolve(self, kind: str, mmd_root: Optional[bpy.types.Object]):
+        """Return the objects of the kind, or None if the index is stale."""
+        if mmd_root is None:
+            object_names = self._kind2objects[kind]
+        else:
+            object_names = [n for n in self._root2objects.get(mmd_root.session_uid, ()) if kind in self._object2entry[n][1]]
+
+        objects: List[bpy.types.Object] = []
+        for object_name in object_names:
+            obj = bpy.data.objects.get(object_name)
+            if obj is None or kind not in self._get_kinds(obj):
+                return None
+            if mmd_root is not None and self._get_root_session_uid(obj) != mmd_root.session_uid:
+                return None
+            objects.append(obj)
+        return objects
+
+
+class VertexGroupMaxWeightCache:
+    """Max weight of each vertex group cached per mesh data.
+
+    An entry is dropped on a geometry update of the mesh, and all entries after file loads, undo and redo.
+    The depsgraph is not updated between the operator calls of a script, so an entry is also checked against
+    the vertex group names and the vertex count, the weights edited in between are only caught by use_cache=False.
+    """
+
+    def __init__(self):
+        # mesh session_uid -> (signature, max weight of each vertex group, -1 for the groups without any vertex)
+        self._mesh2max_weights: Dict[int, Tuple[Tuple, np.ndarray]] = {}
+
+    @staticmethod
+    def _to_signature(mesh_object: bpy.types.Object) -> Tuple:
+        return (tuple(g.name for g in mesh_object.vertex_groups), len(mesh_object.data.vertices))
+
+    def get_max_weights(self, mesh_object: bpy.types.Object, use_cache: bool = True) -> np.ndarray:
+        """Return the max weight of each vertex group, the callers removing data by the weights should pass use_cache=False."""
+        mesh: bpy.types.Mesh = mesh_object.data
+        group_count = len(mesh_object.vertex_groups)
+        signature = self._to_signature(mesh_object)
+
+        entry = self._mesh2max_weights.get(mesh.session_uid) if use_cache else None
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        matrix = VertexGroupWeightMatrix.from_mesh(mesh)
+        max_weights = matrix.calc_group_max_weights(max(group_count, matrix.group_count))[:group_count]
+        max_weights.flags.writeable = False
+
+        self._mesh2max_weights[mesh.session_uid] = (signature, max_weights)
+        return max_weights
+
+    def invalidate(self, meshes: Iterable[bpy.types.Mesh]):
+        for mesh in meshes:
+            self._mesh2max_weights.pop(mesh.session_uid, None)
+
+    def clear(self):
+        self._mesh2max_weights.clear()
+
+
+SURFACE_DEFORM_DEPENDENCY_INDEX = ModifierDependencyIndex("SURFACE_DEFORM", "target")
+ARMATURE_DEPENDENCY_INDEX = ModifierDependencyIndex("ARMATURE", "object")
+PHYSICS_OBJECT_INDEX = PhysicsObjectIndex()
+
+_DEPENDENCY_INDICES: List[DependencyIndex] = [
+    SURFACE_DEFORM_DEPENDENCY_INDEX,
+    ARMATURE_DEPENDENCY_INDEX,
+    PHYSICS_OBJECT_INDEX,
+]
+
+VERTEX_GROUP_MAX_WEIGHT_CACHE = VertexGroupMaxWeightCache()
+
+
+@bpy.app.handlers.persistent
+def _update_dependency_indices(_scene, depsgraph: bpy.types.Depsgraph):
+    updated_objects = [u.id.original for u in depsgraph.updates if isinstance(u.id, bpy.types.Object)]
+    if not updated_objects:
+        return
+
+    for dependency_index in _DEPENDENCY_INDICES:
+        dependency_index.update_objects(updated_objects)
+
+    VERTEX_GROUP_MAX_WEIGHT_CACHE.invalidate(u.id.original.data for u in depsgraph.updates if isinstance(u.id, bpy.types.Object) and u.is_updated_geometry and u.id.type == "MESH")
+
+
+@bpy.app.handlers.persistent
+def _mark_dependency_indices_dirty(*_):
+    for dependency_index in _DEPENDENCY_INDICES:
+        dependency_index.mark_dirty()
+
+    VERTEX_GROUP_MAX_WEIGHT_CACHE.clear()
+
+
+_HANDLERS = (
+    (bpy.app.handlers.depsgraph_update_post, _update_dependency_indices),
+    (bpy.app.handlers.load_post, _mark_dependency_indices_dirty),
+    (bpy.app.handlers.undo_post, _mark_dependency_indices_dirty),
+    (bpy.app.handlers.redo_post, _mark_dependency_indices_dirty),
+)
+
+
+def register_handlers():
+    for handlers, handler in _HANDLERS:
+        if handler not in handlers:
+            handlers.append(handler)
+
+    _mark_dependency_indices_dirty()
+
+
+def unregister_handlers():
+    for handlers, handler in _HANDLERS:
+        if handler in handlers:
+            handlers.remove(handler)
+
+
+REGISTER_HOOKS.append(register_handlers)
+UNREGISTER_HOOKS.append(unregister_handlers)
@@ -0,0 +1,115 @@
+# Copyright 2026 MMD Tools Append authors
+# This file is part of MMD Tools Append.
+
+import json
+import os
+import tempfile
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import bpy
+
+from .. import PACKAGE_NAME
+from ..utilities import raise_installation_error
+
+
+class LibraryManager:
+    """Append datablocks from the bundled blend files.
+
+    The datablock names of each blend file are indexed once and cached on disk, keyed by the file mtime.
+    The names already in the current file or missing from the library are resolved without opening the library,
+    and the other names requested together are appended in a single load.
+    """
+
+    DATA_TYPES: Tuple[str, ...] = ("collections", "node_groups", "objects")
+    INDEX_FILE_NAME = "library_index.json"
+
+    def __init__(self):
+        # blend filepath -> {"mtime": float, "names": {data type: [datablock name]}}
+        self._index: Optional[Dict[str, Dict]] = None
+        # (blend filepath, data type) -> datablock names
+        self._names: Dict[Tuple[str, str], FrozenSet[str]] = {}
+
+        self.load_count = 0
+        self.load_seconds = 0.0
+
+    @classmethod
+    def _get_index_filepath(cls) -> str:
+        try:
+            cache_dir = bpy.utils.extension_path_user(PACKAGE_NAME, create=True)
+        except ValueError:
+            # not installed as an extension
+            cache_dir = tempfile.gettempdir()
+        return os.path.join(cache_dir, cls.INDEX_FILE_NAME)
+
+    def _get_index(self) -> Dict[str, Dict]:
+        if self._index is not None:
+            return self._index
+
+        try:
+            with open(self._get_index_filepath(), "r", encoding="utf-8") as file:
+                self._index = json.load(file)
+        except (OSError, ValueError):
+            self._index = {}
+
+        return self._index
+
+    def _save_index(self):
+        try:
+            with open(self._get_index_filepath(), "w", encoding="utf-8") as file:
+                json.dump(self._index, file, ensure_ascii=False)
+        except OSError:
+            # the index is rebuilt on the next session
+            pass
+
+    def get_names(self, blend_filepath: str, data_type: str) -> FrozenSet[str]:
+        try:
+            mtime = os.path.getmtime(blend_filepath)
+        except OSError as exception:
+            raise_installation_error(exception)
+
+        index = self._get_index()
+        entry = index.get(blend_filepath)
+        if entry is None or entry["mtime"] != mtime:
+            try:
+                with bpy.data.libraries.load(blend_filepath, link=False) as (data_from, _):
+                    entry = {"mtime": mtime, "names": {t: list(getattr(data_from, t)) for t in self.DATA_TYPES}}
+            except OSError as exception:
+                raise_installation_error(exception)
+
+            index[blend_filepath] = entry
+            self._names = {k: v for k, v in self._names.items() if k[0] != blend_filepath}
+            self._save_index()
+
+        key = (blend_filepath, data_type)
+        names = self._names.get(key)
+        if names is None:
+            names = frozenset(entry["names"].get(data_type, ()))
+            self._names[key] = names
+        return names
+
+    def append(self, blend_filepath: str, data_type: str, names: Iterable[str]) -> List[str]:
+        """Append the datablocks not yet in the current file in a single load, return the appended names."""
+        datablocks = getattr(bpy.data, data_type)
+        missing_names = [n for n in dict.fromkeys(names) if n not in datablocks]
+        if len(missing_names) == 0:
+            return []
+
+        library_names = self.get_names(blend_filepath, data_type)
+        missing_names = [n for n in missing_names if n in library_names]
+        if len(missing_names) == 0:
+            return []
+
+        start_time = time.perf_counter()
+        try:
+            with bpy.data.libraries.load(blend_filepath, link=False) as (_, data_to):
+                setattr(data_to, data_type, missing_names)
+        except OSError as exception:
+            raise_installation_error(exception)
+
+        self.load_count += 1
+        self.load_seconds += time.perf_counter() - start_time
+        return missing_names
+
+
+LIBRARY_MANAGER = LibraryManager()
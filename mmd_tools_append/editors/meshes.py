@@ -1,13 +1,98 @@
 # Copyright 2021 UuuNyaa <UuuNyaa@gmail.com>
 # This file is part of MMD Tools Append.
 
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+import dataclasses
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 import bpy
+import numpy as np
 
 SettingsOrNone = Optional[Dict[str, Any]]
 
 
+@dataclasses.dataclass
+class VertexGroupWeightMatrix:
+    """Sparse vertex x vertex group weight matrix in the CSR layout."""
+
+    offsets: np.ndarray
+    groups: np.ndarray
+    weights: np.ndarray
+
+    @staticmethod
+    def from_mesh(mesh: bpy.types.Mesh, ignore_vertex_group_indices: Set[int] = frozenset()) -> "VertexGroupWeightMatrix":
+        vertex_count = len(mesh.vertices)
+        counts = np.empty(vertex_count, dtype=np.int64)
+        groups: List[int] = []
+        weights: List[float] = []
+        for vertex_index, vertex in enumerate(mesh.vertices):
+            vertex_groups = vertex.groups
+            counts[vertex_index] = len(vertex_groups)
+            for vertex_group in vertex_groups:
+                groups.append(vertex_group.group)
+                weights.append(vertex_group.weight)
+
+        group_array = np.array(groups, dtype=np.int64)
+        weight_array = np.array(weights, dtype=np.float64)
+        rows = np.repeat(np.arange(vertex_count), counts)
+
+        is_used = ~np.isin(group_array, np.fromiter(ignore_vertex_group_indices, dtype=np.int64, count=len(ignore_vertex_group_indices)))
+        offsets = np.zeros(vertex_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[is_used], minlength=vertex_count), out=offsets[1:])
+
+        return VertexGroupWeightMatrix(offsets, group_array[is_used], weight_array[is_used])
+
+    @property
+    def group_count(self) -> int:
+        return int(self.groups.max(initial=-1)) + 1
+
+    def calc_group_max_weights(self, group_count: int) -> np.ndarray:
+        """Return the max weight of each group, -1 for the groups without any vertex."""
+        max_weights = np.full(group_count, -1.0, dtype=np.float64)
+        np.maximum.at(max_weights, self.groups, self.weights)
+        return max_weights
+
+    def _gather(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the (row position, group, weight) of the non-zero entries of the rows."""
+        starts = self.offsets[rows]
+        counts = self.offsets[rows + 1] - starts
+        positions = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+        return np.repeat(np.arange(len(rows)), counts), self.groups[positions], self.weights[positions]
+
+    def calc_distances(self, vertices0: np.ndarray, vertices1: np.ndarray) -> np.ndarray:
+        """Return the sums of |w0 - w1| over the groups of each vertex, so the shared groups count twice."""
+        group_count = self.group_count
+        pairs0, groups0, weights0 = self._gather(vertices0)
+        pairs1, groups1, weights1 = self._gather(vertices1)
+
+        keys, inverses = np.unique(np.concatenate((pairs0 * group_count + groups0, pairs1 * group_count + groups1)), return_inverse=True)
+        inverses0 = inverses[: len(pairs0)]
+        inverses1 = inverses[len(pairs0) :]
+        key_count = len(keys)
+
+        weight_differences = np.abs(np.bincount(inverses0, weights=weights0, minlength=key_count) - np.bincount(inverses1, weights=weights1, minlength=key_count))
+        occurrences = (np.bincount(inverses0, minlength=key_count) > 0).astype(np.int64) + (np.bincount(inverses1, minlength=key_count) > 0)
+
+        return np.bincount(keys // group_count, weights=weight_differences * occurrences, minlength=len(vertices0))
+
+    def calc_heaviest_groups(self, tri_vertices: np.ndarray) -> np.ndarray:
+        """Return the group with the largest weight sum over the vertices of each triangle, -1 if none."""
+        group_count = self.group_count
+        positions, groups, weights = self._gather(tri_vertices.ravel())
+
+        keys, inverses = np.unique((positions // 3) * group_count + groups, return_inverse=True)
+        weight_sums = np.bincount(inverses, weights=weights, minlength=len(keys))
+        key_tris = keys // group_count
+
+        order = np.lexsort((-weight_sums, key_tris))
+        is_first = np.ones(len(order), dtype=bool)
+        is_first[1:] = key_tris[order[1:]] != key_tris[order[:-1]]
+        heaviests = order[is_first]
+
+        heaviest_groups = np.full(len(tri_vertices), -1, dtype=np.int64)
+        heaviest_groups[key_tris[heaviests]] = keys[heaviests] % group_count
+        return heaviest_groups
+
+
 class MeshEditor:
     # pylint: disable=too-many-public-methods
 
@@ -248,6 +333,75 @@ class MeshEditor:
             )
         return vertex_group
 
+    def merge_vertex_group_weights(self, from_to_vertex_group_indices: Dict[int, int]):
+        """Add the weights of each source vertex group to its destination vertex group in a single pass over the vertices."""
+        if not from_to_vertex_group_indices:
+            return
+
+        matrix = VertexGroupWeightMatrix.from_mesh(self.mesh_object.data)
+        vertex_count = len(matrix.offsets) - 1
+
+        from_to_indices = np.full(max(matrix.group_count, max(from_to_vertex_group_indices) + 1), -1, dtype=np.int64)
+        from_to_indices[np.fromiter(from_to_vertex_group_indices.keys(), dtype=np.int64)] = np.fromiter(from_to_vertex_group_indices.values(), dtype=np.int64)
+
+        rows = np.repeat(np.arange(vertex_count), np.diff(matrix.offsets))
+        to_indices = from_to_indices[matrix.groups]
+        is_merged = to_indices >= 0
+
+        # sum the weights per (destination group, vertex)
+        keys, inverses = np.unique(to_indices[is_merged] * vertex_count + rows[is_merged], return_inverse=True)
+        weight_sums = np.bincount(inverses, weights=matrix.weights[is_merged], minlength=len(keys))
+
+        # vertices sharing the same weight are written with a single call
+        to_keys = keys // vertex_count
+        order = np.lexsort((weight_sums, to_keys))
+        to_keys, weight_sums, vertex_indices = to_keys[order], weight_sums[order], keys[order] % vertex_count
+        splits = np.flatnonzero((to_keys[1:] != to_keys[:-1]) | (weight_sums[1:] != weight_sums[:-1])) + 1
+
+        vertex_groups = self.mesh_object.vertex_groups
+        for start, end in zip(np.concatenate(([0], splits)).tolist(), np.concatenate((splits, [len(keys)])).tolist()):
+            if start == end:
+                continue
+            vertex_groups[int(to_keys[start])].add(vertex_indices[start:end].tolist(), float(weight_sums[start]), "ADD")
+
+    def get_vertex_coordinates(self) -> np.ndarray:
+        vertices = self.mesh_object.data.vertices
+        coordinates = np.empty(len(vertices) * 3, dtype=np.float32)
+        vertices.foreach_get("co", coordinates)
+        return coordinates.reshape(-1, 3)
+
+    @staticmethod
+    def get_shape_key_coordinates(key_block: bpy.types.ShapeKey, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = np.empty((len(key_block.data), 3), dtype=np.float32)
+        key_block.data.foreach_get("co", out.ravel())
+        return out
+
+    def calc_shape_key_max_displacements(self, origin_coordinates: np.ndarray) -> Dict[str, float]:
+        """Return the max vertex displacement of each shape key from the origin coordinates.
+
+        The key blocks are read one by one into a reused buffer to keep the memory at a single (V, 3) array.
+        """
+        shape_keys = self.mesh_object.data.shape_keys
+        if shape_keys is None:
+            return {}
+
+        coordinates = np.empty_like(origin_coordinates)
+        key_block_name2max_displacement: Dict[str, float] = {}
+        for key_block in shape_keys.key_blocks:
+            self.get_shape_key_coordinates(key_block, coordinates)
+            key_block_name2max_displacement[key_block.name] = float(np.linalg.norm(coordinates - origin_coordinates, axis=1).max(initial=0.0))
+
+        return key_block_name2max_displacement
+
+    def remove_shape_keys(self, key_block_names: Iterable[str]):
+        """Remove the shape keys through the data API, from the last one to keep the indices of the others."""
+        key_blocks = self.mesh_object.data.shape_keys.key_blocks
+        remove_key_block_names = set(key_block_names)
+        for key_block in reversed(list(key_blocks)):
+            if key_block.name in remove_key_block_names:
+                self.mesh_object.shape_key_remove(key_block)
+
     def find_armature_object(self) -> Optional[bpy.types.Object]:
         return self.mesh_object.find_armature()
 
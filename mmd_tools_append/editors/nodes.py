@@ -8,7 +8,7 @@ from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 import bpy
 
 from .. import PACKAGE_PATH
-from ..utilities import raise_installation_error
+from .libraries import LIBRARY_MANAGER
 
 PATH_BLENDS_MMD_APPEND_MATERIALS = os.path.join(PACKAGE_PATH, "blends", "MMDAppend_Materials.blend")
 
@@ -32,14 +32,10 @@ class NodeEditor(ABC):
     _node_group_type = type
 
     def append_node_group(self, name: str):
-        if name in bpy.data.node_groups:
-            return
+        self.append_node_groups([name])
 
-        try:
-            with bpy.data.libraries.load(self._library_blend_file_path, link=False) as (_, data_to):
-                data_to.node_groups = [name]
-        except OSError as exception:
-            raise_installation_error(exception)
+    def append_node_groups(self, names: Iterable[str]):
+        LIBRARY_MANAGER.append(self._library_blend_file_path, "node_groups", names)
 
     @abstractmethod
     def get_output_node(self) -> bpy.types.Node:
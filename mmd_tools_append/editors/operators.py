@@ -2,15 +2,17 @@
 # This file is part of MMD Tools Append.
 
 import math
-import sys
 import time
-from typing import Set
+from typing import Optional, Set
 
 import bmesh
 import bpy
+import numpy as np
 from bpy.app.translations import pgettext as _
 
 from ..editors import segmentation
+from ..editors.dependency_index import VERTEX_GROUP_MAX_WEIGHT_CACHE
+from ..editors.meshes import MeshEditor
 from ..utilities import label_multiline
 
 
@@ -210,28 +212,25 @@ class RemoveUnusedVertexGroups(bpy.types.Operator):
         return context.window_manager.invoke_props_dialog(self)
 
     def execute(self, context: bpy.types.Context):
-        # pylint: disable=too-many-branches
+        start_secs = time.perf_counter()
+        removed_vertex_group_count = 0
+        mesh_count = 0
+
         obj: bpy.types.Object
         for obj in context.selected_objects:
             if obj.type != "MESH":
                 continue
 
-            used_vertex_group_indices: Set[int] = set()
+            mesh_count += 1
+            vertex_groups = obj.vertex_groups
+            if len(vertex_groups) == 0:
+                continue
 
             mesh: bpy.types.Mesh = obj.data
 
-            # Used groups from weight paint
-            vertex: bpy.types.MeshVertex
-            for vertex in mesh.vertices:
-                vertex_group: bpy.types.VertexGroupElement
-                for vertex_group in vertex.groups:
-                    if vertex_group.weight < self.weight_threshold:
-                        continue
-
-                    vertex_group_indices = vertex_group.group
-                    used_vertex_group_indices.add(vertex_group_indices)
-
-            vertex_groups = obj.vertex_groups
+            # Used groups from weight paint, read from the mesh as the groups are removed by them
+            max_weights = VERTEX_GROUP_MAX_WEIGHT_CACHE.get_max_weights(obj, use_cache=False)
+            used_vertex_group_indices: Set[int] = set(np.flatnonzero(max_weights >= max(self.weight_threshold, 0.0)).tolist())
 
             # Used groups from modifiers
             for modifier in obj.modifiers:
@@ -262,6 +261,16 @@ class RemoveUnusedVertexGroups(bpy.types.Operator):
                 if vertex_group.index in used_vertex_group_indices:
                     continue
                 vertex_groups.remove(vertex_group)
+                removed_vertex_group_count += 1
+
+        self.report(
+            {"INFO"},
+            _("Removed {removed_vertex_group_count} vertex groups from {mesh_count} meshes in {elapsed_secs:.2f} seconds.").format(
+                removed_vertex_group_count=removed_vertex_group_count,
+                mesh_count=mesh_count,
+                elapsed_secs=time.perf_counter() - start_secs,
+            ),
+        )
 
         return {"FINISHED"}
 
@@ -299,12 +308,14 @@ class SelectShapeKeyTargetVertices(bpy.types.Operator):
         key_block = shape_keys.key_blocks[obj.active_shape_key_index]
         relative_key_block = key_block.relative_key
 
+        displacements = np.linalg.norm(MeshEditor.get_shape_key_coordinates(key_block) - MeshEditor.get_shape_key_coordinates(relative_key_block), axis=1)
+
         mesh = bmesh.from_edit_mesh(obj_mesh)  # pylint: disable=assignment-from-no-return
         mesh.select_mode |= {"VERT"}
         bmesh_vertices = mesh.verts
-        for i, (origin, morph) in enumerate(zip(relative_key_block.data, key_block.data)):
-            if (origin.co - morph.co).length > distance_threshold:
-                bmesh_vertices[i].select_set(True)
+        bmesh_vertices.ensure_lookup_table()
+        for i in np.flatnonzero(displacements > distance_threshold).tolist():
+            bmesh_vertices[i].select_set(True)
 
         mesh.select_flush_mode()
 
@@ -329,24 +340,16 @@ class RemoveUnusedShapeKeys(bpy.types.Operator):
             if obj.type != "MESH":
                 continue
 
-            used_key_block_names = set()
-
-            distance_threshold = self.distance_threshold
-
             mesh = obj.data
             shape_keys = mesh.shape_keys
-            key_blocks = shape_keys.key_blocks
-
-            for key_block in key_blocks:
-                is_used = False
+            if shape_keys is None:
+                continue
 
-                for origin, morph in zip(mesh.vertices, key_block.data):
-                    if (origin.co - morph.co).length > distance_threshold:
-                        is_used = True
-                        break
+            key_blocks = shape_keys.key_blocks
 
-                if is_used:
-                    used_key_block_names.add(key_block.name)
+            mesh_editor = MeshEditor(obj)
+            key_block_name2max_displacement = mesh_editor.calc_shape_key_max_displacements(mesh_editor.get_vertex_coordinates())
+            used_key_block_names = {n for n, d in key_block_name2max_displacement.items() if d > self.distance_threshold}
 
             # Used shape keys from relative key
             for used_key_block_name in list(used_key_block_names):
@@ -365,15 +368,7 @@ class RemoveUnusedShapeKeys(bpy.types.Operator):
 
                     current_key = relative_key
 
-            for key_block in list(reversed(key_blocks)):
-                if key_block.name in used_key_block_names:
-                    continue
-
-                # setting the active shapekey
-                obj.active_shape_key_index = key_blocks.keys().index(key_block.name)
-
-                # delete it
-                bpy.ops.object.shape_key_remove()
+            mesh_editor.remove_shape_keys([k.name for k in key_blocks if k.name not in used_key_block_names])
 
         return {"FINISHED"}
 
@@ -479,12 +474,71 @@ class AutoSegmentationOperator(bpy.types.Operator):
     segmentation_vertex_color_random_seed: bpy.props.IntProperty(name="Segmentation Vertex Color Random Seed", default=0, min=0)
     segmentation_vertex_color_attribute_name: bpy.props.StringProperty(name="Segmentation Vertex Color Attribute Name", default="Segmentation")
 
+    _job: Optional[segmentation.AutoSegmentationJob] = None
+    _timer = None
+    _mesh_object_name: str = ""
+    _mesh_loop_count: int = 0
+    _mesh_polygon_count: int = 0
+    _previous_mode: str = "OBJECT"
+    _original_colors: Optional[np.ndarray] = None
+    _operator_start_secs: float = 0.0
+    _next_preview_secs: float = 0.0
+
+    PREVIEW_INTERVAL_SECS = 1.0
+    TIME_SLICE_SECS = 0.05
+
+    # the other events are blocked while the job runs, editing the mesh would invalidate the job
+    NAVIGATION_EVENT_TYPES = {
+        "MOUSEMOVE",
+        "INBETWEEN_MOUSEMOVE",
+        "MIDDLEMOUSE",
+        "WHEELUPMOUSE",
+        "WHEELDOWNMOUSE",
+        "WHEELINMOUSE",
+        "WHEELOUTMOUSE",
+        "TRACKPADPAN",
+        "TRACKPADZOOM",
+        "MOUSEROTATE",
+        "MOUSESMARTZOOM",
+        "NDOF_MOTION",
+        "NUMPAD_0",
+        "NUMPAD_1",
+        "NUMPAD_2",
+        "NUMPAD_3",
+        "NUMPAD_4",
+        "NUMPAD_5",
+        "NUMPAD_6",
+        "NUMPAD_7",
+        "NUMPAD_8",
+        "NUMPAD_9",
+        "NUMPAD_PERIOD",
+        "NUMPAD_PLUS",
+        "NUMPAD_MINUS",
+    }
+
     @classmethod
     def poll(cls, context: bpy.types.Context):
         if context.active_object is None:
             return False
         return context.active_object.type == "MESH"
 
+    def _create_job(self, mesh_object: bpy.types.Object) -> segmentation.AutoSegmentationJob:
+        return segmentation.AutoSegmentationJob(
+            mesh_object.data,
+            self.cost_threshold,
+            self.maximum_area_threshold,
+            self.minimum_area_threshold,
+            self.edge_length_factor,
+            self.face_angle_cost_factor,
+            self.perimeter_cost_factor,
+            self.vertex_group_weight_cost_factor,
+            self.vertex_group_change_cost_factor,
+            self.material_change_cost_factor,
+            self.edge_sharp_cost_factor,
+            self.edge_seam_cost_factor,
+            segmentation.get_ignore_vertex_group_indices(mesh_object),
+        )
+
     def execute(self, context: bpy.types.Context):
         mesh_object = context.active_object
 
@@ -493,80 +547,163 @@ class AutoSegmentationOperator(bpy.types.Operator):
             bpy.ops.object.mode_set(mode="OBJECT")
 
             operator_start_secs = time.perf_counter()
+            job = self._create_job(mesh_object)
+            segment_result = job.run()
+            auto_segment_secs = time.perf_counter() - operator_start_secs
 
-            target_bmesh: bmesh.types.BMesh = bmesh.new()
-            mesh: bpy.types.Mesh = mesh_object.data
-            target_bmesh.from_mesh(mesh, face_normals=False, vertex_normals=False)
-            color_layer = segmentation.get_color_layer(target_bmesh, self.segmentation_vertex_color_attribute_name)
-
-            auto_segment_start_secs = time.perf_counter()
-
-            segment_result = segmentation.auto_segment(
-                target_bmesh,
-                self.cost_threshold,
-                self.maximum_area_threshold,
-                self.minimum_area_threshold,
-                self.edge_length_factor,
-                self.face_angle_cost_factor,
-                self.perimeter_cost_factor,
-                self.vertex_group_weight_cost_factor,
-                self.vertex_group_change_cost_factor,
-                self.material_change_cost_factor,
-                self.edge_sharp_cost_factor,
-                self.edge_seam_cost_factor,
-                segmentation.get_ignore_vertex_group_indices(mesh_object),
-            )
+            self._apply_result(context, mesh_object, segment_result, operator_start_secs, auto_segment_secs, job.is_cached)
+
+        finally:
+            bpy.ops.object.mode_set(mode=previous_mode)
+
+        return {"FINISHED"}
 
-            auto_segment_end_secs = time.perf_counter()
+    def invoke(self, context: bpy.types.Context, event):
+        mesh_object = context.active_object
 
-            segments = segment_result.segments
+        self._mesh_object_name = mesh_object.name
+        self._mesh_loop_count = len(mesh_object.data.loops)
+        self._mesh_polygon_count = len(mesh_object.data.polygons)
+        self._previous_mode = mesh_object.mode
+        bpy.ops.object.mode_set(mode="OBJECT")
 
-            if len(segments) == 0:
-                self.report(
-                    {"WARNING"},
-                    _("There is no target segment; In Edit Mode, select the faces you want to paint."),
-                )
-                return {"FINISHED"}
+        self._operator_start_secs = time.perf_counter()
+        self._next_preview_secs = self._operator_start_secs + self.PREVIEW_INTERVAL_SECS
+        self._original_colors = self._get_colors(mesh_object.data)
 
-            max_segment_area = sys.float_info.min
-            min_segment_area = sys.float_info.max
-            total_tri_loops = 0
+        self._job = self._create_job(mesh_object)
+        self._job.start()
 
-            for segment in segments:
-                segment_area = segment.area
-                max_segment_area = max(max_segment_area, segment_area)
-                min_segment_area = min(min_segment_area, segment_area)
-                total_tri_loops += len(segment.tri_loop0s)
+        window_manager = context.window_manager
+        self._timer = window_manager.event_timer_add(self.TIME_SLICE_SECS, window=context.window)
+        window_manager.modal_handler_add(self)
+        context.workspace.status_text_set(_("Preparing segmentation... (Esc to cancel)"))
+        return {"RUNNING_MODAL"}
 
-            cost_sorted_segment_contacts = segment_result.remain_segment_contacts
-            max_cost_normalized = cost_sorted_segment_contacts[-1].cost_normalized if len(cost_sorted_segment_contacts) > 0 else 0
+    def _find_mesh_object(self) -> Optional[bpy.types.Object]:
+        """Return the segmented mesh object, None if it was removed, renamed or its topology was changed."""
+        mesh_object = bpy.data.objects.get(self._mesh_object_name)
+        if mesh_object is None or mesh_object.type != "MESH":
+            return None
 
-            segmentation.assign_vertex_colors(
-                segments,
-                color_layer,
-                self.segmentation_vertex_color_random_seed,
-            )
+        mesh: bpy.types.Mesh = mesh_object.data
+        if len(mesh.loops) != self._mesh_loop_count or len(mesh.polygons) != self._mesh_polygon_count:
+            return None
+
+        return mesh_object
+
+    def modal(self, context: bpy.types.Context, event):
+        mesh_object = self._find_mesh_object()
 
-            target_bmesh.to_mesh(mesh)
+        if mesh_object is None:
+            self._finish(context, bpy.data.objects.get(self._mesh_object_name))
+            self.report({"WARNING"}, _("Auto segmentation cancelled, the mesh was changed."))
+            return {"CANCELLED"}
 
-            segmentation.setup_materials(mesh, self.segmentation_vertex_color_attribute_name)
-            segmentation.setup_aovs(context.view_layer.aovs, self.segmentation_vertex_color_attribute_name)
+        if event.type == "ESC":
+            self._restore_colors(mesh_object.data)
+            self._finish(context, mesh_object)
+            self.report({"WARNING"}, _("Auto segmentation cancelled."))
+            return {"CANCELLED"}
 
-            operator_end_secs = time.perf_counter()
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"} if event.type in self.NAVIGATION_EVENT_TYPES else {"RUNNING_MODAL"}
 
+        was_prepared = self._job.is_prepared
+        try:
+            finished = self._job.update(self.TIME_SLICE_SECS)
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            self._restore_colors(mesh_object.data)
+            self._finish(context, mesh_object)
+            self.report({"ERROR"}, str(ex))
+            return {"CANCELLED"}
+
+        if not self._job.is_prepared:
+            return {"PASS_THROUGH"}
+
+        window_manager = context.window_manager
+        segment_merger = self._job.segment_merger
+        initial_contact_count = self._job.initial_contact_count
+        if not was_prepared:
+            window_manager.progress_begin(0, max(1, initial_contact_count))
+
+        if finished:
+            auto_segment_secs = time.perf_counter() - self._operator_start_secs
+            self._finish(context, mesh_object)
+            self._apply_result(context, mesh_object, self._job.result(), self._operator_start_secs, auto_segment_secs, self._job.is_cached)
+            return {"FINISHED"}
+
+        window_manager.progress_update(initial_contact_count - segment_merger.remain_contact_count)
+        context.workspace.status_text_set(
+            _("Segmenting: {remain_contact_count} contacts remaining, last merged cost {last_merged_cost:.3f} (Esc to cancel)").format(
+                remain_contact_count=segment_merger.remain_contact_count,
+                last_merged_cost=segment_merger.last_merged_cost,
+            )
+        )
+
+        if time.perf_counter() > self._next_preview_secs:
+            segmentation.write_vertex_colors(mesh_object.data, segment_merger.result(), self.segmentation_vertex_color_attribute_name, self.segmentation_vertex_color_random_seed)
+            self._next_preview_secs = time.perf_counter() + self.PREVIEW_INTERVAL_SECS
+
+        return {"PASS_THROUGH"}
+
+    def _finish(self, context: bpy.types.Context, mesh_object: Optional[bpy.types.Object]):
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self._timer)
+        window_manager.progress_end()
+        context.workspace.status_text_set(None)
+        if mesh_object is not None and mesh_object.mode != self._previous_mode:
+            with context.temp_override(active_object=mesh_object, object=mesh_object):
+                bpy.ops.object.mode_set(mode=self._previous_mode)
+
+    def _get_colors(self, mesh: bpy.types.Mesh) -> Optional[np.ndarray]:
+        color_attribute = mesh.color_attributes.get(self.segmentation_vertex_color_attribute_name)
+        if color_attribute is None:
+            return None
+
+        return segmentation.get_loop_colors(color_attribute)
+
+    def _restore_colors(self, mesh: bpy.types.Mesh):
+        color_attribute = mesh.color_attributes.get(self.segmentation_vertex_color_attribute_name)
+        if color_attribute is None:
+            return
+
+        if self._original_colors is None:
+            mesh.color_attributes.remove(color_attribute)
+        else:
+            segmentation.set_loop_colors(color_attribute, self._original_colors)
+        mesh.update()
+
+    def _apply_result(self, context: bpy.types.Context, mesh_object: bpy.types.Object, segment_result: segmentation.SegmentResult, operator_start_secs: float, auto_segment_secs: float, is_cached: bool):
+        mesh: bpy.types.Mesh = mesh_object.data
+        segment_count = len(segment_result.segments)
+
+        if segment_count == 0:
             self.report(
-                {"INFO"},
-                f"""contact: {len(cost_sorted_segment_contacts)}, cost last/max: {segment_result.last_merged_cost}/{max_cost_normalized}
-segment: {len(segments)}, area min/max: {min_segment_area}/{max_segment_area}
-loop: {total_tri_loops}
-operation: {operator_end_secs - operator_start_secs} secs, auto_segment {auto_segment_end_secs - auto_segment_start_secs} secs
-""",
+                {"WARNING"},
+                _("There is no target segment; In Edit Mode, select the faces you want to paint."),
             )
+            return
 
-        finally:
-            bpy.ops.object.mode_set(mode=previous_mode)
+        max_segment_area = float(segment_result.segment_areas.max())
+        min_segment_area = float(segment_result.segment_areas.min())
+        segmented_triangle_count = int((segment_result.tri_segments >= 0).sum())
 
-        return {"FINISHED"}
+        segmentation.write_vertex_colors(mesh, segment_result, self.segmentation_vertex_color_attribute_name, self.segmentation_vertex_color_random_seed)
+
+        segmentation.setup_materials(mesh, self.segmentation_vertex_color_attribute_name)
+        segmentation.setup_aovs(context.view_layer.aovs, self.segmentation_vertex_color_attribute_name)
+
+        operator_end_secs = time.perf_counter()
+
+        self.report(
+            {"INFO"},
+            f"""contact: {segment_result.remain_contact_count}, cost last: {segment_result.last_merged_cost}, cached: {is_cached}
+segment: {segment_count}, area min/max: {min_segment_area}/{max_segment_area}
+triangle: {segmented_triangle_count}
+operation: {operator_end_secs - operator_start_secs} secs, auto_segment {auto_segment_secs} secs
+""",
+        )
 
 
 class PaintSelectedFacesOperator(bpy.types.Operator):
@@ -2,17 +2,21 @@
 # This file is part of MMD Tools Append.
 
 
-import bisect
 import collections
 import dataclasses
-import itertools
+import hashlib
+import heapq
 import math
 import random
+import threading
+import time
 from typing import Dict, List, Optional, Set, Tuple
 
 import bmesh
 import bpy
-import mathutils
+import numpy as np
+
+from .meshes import VertexGroupWeightMatrix
 
 
 def _to_blender_color(uint8_color: int) -> float:
@@ -56,165 +60,606 @@ SEGMANTATION_COLORS: List[RGBA] = [
 # fmt: on
 
 
-SQRT_PI = math.sqrt(math.pi)
+def _setup_output_aov(node_tree: bpy.types.NodeTree, segmentation_output_aov_name: str):
+    nodes = node_tree.nodes
+    segmentation_output_aov_node: Optional[bpy.types.ShaderNodeOutputAOV] = next((n for n in nodes if n.type == "OUTPUT_AOV" and n.name == segmentation_output_aov_name), None)
+    if segmentation_output_aov_node is None:
+        segmentation_output_aov_node = nodes.new(type=bpy.types.ShaderNodeOutputAOV.__name__)
+        segmentation_output_aov_node.name = segmentation_output_aov_name
+        segmentation_output_aov_node.location = (300, 600)
+
+    if len(segmentation_output_aov_node.inputs["Color"].links) > 0:
+        return
+
+    segmentation_vertex_color_node: bpy.types.ShaderNodeVertexColor = nodes.new(type=bpy.types.ShaderNodeVertexColor.__name__)
+    segmentation_vertex_color_node.layer_name = segmentation_output_aov_name
+    segmentation_vertex_color_node.location = (0, 600)
+    node_tree.links.new(segmentation_vertex_color_node.outputs[0], segmentation_output_aov_node.inputs[0])
+
 
+TriangleIndex = int
+SegmentIndex = int
+SegmentContactIndex = int
 
-def _area_to_circumference(area: float) -> float:
-    return math.sqrt(area) / SQRT_PI
 
+def _foreach_get(collection: bpy.types.bpy_prop_collection, attribute: str, dtype: type, width: int = 1) -> np.ndarray:
+    values = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attribute, values)
+    return values if width == 1 else values.reshape(-1, width)
 
-TriLoopIndex = int
-LoopPairId = int
-VertexPairId = int
-VertexIndex = int
-VertexGroupPairId = int
-SegmentContactId = int
-SegmentPairId = int
 
+def _to_pair_keys(indices0: np.ndarray, indices1: np.ndarray, count: int) -> np.ndarray:
+    return np.minimum(indices0, indices1).astype(np.int64) * count + np.maximum(indices0, indices1)
 
-@dataclasses.dataclass
-class Segment:
-    index: int
-    area: float = 0.0
-    perimeter: float = 0.0
-    non_contact_perimeter: float = 0.0
-    tri_loop0s: Set[bmesh.types.BMLoop] = dataclasses.field(default_factory=set)
-    segment_contact_ids: Set[SegmentContactId] = dataclasses.field(default_factory=set)
 
-    def __hash__(self):
-        return self.index
+def _calc_perimeter_costs(areas0, perimeters0, areas1, perimeters1, lengths):
+    """Return how much the merged segment is less round than the mean of the two segments.
 
-    def __eq__(self, other):
-        return self.index == other.index
+    Works on both scalars and arrays, a degenerated segment costs 0.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # the ratio of a perimeter to the circumference of the circle with the same area, the pi terms cancel out
+        mean_ratios = (areas0 + areas1) / (areas0 * np.sqrt(areas0) / perimeters0 + areas1 * np.sqrt(areas1) / perimeters1)
+        merged_ratios = (perimeters0 + perimeters1 - 2 * lengths) / np.sqrt(areas0 + areas1)
+        return np.nan_to_num(np.maximum(merged_ratios / mean_ratios - 1, 0), nan=0.0, posinf=0.0)
 
 
-@dataclasses.dataclass
-class SegmentContact:
-    index: SegmentContactId
-    cost: float
-    cost_normalized: float
-    length: float
-    segment0: Segment
-    segment1: Segment
-
-    def segment_contacts(self, segment: Segment) -> bool:
-        return self.segment0 == segment or self.segment1 == segment
-
-    def segment_replace(self, src: Segment, dst: Segment) -> bool:
-        if self.segment0 == src:
-            self.segment0 = dst
-            if self.segment1 == src:
-                self.segment1 = dst
-            return True
-        if self.segment1 == src:
-            self.segment1 = dst
-            return True
-        return False
+def _normalize_costs(costs, lengths, contact_length_factor: float):
+    if contact_length_factor <= 0:
+        return costs
 
-    def __hash__(self):
-        return self.index
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.nan_to_num(costs / (lengths * contact_length_factor), nan=0.0, posinf=0.0)
 
-    def __eq__(self, other):
-        return self.index == other.index
 
-    def calc_perimeter_cost(self):
-        segment0 = self.segment0
-        segment0_perimeter = segment0.perimeter
-        segment0_area = segment0.area
+@dataclasses.dataclass
+class SegmentationMesh:
+    """Array snapshot of the mesh data used by the segmentation."""
+
+    vertex_coordinates: np.ndarray
+    edge_vertices: np.ndarray
+    edge_sharps: np.ndarray
+    edge_seams: np.ndarray
+    polygon_selects: np.ndarray
+    polygon_material_indices: np.ndarray
+    polygon_normals: np.ndarray
+    tri_vertices: np.ndarray
+    tri_loops: np.ndarray
+    tri_polygons: np.ndarray
+    tri_areas: np.ndarray
+    vertex_group_weight_matrix: VertexGroupWeightMatrix
+
+    @staticmethod
+    def from_mesh(mesh: bpy.types.Mesh, ignore_vertex_group_indices: Set[int]) -> "SegmentationMesh":
+        loop_triangles = mesh.loop_triangles
+        return SegmentationMesh(
+            _foreach_get(mesh.vertices, "co", np.float64, 3),
+            _foreach_get(mesh.edges, "vertices", np.int64, 2),
+            _foreach_get(mesh.edges, "use_edge_sharp", bool),
+            _foreach_get(mesh.edges, "use_seam", bool),
+            _foreach_get(mesh.polygons, "select", bool),
+            _foreach_get(mesh.polygons, "material_index", np.int64),
+            _foreach_get(mesh.polygons, "normal", np.float64, 3),
+            _foreach_get(loop_triangles, "vertices", np.int64, 3),
+            _foreach_get(loop_triangles, "loops", np.int64, 3),
+            _foreach_get(loop_triangles, "polygon_index", np.int64),
+            _foreach_get(loop_triangles, "area", np.float64),
+            VertexGroupWeightMatrix.from_mesh(mesh, ignore_vertex_group_indices),
+        )
+
+    def calc_hash(self) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        for field in dataclasses.fields(self):
+            value = getattr(self, field.name)
+            arrays = (value.offsets, value.groups, value.weights) if isinstance(value, VertexGroupWeightMatrix) else (value,)
+            for array in arrays:
+                digest.update(str(array.shape).encode())
+                digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.digest()
 
-        segment1 = self.segment1
-        segment1_perimeter = segment1.perimeter
-        segment1_area = segment1.area
 
-        mean_ratio = (segment0_area + segment1_area) / (segment0_area / (segment0_perimeter / _area_to_circumference(segment0_area)) + segment1_area / (segment1_perimeter / _area_to_circumference(segment1_area)))
-        # Code with the same meaning as below.
-        # mean_ratio = statistics.harmonic_mean(
-        #     (
-        #         segment0_perimeter/_area_to_circumference(segment0_area),
-        #         segment1_perimeter/_area_to_circumference(segment1_area),
-        #     ),
-        #     (
-        #         segment0_area,
-        #         segment1_area,
-        #     )
-        # )
+@dataclasses.dataclass
+class SegmentGraph:
+    """Initial segments and their contacts, segments are indexed by their root triangle.
 
-        merged_ratio = (segment0_perimeter + segment1_perimeter - 2 * self.length) / _area_to_circumference(segment0_area + segment1_area)
-        result = max(merged_ratio / mean_ratio - 1, 0)
+    Each selected face starts as one segment, tri_segments is -1 for the triangles of the unselected faces.
+    """
 
-        return result
+    tri_loops: np.ndarray
+    tri_segments: np.ndarray
+    segment_areas: np.ndarray
+    segment_perimeters: np.ndarray
+    segment_non_contact_perimeters: np.ndarray
+    contact_segments: np.ndarray
+    contact_lengths: np.ndarray
+    contact_costs: np.ndarray
+
+
+def build_segment_graph(
+    segmentation_mesh: SegmentationMesh,
+    face_angle_cost_factor: float,
+    vertex_group_weight_cost_factor: float,
+    vertex_group_change_cost_factor: float,
+    material_change_cost_factor: float,
+    edge_sharp_cost_factor: float,
+    edge_seam_cost_factor: float,
+) -> SegmentGraph:
+    m = segmentation_mesh
+    vertex_count = len(m.vertex_coordinates)
+    tri_count = len(m.tri_vertices)
+
+    # the first triangle of each face is the root of the face segment
+    polygon_indices, polygon_first_tris = np.unique(m.tri_polygons, return_index=True)
+    polygon_roots = np.full(len(m.polygon_selects), -1, dtype=np.int64)
+    polygon_roots[polygon_indices] = polygon_first_tris
+    tri_selects = m.polygon_selects[m.tri_polygons] if tri_count > 0 else np.zeros(0, dtype=bool)
+    tri_segments = np.where(tri_selects, polygon_roots[m.tri_polygons], -1)
+
+    # half edges of the selected triangles: (v0, v1), (v1, v2), (v2, v0) and their opposite vertices
+    selected_tris = np.flatnonzero(tri_selects)
+    selected_tri_vertices = m.tri_vertices[selected_tris]
+    half_edge_vertices0 = selected_tri_vertices.ravel()
+    half_edge_vertices1 = np.roll(selected_tri_vertices, -1, axis=1).ravel()
+    half_edge_opposites = np.roll(selected_tri_vertices, -2, axis=1).ravel()
+    half_edge_tris = np.repeat(selected_tris, 3)
+    half_edge_segments = tri_segments[half_edge_tris]
+    half_edge_keys = _to_pair_keys(half_edge_vertices0, half_edge_vertices1, vertex_count)
+    half_edge_lengths = np.linalg.norm(m.vertex_coordinates[half_edge_vertices0] - m.vertex_coordinates[half_edge_vertices1], axis=1)
+
+    # pair the half edges sharing an edge, an edge shared by more than two triangles makes all of its pairs
+    sorted_half_edges = np.argsort(half_edge_keys, kind="stable")
+    sorted_keys = half_edge_keys[sorted_half_edges]
+    pairs0: List[np.ndarray] = []
+    pairs1: List[np.ndarray] = []
+    for distance in range(1, len(sorted_keys)):
+        is_paired = sorted_keys[:-distance] == sorted_keys[distance:]
+        if not is_paired.any():
+            break
+        pairs0.append(sorted_half_edges[:-distance][is_paired])
+        pairs1.append(sorted_half_edges[distance:][is_paired])
+    half_edges0 = np.concatenate(pairs0) if pairs0 else np.zeros(0, dtype=np.int64)
+    half_edges1 = np.concatenate(pairs1) if pairs1 else np.zeros(0, dtype=np.int64)
+
+    segments0 = half_edge_segments[half_edges0]
+    segments1 = half_edge_segments[half_edges1]
+    is_inner = segments0 == segments1
+
+    # the inner edges of the faces are not a part of the perimeters
+    segment_perimeters = np.bincount(half_edge_segments, weights=half_edge_lengths, minlength=tri_count) - 2 * np.bincount(segments0[is_inner], weights=half_edge_lengths[half_edges0[is_inner]], minlength=tri_count)
+    segment_areas = np.bincount(tri_segments[selected_tris], weights=m.tri_areas[selected_tris], minlength=tri_count)
+
+    half_edges0 = half_edges0[~is_inner]
+    half_edges1 = half_edges1[~is_inner]
+    segments0 = segments0[~is_inner]
+    segments1 = segments1[~is_inner]
+
+    lengths = half_edge_lengths[half_edges0]
+    costs = np.zeros(len(half_edges0), dtype=np.float64)
+
+    if edge_sharp_cost_factor != 0 or edge_seam_cost_factor != 0:
+        edge_keys = _to_pair_keys(m.edge_vertices[:, 0], m.edge_vertices[:, 1], vertex_count)
+        sorted_edges = np.argsort(edge_keys)
+        positions = np.minimum(np.searchsorted(edge_keys[sorted_edges], half_edge_keys[half_edges0]), len(sorted_edges) - 1)
+        edges = sorted_edges[positions]
+        is_found = edge_keys[edges] == half_edge_keys[half_edges0]
+
+        # cost:sharp = 1:1
+        costs += edge_sharp_cost_factor * lengths * (m.edge_sharps[edges] & is_found)
+
+        # cost:seam = 1:1
+        costs += edge_seam_cost_factor * lengths * (m.edge_seams[edges] & is_found)
+
+    polygons0 = m.tri_polygons[half_edge_tris[half_edges0]]
+    polygons1 = m.tri_polygons[half_edge_tris[half_edges1]]
+
+    if face_angle_cost_factor != 0:
+        # cost:angle = 1:90 degrees
+        cosines = np.einsum("ij,ij->i", m.polygon_normals[polygons0], m.polygon_normals[polygons1])
+        costs += face_angle_cost_factor * lengths * (2 / math.pi) * np.arccos(np.clip(cosines, -1.0, 1.0))
+
+    if material_change_cost_factor != 0:
+        # cost:material = 1:1
+        costs += material_change_cost_factor * lengths * (m.polygon_material_indices[polygons0] != m.polygon_material_indices[polygons1])
+
+    if vertex_group_weight_cost_factor != 0:
+        # cost:vertex weight = 1:1
+        vertices0 = half_edge_vertices0[half_edges0]
+        vertices1 = half_edge_vertices1[half_edges0]
+        this_opposites = half_edge_opposites[half_edges0]
+        that_opposites = half_edge_opposites[half_edges1]
+        distances = m.vertex_group_weight_matrix.calc_distances(
+            np.concatenate((vertices0, vertices1, vertices0, vertices1)),
+            np.concatenate((this_opposites, this_opposites, that_opposites, that_opposites)),
+        )
+        costs += vertex_group_weight_cost_factor * lengths * 0.25 * distances.reshape(4, -1).sum(axis=0)
+
+    if vertex_group_change_cost_factor != 0:
+        # cost:vertex group change = 1:1
+        tri_heaviest_groups = np.full(tri_count, -1, dtype=np.int64)
+        tri_heaviest_groups[selected_tris] = m.vertex_group_weight_matrix.calc_heaviest_groups(selected_tri_vertices)
+        costs += vertex_group_change_cost_factor * lengths * (tri_heaviest_groups[half_edge_tris[half_edges0]] != tri_heaviest_groups[half_edge_tris[half_edges1]])
+
+    # one contact per segment pair
+    contact_keys, contact_firsts, contact_inverses = np.unique(_to_pair_keys(segments0, segments1, tri_count), return_index=True, return_inverse=True)
+    contact_segments = np.stack((np.minimum(segments0, segments1)[contact_firsts], np.maximum(segments0, segments1)[contact_firsts]), axis=1)
+    contact_lengths = np.bincount(contact_inverses, weights=lengths, minlength=len(contact_keys))
+    contact_costs = np.bincount(contact_inverses, weights=costs, minlength=len(contact_keys))
+
+    segment_contact_lengths = np.bincount(contact_segments[:, 0], weights=contact_lengths, minlength=tri_count) + np.bincount(contact_segments[:, 1], weights=contact_lengths, minlength=tri_count)
+
+    return SegmentGraph(
+        m.tri_loops,
+        tri_segments,
+        segment_areas,
+        segment_perimeters,
+        segment_perimeters - segment_contact_lengths,
+        contact_segments,
+        contact_lengths,
+        contact_costs,
+    )
 
 
 @dataclasses.dataclass
 class SegmentResult:
-    segments: Set[Segment]
-    remain_segment_contacts: List[SegmentContact]
+    tri_loops: np.ndarray
+    tri_segments: np.ndarray
+    """the segment of each triangle, -1 for the triangles of the unselected faces"""
+    segments: np.ndarray
+    segment_areas: np.ndarray
+    remain_contact_count: int
     last_merged_cost: float
-    tri_loops: List[bmesh.types.BMLoop]
 
 
-def _to_loop_pair_id(loop0: bmesh.types.BMLoop, loop1: bmesh.types.BMLoop, loop_pair_shift: int) -> LoopPairId:
-    loop0_index = loop0.index
-    loop1_index = loop1.index
-    if loop0_index > loop1_index:
-        return loop1_index + (loop0_index << loop_pair_shift)
-    return loop0_index + (loop1_index << loop_pair_shift)
+class SegmentMerger:
+    """Merge the cheapest segment contacts first while the cost is within the threshold.
+
+    The segments are a union-find forest over the triangles and the contacts are kept in arrays,
+    the contacts are picked from a lazy deletion heap.
+
+    The merges are recorded in order as a dendrogram. The merge order does not depend on the cost threshold,
+    so the segments of a lower threshold are a cut of the recorded merges.
+    """
+
+    def __init__(
+        self,
+        segment_graph: SegmentGraph,
+        maximum_area_threshold: float,
+        minimum_area_threshold: float,
+        contact_length_factor: float,
+        perimeter_cost_factor: float,
+    ):
+        self.segment_graph = segment_graph
+        self.maximum_area_threshold = maximum_area_threshold
+        self.minimum_area_threshold = minimum_area_threshold
+        self.contact_length_factor = contact_length_factor
+        self.perimeter_cost_factor = perimeter_cost_factor
+
+        g = segment_graph
+        self.segment_areas = g.segment_areas.copy()
+        self.segment_perimeters = g.segment_perimeters.copy()
+        self.segment_non_contact_perimeters = g.segment_non_contact_perimeters.copy()
+
+        self.contact_segments = g.contact_segments.copy()
+        self.contact_lengths = g.contact_lengths.copy()
+        self.contact_costs = g.contact_costs.copy()
+        self.contact_costs_normalized = self._calc_costs_normalized(self.contact_costs, self.contact_lengths, self.contact_segments[:, 0], self.contact_segments[:, 1])
+        self.contact_alives = np.ones(len(self.contact_costs), dtype=bool)
+        self.remain_contact_count = len(self.contact_costs)
+
+        self.last_merged_cost = 0.0
+        self.max_merged_cost = -math.inf
+
+        # dendrogram
+        self.merge_dst_segments: List[SegmentIndex] = []
+        self.merge_src_segments: List[SegmentIndex] = []
+        self.merge_costs: List[float] = []
+        self.merge_remain_contact_counts: List[int] = []
+
+        self._segment_contacts: Dict[SegmentIndex, Set[SegmentContactIndex]] = collections.defaultdict(set)
+        for contact_index, (segment0, segment1) in enumerate(self.contact_segments.tolist()):
+            self._segment_contacts[segment0].add(contact_index)
+            self._segment_contacts[segment1].add(contact_index)
+
+        # an entry (cost_normalized, order, contact_index) is alive while its order matches,
+        # updated contacts go before the contacts of the same cost
+        self._contact_orders: List[Optional[int]] = list(range(len(self.contact_costs)))
+        self._cost_heap: List[Tuple[float, int, SegmentContactIndex]] = list(zip(self.contact_costs_normalized.tolist(), self._contact_orders, self._contact_orders))
+        heapq.heapify(self._cost_heap)
+        self._next_update_order = 0
+
+    def _calc_costs_normalized(self, costs, lengths, segments0, segments1):
+        costs_normalized = _normalize_costs(costs, lengths, self.contact_length_factor)
+        if self.perimeter_cost_factor == 0:
+            return costs_normalized
+
+        return costs_normalized + self.perimeter_cost_factor * _calc_perimeter_costs(
+            self.segment_areas[segments0],
+            self.segment_perimeters[segments0],
+            self.segment_areas[segments1],
+            self.segment_perimeters[segments1],
+            lengths,
+        )
+
+    def _push_contact(self, contact_index: SegmentContactIndex):
+        self._next_update_order -= 1
+        self._contact_orders[contact_index] = self._next_update_order
+        heapq.heappush(self._cost_heap, (float(self.contact_costs_normalized[contact_index]), self._next_update_order, contact_index))
+
+    def _remove_contact(self, contact_index: SegmentContactIndex):
+        self.contact_alives[contact_index] = False
+        self._contact_orders[contact_index] = None
+        self.remain_contact_count -= 1
+        for segment in self.contact_segments[contact_index].tolist():
+            contacts = self._segment_contacts.get(segment)
+            if contacts is not None:
+                contacts.discard(contact_index)
+
+    def merge(self, cost_threshold: float, deadline: Optional[float] = None) -> bool:
+        """Merge the contacts within the cost threshold, return True when no more contact can be merged.
+
+        With a deadline of time.perf_counter(), return False when the time is up.
+        """
+        if self.max_merged_cost > cost_threshold:
+            # already merged over the threshold, cut the dendrogram
+            return True
 
+        merge_count = 0
+        cost_heap = self._cost_heap
+        while cost_heap:
+            if deadline is not None and merge_count % 64 == 63 and time.perf_counter() > deadline:
+                return False
 
-def _to_vertex_pair_id(vert0: bmesh.types.BMVert, vert1: bmesh.types.BMVert, vertex_pair_shift: int) -> VertexPairId:
-    vert0_index = vert0.index
-    vert1_index = vert1.index
-    if vert0_index > vert1_index:
-        return vert1_index + (vert0_index << vertex_pair_shift)
-    return vert0_index + (vert1_index << vertex_pair_shift)
+            entry = heapq.heappop(cost_heap)
+            cost, order, contact_index = entry
+            if self._contact_orders[contact_index] != order:
+                continue
 
+            if cost > cost_threshold:
+                heapq.heappush(cost_heap, entry)
+                return True
+
+            # contacts over the area thresholds stay unmerged, the segment areas only grow
+            self._contact_orders[contact_index] = None
+            dst_segment, src_segment = self.contact_segments[contact_index].tolist()
+            src_segment_area = self.segment_areas[src_segment]
+            if src_segment_area > self.minimum_area_threshold and self.segment_areas[dst_segment] + src_segment_area > self.maximum_area_threshold:
+                continue
 
-def _to_segment_pair_id(segment0: Segment, segment1: Segment, segment_pair_shift: int) -> SegmentPairId:
-    segment0_index = segment0.index
-    segment1_index = segment1.index
-    if segment0_index > segment1_index:
-        return segment1_index + (segment0_index << segment_pair_shift)
-    return segment0_index + (segment1_index << segment_pair_shift)
+            self.last_merged_cost = cost
+            self.max_merged_cost = max(self.max_merged_cost, cost)
+            self._merge_segments(contact_index, dst_segment, src_segment)
+            merge_count += 1
 
+            self.merge_dst_segments.append(dst_segment)
+            self.merge_src_segments.append(src_segment)
+            self.merge_costs.append(cost)
+            self.merge_remain_contact_counts.append(self.remain_contact_count)
 
-def _to_tri_loop_index(loop: bmesh.types.BMLoop) -> TriLoopIndex:
-    li0 = loop.index
-    li1 = loop.link_loop_next.index
-    li2 = loop.link_loop_prev.index
+        return True
 
-    # return min(i0, i1, i2)
-    if li0 > li1:
-        if li1 > li2:
-            return li2
-        return li1
-    if li0 > li2:
-        return li2
-    return li0
+    def _merge_segments(self, contact_index: SegmentContactIndex, dst_segment: SegmentIndex, src_segment: SegmentIndex):
+        self.segment_areas[dst_segment] += self.segment_areas[src_segment]
+        self.segment_non_contact_perimeters[dst_segment] += self.segment_non_contact_perimeters[src_segment]
 
+        self._remove_contact(contact_index)
 
-def _get_cost_normalized(segment_contact: SegmentContact) -> float:
-    return segment_contact.cost_normalized
+        contact_segments = self.contact_segments
+        dst_contacts = self._segment_contacts[dst_segment]
+        for src_contact_index in self._segment_contacts.pop(src_segment, ()):
+            if contact_segments[src_contact_index, 0] == src_segment:
+                contact_segments[src_contact_index, 0] = dst_segment
+            if contact_segments[src_contact_index, 1] == src_segment:
+                contact_segments[src_contact_index, 1] = dst_segment
 
+            if contact_segments[src_contact_index, 0] == contact_segments[src_contact_index, 1]:
+                self._remove_contact(src_contact_index)
+            else:
+                dst_contacts.add(src_contact_index)
 
-def _setup_output_aov(node_tree: bpy.types.NodeTree, segmentation_output_aov_name: str):
-    nodes = node_tree.nodes
-    segmentation_output_aov_node: Optional[bpy.types.ShaderNodeOutputAOV] = next((n for n in nodes if n.type == "OUTPUT_AOV" and n.name == segmentation_output_aov_name), None)
-    if segmentation_output_aov_node is None:
-        segmentation_output_aov_node = nodes.new(type=bpy.types.ShaderNodeOutputAOV.__name__)
-        segmentation_output_aov_node.name = segmentation_output_aov_name
-        segmentation_output_aov_node.location = (300, 600)
+        if len(dst_contacts) == 0:
+            # dst_segment is isolated
+            del self._segment_contacts[dst_segment]
+            return
 
-    if len(segmentation_output_aov_node.inputs["Color"].links) > 0:
-        return
+        if self.perimeter_cost_factor != 0:
+            self.segment_perimeters[dst_segment] = self.segment_non_contact_perimeters[dst_segment] + self.contact_lengths[list(dst_contacts)].sum()
 
-    segmentation_vertex_color_node: bpy.types.ShaderNodeVertexColor = nodes.new(type=bpy.types.ShaderNodeVertexColor.__name__)
-    segmentation_vertex_color_node.layer_name = segmentation_output_aov_name
-    segmentation_vertex_color_node.location = (0, 600)
-    node_tree.links.new(segmentation_vertex_color_node.outputs[0], segmentation_output_aov_node.inputs[0])
+        # merge the contacts to the same segment
+        other_segment2contact_index: Dict[SegmentIndex, SegmentContactIndex] = {}
+        merged_contact_indices: Set[SegmentContactIndex] = set()
+        for dst_contact_index in list(dst_contacts):
+            segment0, segment1 = contact_segments[dst_contact_index].tolist()
+            merged_contact_index = other_segment2contact_index.setdefault(segment1 if segment0 == dst_segment else segment0, dst_contact_index)
+            if merged_contact_index == dst_contact_index:
+                continue
+
+            self.contact_costs[merged_contact_index] += self.contact_costs[dst_contact_index]
+            self.contact_lengths[merged_contact_index] += self.contact_lengths[dst_contact_index]
+            self._remove_contact(dst_contact_index)
+            merged_contact_indices.add(merged_contact_index)
+
+        # update the cost and then reorder the merged contacts
+        for merged_contact_index in merged_contact_indices:
+            segment0, segment1 = contact_segments[merged_contact_index].tolist()
+            self.contact_costs_normalized[merged_contact_index] = self._calc_costs_normalized(
+                self.contact_costs[merged_contact_index],
+                self.contact_lengths[merged_contact_index],
+                segment0,
+                segment1,
+            )
+            self._push_contact(merged_contact_index)
+
+    def result(self, cost_threshold: Optional[float] = None) -> SegmentResult:
+        """Return the segments after the merges within the cost threshold, or after all merges so far if None."""
+        merge_count = len(self.merge_costs)
+        if cost_threshold is not None:
+            over_merge_indices = np.flatnonzero(np.array(self.merge_costs, dtype=np.float64) > cost_threshold)
+            if len(over_merge_indices) > 0:
+                merge_count = int(over_merge_indices[0])
+
+        g = self.segment_graph
+        roots = np.arange(len(g.tri_segments), dtype=np.int64)
+        roots[self.merge_src_segments[:merge_count]] = self.merge_dst_segments[:merge_count]
+        while True:
+            parents = roots[roots]
+            if np.array_equal(parents, roots):
+                break
+            roots = parents
+
+        initial_segments = np.unique(g.tri_segments[g.tri_segments >= 0])
+        tri_segments = np.where(g.tri_segments >= 0, roots[np.maximum(g.tri_segments, 0)], -1)
+        segments = np.unique(roots[initial_segments])
+        segment_areas = np.bincount(roots[initial_segments], weights=g.segment_areas[initial_segments], minlength=len(roots))
+
+        return SegmentResult(
+            g.tri_loops,
+            tri_segments,
+            segments,
+            segment_areas[segments],
+            self.merge_remain_contact_counts[merge_count - 1] if merge_count > 0 else len(g.contact_costs),
+            self.merge_costs[merge_count - 1] if merge_count > 0 else 0.0,
+        )
+
+
+_SEGMENT_MERGER_CACHE_SIZE = 4
+_SEGMENT_MERGER_CACHE: "collections.OrderedDict[Tuple, SegmentMerger]" = collections.OrderedDict()
+
+
+def _get_cached_segment_merger(cache_key: Tuple) -> Optional[SegmentMerger]:
+    segment_merger = _SEGMENT_MERGER_CACHE.get(cache_key)
+    if segment_merger is not None:
+        _SEGMENT_MERGER_CACHE.move_to_end(cache_key)
+    return segment_merger
+
+
+def _cache_segment_merger(cache_key: Tuple, segment_merger: SegmentMerger):
+    _SEGMENT_MERGER_CACHE[cache_key] = segment_merger
+    _SEGMENT_MERGER_CACHE.move_to_end(cache_key)
+    while len(_SEGMENT_MERGER_CACHE) > _SEGMENT_MERGER_CACHE_SIZE:
+        _SEGMENT_MERGER_CACHE.popitem(last=False)
+
+
+def clear_segmentation_cache():
+    _SEGMENT_MERGER_CACHE.clear()
+
+
+class AutoSegmentationJob:
+    """Segment a mesh step by step.
+
+    The mesh snapshot is taken on the main thread, the segment graph is built on a worker thread,
+    and then the contacts are merged in time slices by update().
+    The merger is cached by the mesh data hash and the parameters except the cost threshold,
+    so a run with another threshold resumes or cuts the cached merges.
+    """
+
+    def __init__(
+        self,
+        mesh: bpy.types.Mesh,
+        cost_threshold: float,
+        maximum_area_threshold: float,
+        minimum_area_threshold: float,
+        contact_length_factor: float,
+        face_angle_cost_factor: float,
+        perimeter_cost_factor: float,
+        vertex_group_weight_cost_factor: float,
+        vertex_group_change_cost_factor: float,
+        material_change_cost_factor: float,
+        edge_sharp_cost_factor: float,
+        edge_seam_cost_factor: float,
+        ignore_vertex_group_indices: Set[int],
+    ):
+        self.segmentation_mesh = SegmentationMesh.from_mesh(mesh, ignore_vertex_group_indices)
+        self.cost_threshold = cost_threshold
+        self.maximum_area_threshold = maximum_area_threshold
+        self.minimum_area_threshold = minimum_area_threshold
+        self.contact_length_factor = contact_length_factor
+        self.face_angle_cost_factor = face_angle_cost_factor
+        self.perimeter_cost_factor = perimeter_cost_factor
+        self.vertex_group_weight_cost_factor = vertex_group_weight_cost_factor
+        self.vertex_group_change_cost_factor = vertex_group_change_cost_factor
+        self.material_change_cost_factor = material_change_cost_factor
+        self.edge_sharp_cost_factor = edge_sharp_cost_factor
+        self.edge_seam_cost_factor = edge_seam_cost_factor
+
+        self.cache_key = (
+            self.segmentation_mesh.calc_hash(),
+            maximum_area_threshold,
+            minimum_area_threshold,
+            contact_length_factor,
+            face_angle_cost_factor,
+            perimeter_cost_factor,
+            vertex_group_weight_cost_factor,
+            vertex_group_change_cost_factor,
+            material_change_cost_factor,
+            edge_sharp_cost_factor,
+            edge_seam_cost_factor,
+        )
+        self.segment_merger: Optional[SegmentMerger] = _get_cached_segment_merger(self.cache_key)
+        self.is_cached = self.segment_merger is not None
+        self.initial_contact_count = len(self.segment_merger.segment_graph.contact_costs) if self.is_cached else 0
+        self.is_finished = False
+
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[Exception] = None
+
+    def _prepare(self):
+        try:
+            segment_graph = build_segment_graph(
+                self.segmentation_mesh,
+                self.face_angle_cost_factor,
+                self.vertex_group_weight_cost_factor,
+                self.vertex_group_change_cost_factor,
+                self.material_change_cost_factor,
+                self.edge_sharp_cost_factor,
+                self.edge_seam_cost_factor,
+            )
+            self.initial_contact_count = len(segment_graph.contact_costs)
+            self.segment_merger = SegmentMerger(segment_graph, self.maximum_area_threshold, self.minimum_area_threshold, self.contact_length_factor, self.perimeter_cost_factor)
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            self._error = ex
+
+    def start(self):
+        if self.is_cached:
+            return
+
+        self._thread = threading.Thread(target=self._prepare, daemon=True)
+        self._thread.start()
+
+    @property
+    def is_prepared(self) -> bool:
+        if self._thread is not None:
+            return not self._thread.is_alive()
+        return self.segment_merger is not None
+
+    def update(self, time_budget: float) -> bool:
+        """Merge the contacts for the time budget in seconds, return True when the segmentation is finished."""
+        if not self.is_prepared:
+            return False
+
+        if self._error is not None:
+            raise self._error
+
+        _cache_segment_merger(self.cache_key, self.segment_merger)
+        self.is_finished = self.segment_merger.merge(self.cost_threshold, time.perf_counter() + time_budget)
+        return self.is_finished
+
+    def run(self) -> SegmentResult:
+        if not self.is_cached:
+            self._prepare()
+            if self._error is not None:
+                raise self._error
+
+        _cache_segment_merger(self.cache_key, self.segment_merger)
+        self.segment_merger.merge(self.cost_threshold)
+        self.is_finished = True
+        return self.result()
+
+    def result(self) -> SegmentResult:
+        return self.segment_merger.result(self.cost_threshold)
 
 
 def auto_segment(
-    target_bmesh: bmesh.types.BMesh,
+    mesh: bpy.types.Mesh,
     cost_threshold: float,
     maximum_area_threshold: float,
     minimum_area_threshold: float,
@@ -228,8 +673,11 @@ def auto_segment(
     edge_seam_cost_factor: float,
     ignore_vertex_group_indices: Set[int],
 ) -> SegmentResult:
-    tri_loops = target_bmesh.calc_loop_triangles()
-    sci2segment_contacts, segment_count = _calc_segment_contacts(
+    return AutoSegmentationJob(
+        mesh,
+        cost_threshold,
+        maximum_area_threshold,
+        minimum_area_threshold,
         contact_length_factor,
         face_angle_cost_factor,
         perimeter_cost_factor,
@@ -238,165 +686,121 @@ def auto_segment(
         material_change_cost_factor,
         edge_sharp_cost_factor,
         edge_seam_cost_factor,
-        _calc_vi2vgi2weights(target_bmesh, ignore_vertex_group_indices),
-        target_bmesh,
-        tri_loops,
-    )
+        ignore_vertex_group_indices,
+    ).run()
 
-    if segment_count == 0:
-        return SegmentResult(set(), [], 0.0, [])
 
-    segment_pair_shift = int(math.log2(segment_count) / 2 + 1)
+def _get_segmentation_colors(segmentation_vertex_color_random_seed: int) -> List[RGBA]:
+    segmantation_colors = SEGMANTATION_COLORS.copy()
 
-    cost_sorted_segment_contacts = sorted(sci2segment_contacts.values(), key=_get_cost_normalized)
+    if segmentation_vertex_color_random_seed != 0:
+        rng = random.Random(segmentation_vertex_color_random_seed)
+        rng.shuffle(segmantation_colors)
 
-    def _remove_segment_contact(sci: SegmentContactId):
-        sc = sci2segment_contacts.pop(sci)
-        sc.segment0.segment_contact_ids.discard(sci)
-        sc.segment1.segment_contact_ids.discard(sci)
-        for i in range(
-            bisect.bisect_left(cost_sorted_segment_contacts, sc.cost_normalized, key=_get_cost_normalized),
-            len(cost_sorted_segment_contacts),
-        ):
-            if sc != cost_sorted_segment_contacts[i]:
-                continue
-            del cost_sorted_segment_contacts[i]
-            return
+    return segmantation_colors
 
-    result_segments: Set[Segment] = set()
-    result_loop_count: int = 0
 
-    last_merged_cost: float = 0
+def calc_loop_color_indices(segment_result: SegmentResult, loop_count: int) -> np.ndarray:
+    """Return the palette index of each loop, -1 for the loops out of the segments."""
+    tri_segments = segment_result.tri_segments
+    is_segmented = tri_segments >= 0
 
-    is_not_perimeter_cost_factor_0 = perimeter_cost_factor != 0
+    loop_color_indices = np.full(loop_count, -1, dtype=np.int64)
+    tri_color_indices = np.searchsorted(segment_result.segments, tri_segments[is_segmented]) % len(SEGMANTATION_COLORS)
+    loop_color_indices[segment_result.tri_loops[is_segmented]] = tri_color_indices[:, np.newaxis]
+    return loop_color_indices
 
-    merging = True
-    while merging:
-        merging = False
 
-        for segment_contact in cost_sorted_segment_contacts:
-            sci = segment_contact.index
+def get_color_layer(target_bmesh: bmesh.types.BMesh, segmentation_vertex_color_attribute_name: str) -> bmesh.types.BMLayerItem:
+    return target_bmesh.loops.layers.color[segmentation_vertex_color_attribute_name] if segmentation_vertex_color_attribute_name in target_bmesh.loops.layers.color else target_bmesh.loops.layers.color.new(segmentation_vertex_color_attribute_name)
 
-            cost = segment_contact.cost_normalized
-            if cost > cost_threshold:
-                break
 
-            dst_segment = segment_contact.segment0
-            src_segment = segment_contact.segment1
+def assign_vertex_colors(
+    segment_result: SegmentResult,
+    target_bmesh: bmesh.types.BMesh,
+    color_layer: bmesh.types.BMLayerItem,
+    segmentation_vertex_color_random_seed: int,
+):
+    segmantation_colors = _get_segmentation_colors(segmentation_vertex_color_random_seed)
+    loop_color_indices = calc_loop_color_indices(segment_result, int(segment_result.tri_loops.max(initial=-1)) + 1).tolist()
 
-            src_segment_area = src_segment.area
-            if src_segment_area > minimum_area_threshold and dst_segment.area + src_segment_area > maximum_area_threshold:
+    for face in target_bmesh.faces:
+        for loop in face.loops:
+            color_index = loop_color_indices[loop.index]
+            if color_index < 0:
                 continue
+            loop[color_layer] = segmantation_colors[color_index]
 
-            merging = True
-            last_merged_cost = cost
 
-            dst_segment.tri_loop0s.update(src_segment.tri_loop0s)
-            dst_segment.area += src_segment_area
+def get_color_attribute(mesh: bpy.types.Mesh, segmentation_vertex_color_attribute_name: str) -> bpy.types.Attribute:
+    color_attribute = mesh.color_attributes.get(segmentation_vertex_color_attribute_name)
+    if color_attribute is not None and color_attribute.domain == "CORNER":
+        return color_attribute
 
-            _remove_segment_contact(sci)
+    # same as the bmesh loop color layer
+    return mesh.color_attributes.new(segmentation_vertex_color_attribute_name, "BYTE_COLOR", "CORNER")
 
-            dst_segment_contact_ids = dst_segment.segment_contact_ids
-            src_segment_contact_ids = src_segment.segment_contact_ids
-            for src_sci in src_segment_contact_ids:
-                sc = sci2segment_contacts[src_sci]
-                if sc.segment_replace(src_segment, dst_segment):
-                    if sc.segment0 == sc.segment1:
-                        _remove_segment_contact(src_sci)
-                    else:
-                        dst_segment_contact_ids.add(src_sci)
 
-            if len(dst_segment_contact_ids) == 0:
-                # dst_segment is isolated
-                result_segments.add(dst_segment)
-                result_loop_count += len(dst_segment.tri_loop0s)
-                continue
+def get_color_property_name(color_attribute: bpy.types.Attribute) -> str:
+    """Return the raw color property, byte colors are stored in sRGB."""
+    return "color_srgb" if color_attribute.data_type == "BYTE_COLOR" else "color"
 
-            if is_not_perimeter_cost_factor_0:
-                dst_segment.perimeter = dst_segment.non_contact_perimeter + sum(sci2segment_contacts[sci].length for sci in dst_segment_contact_ids)
-
-            # collect mergable segment contacts
-            spi2mergable_segment_contacts: Dict[SegmentPairId, Set[SegmentContact]] = collections.defaultdict(set)
-            for edge_sci in dst_segment_contact_ids:
-                sc = sci2segment_contacts[edge_sci]
-                spi = _to_segment_pair_id(sc.segment0, sc.segment1, segment_pair_shift)
-                spi2mergable_segment_contacts[spi].add(sc)
-
-            # merge mergable segment contacts
-            for mergable_segment_contacts in spi2mergable_segment_contacts.values():
-                if len(mergable_segment_contacts) <= 1:
-                    continue
-
-                mergable_segment_contacts_iter = iter(mergable_segment_contacts)
-                merged_sc = next(mergable_segment_contacts_iter)
-                for sc in mergable_segment_contacts_iter:
-                    merged_sc.cost += sc.cost
-                    merged_sc.length += sc.length
-                    _remove_segment_contact(sc.index)
-
-                for i in range(
-                    bisect.bisect_left(cost_sorted_segment_contacts, merged_sc.cost_normalized, key=_get_cost_normalized),
-                    len(cost_sorted_segment_contacts),
-                ):
-                    if merged_sc != cost_sorted_segment_contacts[i]:
-                        continue
-                    break
-
-                # update the cost and then sort cost_sorted_segment_contacts
-                merged_sc.cost_normalized = (perimeter_cost_factor * merged_sc.calc_perimeter_cost() if is_not_perimeter_cost_factor_0 else 0) + (merged_sc.cost / (merged_sc.length * contact_length_factor if contact_length_factor > 0 else 1))
-                bisect.insort_left(cost_sorted_segment_contacts, cost_sorted_segment_contacts.pop(i), key=_get_cost_normalized)
-
-            # since the cost has been updated, it must enter a new loop to follow the sort results.
-            break
 
-    result_segments.update({s for sc in cost_sorted_segment_contacts for s in (sc.segment0, sc.segment1)})
+def get_loop_colors(color_attribute: bpy.types.Attribute) -> np.ndarray:
+    colors = np.empty(len(color_attribute.data) * 4, dtype=np.float32)
+    color_attribute.data.foreach_get(get_color_property_name(color_attribute), colors)
+    return colors.reshape(-1, 4)
 
-    return SegmentResult(result_segments, cost_sorted_segment_contacts, last_merged_cost, tri_loops)
 
+def set_loop_colors(color_attribute: bpy.types.Attribute, colors: np.ndarray):
+    color_attribute.data.foreach_set(get_color_property_name(color_attribute), colors.ravel())
 
-def get_color_layer(target_bmesh: bmesh.types.BMesh, segmentation_vertex_color_attribute_name: str) -> bmesh.types.BMLayerItem:
-    return target_bmesh.loops.layers.color[segmentation_vertex_color_attribute_name] if segmentation_vertex_color_attribute_name in target_bmesh.loops.layers.color else target_bmesh.loops.layers.color.new(segmentation_vertex_color_attribute_name)
 
+def write_vertex_colors(mesh: bpy.types.Mesh, segment_result: SegmentResult, segmentation_vertex_color_attribute_name: str, segmentation_vertex_color_random_seed: int):
+    if mesh.is_editmode:
+        target_bmesh = bmesh.from_edit_mesh(mesh)
+        assign_vertex_colors(segment_result, target_bmesh, get_color_layer(target_bmesh, segmentation_vertex_color_attribute_name), segmentation_vertex_color_random_seed)
+        bmesh.update_edit_mesh(mesh)
+        return
 
-def assign_vertex_colors(
-    segments: Set[Segment],
-    color_layer: bmesh.types.BMLayerItem,
-    segmentation_vertex_color_random_seed: int,
-):
-    segmantation_colors = SEGMANTATION_COLORS.copy()
-    segmantation_color_count = len(segmantation_colors)
+    color_attribute = get_color_attribute(mesh, segmentation_vertex_color_attribute_name)
+    loop_colors = get_loop_colors(color_attribute)
 
-    if segmentation_vertex_color_random_seed != 0:
-        rng = random.Random(segmentation_vertex_color_random_seed)
-        rng.shuffle(segmantation_colors)
+    loop_color_indices = calc_loop_color_indices(segment_result, len(loop_colors))
+    is_segmented = loop_color_indices >= 0
+    loop_colors[is_segmented] = np.array(_get_segmentation_colors(segmentation_vertex_color_random_seed), dtype=np.float32)[loop_color_indices[is_segmented]]
 
-    for index, segment in enumerate(segments):
-        segmentation_color = segmantation_colors[index % segmantation_color_count]
-        for tri_loop0 in segment.tri_loop0s:
-            tri_loop0[color_layer] = segmentation_color
-            tri_loop0.link_loop_prev[color_layer] = segmentation_color
-            tri_loop0.link_loop_next[color_layer] = segmentation_color
+    set_loop_colors(color_attribute, loop_colors)
+    mesh.update()
 
 
 def paint_selected_face_colors(mesh_object: bpy.types.Object, color: Optional[RGBA], segmentation_vertex_color_attribute_name: str):
-    target_bmesh: bmesh.types.BMesh = bmesh.new()
     mesh: bpy.types.Mesh = mesh_object.data
-    target_bmesh.from_mesh(mesh, face_normals=False, vertex_normals=False)
-    color_layer = get_color_layer(target_bmesh, segmentation_vertex_color_attribute_name)
 
     if color is None:
         color = random.choice(SEGMANTATION_COLORS)
 
-    tri_loops = target_bmesh.calc_loop_triangles()
-    tri_loop: List[bmesh.types.BMLoop]
-    for tri_loop in tri_loops:
-        if not tri_loop[0].face.select:
-            continue
+    if mesh.is_editmode:
+        target_bmesh = bmesh.from_edit_mesh(mesh)
+        color_layer = get_color_layer(target_bmesh, segmentation_vertex_color_attribute_name)
+        for face in target_bmesh.faces:
+            if not face.select:
+                continue
+
+            for loop in face.loops:
+                loop[color_layer] = color
 
-        for loop in tri_loop:
-            loop[color_layer] = color
+        bmesh.update_edit_mesh(mesh)
+        return
 
-    target_bmesh.to_mesh(mesh)
+    color_attribute = get_color_attribute(mesh, segmentation_vertex_color_attribute_name)
+    loop_colors = get_loop_colors(color_attribute)
+
+    # the loops of each face are contiguous from its loop_start
+    loop_colors[np.repeat(_foreach_get(mesh.polygons, "select", bool), _foreach_get(mesh.polygons, "loop_total", np.int64))] = color
+
+    set_loop_colors(color_attribute, loop_colors)
+    mesh.update()
 
 
 def setup_materials(mesh: bpy.types.Mesh, segmentation_vertex_color_attribute_name: str):
@@ -412,192 +816,6 @@ def setup_aovs(aovs: bpy.types.AOVs, segmentation_vertex_color_attribute_name: s
     aov.name = segmentation_vertex_color_attribute_name
 
 
-def _calc_segment_contacts(
-    contact_length_factor: float,
-    face_angle_cost_factor: float,
-    perimeter_cost_factor: float,
-    vertex_group_weight_cost_factor: float,
-    vertex_group_change_cost_factor: float,
-    material_change_cost_factor: float,
-    edge_sharp_cost_factor: float,
-    edge_seam_cost_factor: float,
-    vi2vgi2weights: Dict[int, Dict[int, float]],
-    target_bmesh: bmesh.types.BMesh,
-    tri_loops: List[bmesh.types.BMLoop],
-) -> Tuple[Dict[SegmentContactId, SegmentContact], int]:
-    vertex_count = len(target_bmesh.verts)
-    vertex_pair_shift = int(math.log2(vertex_count) / 2 + 1)
-
-    vpi2weights: Dict[VertexPairId, float] = {}
-
-    def _calc_vertex_group_weight_cost(vert0: bmesh.types.BMVert, vert1: bmesh.types.BMVert) -> float:
-        vpi = _to_vertex_pair_id(vert0, vert1, vertex_pair_shift)
-        if vpi in vpi2weights:
-            return vpi2weights[vpi]
-
-        vgi2weights0 = vi2vgi2weights[vert0.index]
-        vgi2weights1 = vi2vgi2weights[vert1.index]
-
-        weight = 0.0
-        for vgi0, weight0 in vgi2weights0.items():
-            weight += abs(weight0 - vgi2weights1.get(vgi0, 0.0))
-
-        for vgi1, weight1 in vgi2weights1.items():
-            weight += abs(weight1 - vgi2weights0.get(vgi1, 0.0))
-
-        return vpi2weights.setdefault(vpi, weight)
-
-    tli2heaviest_vgi: Dict[TriLoopIndex, int] = {}
-
-    def _calc_heaviest_vertex_group_index(tli: TriLoopIndex, loop: bmesh.types.BMLoop) -> int:
-        if tli in tli2heaviest_vgi:
-            return tli2heaviest_vgi[tli]
-
-        max_vgi: int = -1
-        max_weight: float = -1.0
-        vgi2weights: Dict[int, float] = {}
-        for vgi, weight in itertools.chain(
-            vi2vgi2weights[loop.vert.index].items(),
-            vi2vgi2weights[loop.link_loop_next.vert.index].items(),
-            vi2vgi2weights[loop.link_loop_prev.vert.index].items(),
-        ):
-            weight += vgi2weights.get(vgi, 0)
-            if weight > max_weight:
-                max_vgi = vgi
-                max_weight = weight
-            vgi2weights[vgi] = weight
-        return tli2heaviest_vgi.setdefault(tli, max_vgi)
-
-    # loop_pair_id
-    processed_loop_pair_ids: Set[LoopPairId] = set()
-
-    __next_segment_id: int = 0
-
-    def _new_segment():
-        nonlocal __next_segment_id
-        __next_segment_id += 1
-        return Segment(__next_segment_id)
-
-    loop_count = 3 * len(tri_loops)
-    loop_pair_shift = int(math.log2(loop_count) / 2 + 1)
-
-    # tri_loop_index to segment map
-    tli2segment: Dict[TriLoopIndex, Segment] = collections.defaultdict(_new_segment)
-
-    # segment_contact_index to segment_contact map
-    sci2segment_contacts: Dict[SegmentContactId, SegmentContact] = {}
-
-    half_pi_inverse = 2 / math.pi
-
-    next_segment_contact_id: SegmentContactId = 0
-
-    tri_loop: List[bmesh.types.BMLoop]
-    for tri_loop in tri_loops:
-        tri_loop0 = tri_loop[0]
-        this_face = tri_loop0.face
-
-        if not this_face.select:
-            continue
-
-        this_tli = _to_tri_loop_index(tri_loop0)
-        this_heaviest_vertex_group_index = _calc_heaviest_vertex_group_index(this_tli, tri_loop0)
-
-        this_segment = tli2segment[this_tli]
-        v0: mathutils.Vector = tri_loop0.vert.co
-        v1: mathutils.Vector = tri_loop[1].vert.co
-        v2: mathutils.Vector = tri_loop[2].vert.co
-        this_segment.area = mathutils.geometry.area_tri(v0, v1, v2)  # pylint: disable=assignment-from-no-return
-        this_segment.perimeter = (v0 - v1).length + (v1 - v2).length + (v2 - v0).length
-        this_segment.tri_loop0s.add(tri_loop0)
-
-        this_segment_contact_perimeter = 0.0
-
-        for this_loop in tri_loop:
-            edge_length = -1
-            that_loop = this_loop
-            while (that_loop := that_loop.link_loop_radial_next) != this_loop:
-                lpi = _to_loop_pair_id(this_loop, that_loop, loop_pair_shift)
-                if lpi in processed_loop_pair_ids:
-                    continue
-                processed_loop_pair_ids.add(lpi)
-
-                that_face = that_loop.face
-                if not that_face.select:
-                    continue
-
-                if edge_length < 0:
-                    this_edge = this_loop.edge
-                    edge_length = this_edge.calc_length()
-                    this_verts = this_edge.verts
-                    vert0 = this_verts[0]
-                    vert1 = this_verts[1]
-                    this_vert2 = this_loop.link_loop_prev.vert
-
-                    this_loop_vertex_group_weight_cost = _calc_vertex_group_weight_cost(vert0, this_vert2) + _calc_vertex_group_weight_cost(vert1, this_vert2)
-                    this_loop_edge_sharp_cost = 0 if this_edge.smooth else 1
-                    this_loop_edge_seam_cost = 1 if this_edge.seam else 0
-
-                    # cost:sharp = 1:1
-                    cost_edge_sharp = edge_length * this_loop_edge_sharp_cost
-
-                    # cost:seam = 1:1
-                    cost_edge_seam = edge_length * this_loop_edge_seam_cost
-
-                that_tli = _to_tri_loop_index(that_loop)
-                that_heaviest_vertex_group_index = _calc_heaviest_vertex_group_index(that_tli, that_loop)
-                that_vert2 = that_loop.link_loop_prev.vert
-                that_segment = tli2segment[that_tli]
-
-                # cost:vertex weight = 1:1
-                cost_vertex_group_weight = edge_length * 0.25 * (this_loop_vertex_group_weight_cost + _calc_vertex_group_weight_cost(vert0, that_vert2) + _calc_vertex_group_weight_cost(vert1, that_vert2))
-
-                # cost:vertex group change = 1:1
-                cost_vertex_group_change = edge_length * (0 if this_heaviest_vertex_group_index == that_heaviest_vertex_group_index else 1)
-
-                # cost:angle = 1:90 degrees
-                cost_face_angle = edge_length * half_pi_inverse * this_loop.calc_normal().angle(that_loop.calc_normal())
-
-                # cost:material = 1:1
-                cost_material_change = edge_length * (0 if this_face.material_index == that_face.material_index else 1)
-
-                cost_total = sum(
-                    (
-                        vertex_group_weight_cost_factor * cost_vertex_group_weight,
-                        vertex_group_change_cost_factor * cost_vertex_group_change,
-                        face_angle_cost_factor * cost_face_angle,
-                        material_change_cost_factor * cost_material_change,
-                        edge_sharp_cost_factor * cost_edge_sharp,
-                        edge_seam_cost_factor * cost_edge_seam,
-                    )
-                )
-
-                segment_contact = SegmentContact(
-                    next_segment_contact_id := next_segment_contact_id + 1,
-                    cost_total,
-                    cost_total / (edge_length * contact_length_factor if contact_length_factor > 0 else 1),
-                    edge_length,
-                    this_segment,
-                    that_segment,
-                )
-                this_segment_contact_perimeter += edge_length
-                sci2segment_contacts[segment_contact.index] = segment_contact
-                this_segment.segment_contact_ids.add(segment_contact.index)
-                that_segment.segment_contact_ids.add(segment_contact.index)
-
-        this_segment.non_contact_perimeter = this_segment.perimeter - this_segment_contact_perimeter
-
-    if perimeter_cost_factor != 0:
-        for segment_contact in sci2segment_contacts.values():
-            segment_contact.cost_normalized += perimeter_cost_factor * segment_contact.calc_perimeter_cost()
-
-    return sci2segment_contacts, len(tli2segment)
-
-
-def _calc_vi2vgi2weights(target_bmesh: bmesh.types.BMesh, ignore_vertex_group_indices: Set[int]) -> Dict[int, Dict[int, float]]:
-    deform_layer = target_bmesh.verts.layers.deform.verify()
-    return {v.index: {vgi: weight for vgi, weight in v[deform_layer].items() if vgi not in ignore_vertex_group_indices} for v in target_bmesh.verts}
-
-
 def get_ignore_vertex_group_indices(mesh_object: bpy.types.Object) -> Set[int]:
     deform_bone_names = {b.name for m in mesh_object.modifiers if m.is_active and m.type == "ARMATURE" for b in m.object.data.bones if b.use_deform}
 
@@ -0,0 +1,73 @@
+# Copyright 2026 MMD Tools Append authors
+# This file is part of MMD Tools Append.
+
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+import bpy
+import mathutils
+import numpy as np
+from mathutils import Vector
+
+
+class VertexSpatialIndex:
+    """World space nearest vertex lookup with a KD-tree cached per mesh object.
+
+    A cached tree is reused while the world space vertex coordinates of the mesh are unchanged.
+    """
+
+    def __init__(self, max_cached_trees: int = 16):
+        self.max_cached_trees = max_cached_trees
+        # object session_uid -> (coordinates hash, KD-tree)
+        self._trees: "OrderedDict[int, Tuple[int, mathutils.kdtree.KDTree]]" = OrderedDict()
+
+    @staticmethod
+    def world_coordinates(mesh_object: bpy.types.Object) -> np.ndarray:
+        vertices = mesh_object.data.vertices
+        coordinates = np.empty(len(vertices) * 3, dtype=np.float32)
+        vertices.foreach_get("co", coordinates)
+
+        matrix = np.array(mesh_object.matrix_world, dtype=np.float32)
+        return coordinates.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+
+    def get_kdtree(self, mesh_object: bpy.types.Object) -> mathutils.kdtree.KDTree:
+        coordinates = self.world_coordinates(mesh_object)
+        coordinates_hash = hash(coordinates.tobytes())
+
+        cached = self._trees.get(mesh_object.session_uid)
+        if cached is not None and cached[0] == coordinates_hash:
+            self._trees.move_to_end(mesh_object.session_uid)
+            return cached[1]
+
+        kdtree = mathutils.kdtree.KDTree(len(coordinates))
+        for i, co in enumerate(coordinates.tolist()):
+            kdtree.insert(co, i)
+        kdtree.balance()
+
+        self._trees[mesh_object.session_uid] = (coordinates_hash, kdtree)
+        self._trees.move_to_end(mesh_object.session_uid)
+        while len(self._trees) > self.max_cached_trees:
+            self._trees.popitem(last=False)
+
+        return kdtree
+
+    def find_nearest(self, mesh_objects: Iterable[bpy.types.Object], coordinates: Iterable[Vector]) -> List[Optional[Tuple[bpy.types.Object, int, float]]]:
+        """Return the nearest (mesh object, vertex index, distance) for each coordinate, or None if no vertices."""
+        object_kdtrees = [(o, self.get_kdtree(o)) for o in mesh_objects if len(o.data.vertices) > 0]
+
+        nearests: List[Optional[Tuple[bpy.types.Object, int, float]]] = []
+        for co in coordinates:
+            nearest: Optional[Tuple[bpy.types.Object, int, float]] = None
+            for mesh_object, kdtree in object_kdtrees:
+                _co, index, distance = kdtree.find(co)
+                if nearest is None or distance < nearest[2]:
+                    nearest = (mesh_object, index, distance)
+            nearests.append(nearest)
+
+        return nearests
+
+    def clear(self):
+        self._trees.clear()
+
+
+VERTEX_SPATIAL_INDEX = VertexSpatialIndex()
@@ -19,6 +19,7 @@ from .converters.armatures.operators import (
     MMDRigifyDerigger,
     MMDRigifyIntegrateFocusOnMMD,
     MMDRigifyIntegrateFocusOnRigify,
+    MMDRigifyProfileDrivers,
     MMDRigifyTranslator,
 )
 from .converters.physics.cloth import ConvertRigidBodyToClothOperator, RemoveMeshCloth, SelectClothMesh
@@ -103,6 +104,8 @@ class OperatorPanel(bpy.types.Panel):
         row.operator_context = "INVOKE_DEFAULT"
         row.operator(MMDRigifyIntegrateFocusOnRigify.bl_idname, text="", icon="WINDOW")
 
+        grid.row(align=True).operator(MMDRigifyProfileDrivers.bl_idname, icon="MOD_TIME")
+
         col = layout.column(align=True)
         col.label(text="Rigify to MMD:", icon="OUTLINER_OB_ARMATURE")
         grid = col.grid_flow(row_major=True, align=True)
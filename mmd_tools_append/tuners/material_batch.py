@@ -0,0 +1,258 @@
+# Copyright 2026 MMD Tools Append authors
+# This file is part of MMD Tools Append.
+
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import bpy
+
+from ..editors.libraries import LIBRARY_MANAGER
+from ..editors.nodes import MaterialEditor
+from ..tuners import material_tuners
+
+# (tuner id, keywords), the first match wins
+# the Japanese keywords match anywhere in a name, the Latin keywords match whole words
+_CLASSIFICATION_KEYWORDS: List[Tuple[str, Tuple[str, ...]]] = [
+    # before the eye highlight, the hair highlights are hair
+    ("MATERIAL_HAIR_MATTE", ("髪", "hair", "hairs")),
+    ("MATERIAL_EYE_HIGHLIGHT", ("ハイライト", "eye highlight", "eyehighlight")),
+    ("MATERIAL_EYE_WHITE", ("白目", "eyewhite", "eye white", "sclera")),
+    ("MATERIAL_EYE_LASH", ("まつげ", "まつ毛", "睫毛", "eyelash", "eyelashes", "lash", "lashes")),
+    ("MATERIAL_EYE_IRIS", ("瞳", "iris", "pupil")),
+    ("MATERIAL_SKIN_MUCOSA", ("口", "舌", "mouth", "tongue")),
+    ("MATERIAL_SKIN_BUMP", ("肌", "顔", "skin", "face")),
+    ("MATERIAL_STONE_GEM", ("宝石", "gem", "jewel")),
+    ("MATERIAL_METAL_BASE", ("金属", "metal")),
+    ("MATERIAL_FABRIC_COTTON", ("服", "布", "cloth", "fabric")),
+]
+
+_MATERIAL_PROPERTY_NAMES = ("blend_method", "show_transparent_back", "use_screen_refraction", "refraction_depth")
+
+# nodes keeping their settings in read only data, which is not copied
+_UNCOPYABLE_NODE_TYPES = {"ShaderNodeValToRGB", "ShaderNodeRGBCurve", "ShaderNodeVectorCurve", "ShaderNodeFloatCurve"}
+
+_SKIPPED_NODE_PROPERTY_NAMES = {"rna_type", "name", "location", "parent", "select", "dimensions", "internal_links", "inputs", "outputs"}
+
+
+def _to_words(text: str) -> str:
+    """Split the name at the separators, the digits and the camel case, and join the words with single spaces around."""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    return " " + " ".join(w for w in re.split(r"[\s_.\-\d]+", text.lower()) if w) + " "
+
+
+def _match_keyword(keyword: str, name: str, words: str) -> bool:
+    if keyword.isascii():
+        return f" {keyword} " in words
+    return keyword in name
+
+
+def classify_material(material: bpy.types.Material) -> Optional[str]:
+    """Guess the tuner id from the names of the material and its base texture, None if unknown."""
+    names = [material.name]
+
+    if material.node_tree is not None:
+        base_texture_node = MaterialEditor(material).get_base_texture_node()
+        if base_texture_node is not None and base_texture_node.image is not None:
+            names.append(base_texture_node.image.name)
+
+    names_words = [(n, _to_words(n)) for n in names]
+    for tuner_id, keywords in _CLASSIFICATION_KEYWORDS:
+        if any(_match_keyword(k, n, w) for n, w in names_words for k in keywords):
+            return tuner_id
+
+    return None
+
+
+@dataclass
+class MaterialTuningReport:
+    material_count: int
+    template_count: int
+    copied_count: int
+    library_load_count: int
+    seconds: float
+
+
+class _NodeTreeSnapshot:
+    """Nodes, socket values and links of a material node tree, compared before and after running a tuner."""
+
+    def __init__(self, node_tree: bpy.types.NodeTree):
+        self.node_names: Set[str] = {n.name for n in node_tree.nodes}
+        self.node_states: Dict[str, Any] = {n.name: self._to_node_state(n) for n in node_tree.nodes if not isinstance(n, bpy.types.ShaderNodeOutputMaterial)}
+        self.links: Set[Tuple[str, str, str, str]] = {self.to_link_key(k) for k in node_tree.links}
+        self.layout: Tuple = tuple(sorted((n.bl_idname, n.name, n.label, tuple(o.name for o in n.outputs)) for n in node_tree.nodes))
+
+    @staticmethod
+    def to_link_key(link: bpy.types.NodeLink) -> Tuple[str, str, str, str]:
+        return (link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier)
+
+    @staticmethod
+    def _to_value(value: Any) -> Any:
+        return tuple(value) if hasattr(value, "__len__") and not isinstance(value, str) else value
+
+    @classmethod
+    def _to_node_state(cls, node: bpy.types.Node) -> Tuple:
+        return (
+            getattr(node, "node_tree", None),
+            node.parent.name if node.parent else None,
+            tuple(cls._to_value(s.default_value) for s in node.inputs if hasattr(s, "default_value")),
+        )
+
+    def is_unchanged(self, node: bpy.types.Node) -> bool:
+        return self.node_states.get(node.name) == self._to_node_state(node)
+
+
+class _MaterialTemplate:
+    """Nodes added by a tuner to a material, to be copied to the other materials having the same node layout."""
+
+    def __init__(self, material: bpy.types.Material, before: _NodeTreeSnapshot):
+        self.material = material
+        node_tree = material.node_tree
+
+        node_frame = MaterialEditor(material).find_node_frame()
+        self.nodes: List[bpy.types.Node] = [] if node_frame is None else [n for n in node_tree.nodes if n == node_frame or self._is_in_frame(n, node_frame)]
+        node_names = {n.name for n in self.nodes}
+
+        self.links: List[Tuple[str, str, str, str]] = [_NodeTreeSnapshot.to_link_key(k) for k in node_tree.links if k.from_node.name in node_names or k.to_node.name in node_names]
+        replaced_sockets = {(k[2], k[3]) for k in self.links}
+
+        self.is_copyable = (
+            len(self.nodes) > 0
+            and node_names.isdisjoint(before.node_names)
+            and all(n.bl_idname not in _UNCOPYABLE_NODE_TYPES for n in self.nodes)
+            # the tuner neither added nodes outside the frame nor edited them, except linking to them
+            and {n.name for n in node_tree.nodes} == before.node_names | node_names
+            and all(before.is_unchanged(n) for n in node_tree.nodes if n.name in before.node_states)
+            and {k for k in before.links if (k[2], k[3]) not in replaced_sockets} == {k for k in map(_NodeTreeSnapshot.to_link_key, node_tree.links) if k[0] not in node_names and k[2] not in node_names}
+        )
+
+    @staticmethod
+    def _is_in_frame(node: bpy.types.Node, node_frame: bpy.types.NodeFrame) -> bool:
+        parent = node.parent
+        while parent is not None:
+            if parent == node_frame:
+                return True
+            parent = parent.parent
+        return False
+
+    @staticmethod
+    def _copy_socket_values(from_sockets, to_sockets):
+        to_sockets = {s.identifier: s for s in to_sockets}
+        for from_socket in from_sockets:
+            to_socket = to_sockets.get(from_socket.identifier)
+            if to_socket is None or not hasattr(from_socket, "default_value"):
+                continue
+            try:
+                to_socket.default_value = from_socket.default_value
+            except (AttributeError, TypeError, ValueError):
+                pass
+
+    @staticmethod
+    def _copy_node_properties(from_node: bpy.types.Node, to_node: bpy.types.Node):
+        for prop in from_node.bl_rna.properties:
+            if prop.is_readonly or prop.type == "COLLECTION" or prop.identifier.startswith("bl_") or prop.identifier in _SKIPPED_NODE_PROPERTY_NAMES:
+                continue
+            try:
+                setattr(to_node, prop.identifier, getattr(from_node, prop.identifier))
+            except (AttributeError, TypeError, ValueError):
+                pass
+
+    def copy_to(self, material: bpy.types.Material) -> bool:
+        """Copy the nodes and the material settings, return False if a node linked from the template is missing."""
+        node_tree = material.node_tree
+        nodes = node_tree.nodes
+
+        template_node_names = {n.name for n in self.nodes}
+        if any(n not in nodes for k in self.links for n in (k[0], k[2]) if n not in template_node_names):
+            return False
+
+        name2node: Dict[str, bpy.types.Node] = {}
+        for template_node in self.nodes:
+            node = nodes.new(template_node.bl_idname)
+            node.name = template_node.name
+            self._copy_node_properties(template_node, node)
+            self._copy_socket_values(template_node.inputs, node.inputs)
+            self._copy_socket_values(template_node.outputs, node.outputs)
+            name2node[template_node.name] = node
+
+        # the same order as the tuners, location and then parent
+        for template_node in self.nodes:
+            node = name2node[template_node.name]
+            node.location = template_node.location
+            if template_node.parent is not None:
+                node.parent = name2node[template_node.parent.name]
+
+        for from_node_name, from_socket_identifier, to_node_name, to_socket_identifier in self.links:
+            from_node = name2node.get(from_node_name) or nodes[from_node_name]
+            to_node = name2node.get(to_node_name) or nodes[to_node_name]
+            from_socket = next(s for s in from_node.outputs if s.identifier == from_socket_identifier)
+            to_socket = next(s for s in to_node.inputs if s.identifier == to_socket_identifier)
+            node_tree.links.new(from_socket, to_socket)
+
+        MaterialEditor(material).get_output_node().location = MaterialEditor(self.material).get_output_node().location
+
+        for name in _MATERIAL_PROPERTY_NAMES:
+            setattr(material, name, getattr(self.material, name))
+
+        return True
+
+
+class MaterialTuningBatch:
+    """Tune many materials, running each tuner only once per material node layout.
+
+    The first material of a tuner and node layout is tuned by the tuner and becomes the template,
+    the other materials of the same layout get the template nodes copied instead.
+    The node groups are appended from the library only when the templates are built.
+    """
+
+    def __init__(self, material2tuner_id: Dict[bpy.types.Material, str]):
+        self.material2tuner_id = material2tuner_id
+
+    @staticmethod
+    def _set_thumbnails(material: bpy.types.Material, tuner_id: str):
+        # disable update to avoid tuning again
+        material.mmd_tools_append_material.update = False
+        material.mmd_tools_append_material.thumbnails = tuner_id
+        material.mmd_tools_append_material.update = True
+
+    def execute(self) -> MaterialTuningReport:
+        start_time = time.perf_counter()
+        start_load_count = LIBRARY_MANAGER.load_count
+
+        # (tuner id, node layout) -> template, None if not copyable
+        templates: Dict[Tuple[str, Tuple], Optional[_MaterialTemplate]] = {}
+        copied_count = 0
+
+        for material, tuner_id in self.material2tuner_id.items():
+            if not material.use_nodes:
+                material.use_nodes = True
+
+            editor = MaterialEditor(material)
+            editor.reset()
+            before = _NodeTreeSnapshot(material.node_tree)
+            key = (tuner_id, before.layout)
+
+            template = templates.get(key)
+            if template is not None and template.copy_to(material):
+                copied_count += 1
+            else:
+                material_tuners.TUNERS[tuner_id](material).execute()
+                if key not in templates:
+                    template = _MaterialTemplate(material, before)
+                    templates[key] = template if template.is_copyable else None
+
+            self._set_thumbnails(material, tuner_id)
+
+        return MaterialTuningReport(
+            len(self.material2tuner_id),
+            sum(1 for t in templates.values() if t is not None),
+            copied_count,
+            LIBRARY_MANAGER.load_count - start_load_count,
+            time.perf_counter() - start_time,
+        )
+
+    @staticmethod
+    def collect_materials(objects: Iterable[bpy.types.Object]) -> List[bpy.types.Material]:
+        """Return the materials of the objects, each once."""
+        return list(dict.fromkeys(s.material for o in objects for s in o.material_slots if s.material is not None))
@@ -2,9 +2,11 @@
 # This file is part of MMD Tools Append.
 
 import bpy
+from bpy.app.translations import pgettext as _
 
 from ..editors.nodes import MaterialEditor
 from ..tuners import lighting_tuners, material_adjusters, material_tuners
+from ..tuners.material_batch import MaterialTuningBatch, classify_material
 from ..tuners.geometry_nodes_tuners import TUNERS, GeometryNodesUtilities
 
 
@@ -80,32 +82,47 @@ class CopyTuneMaterialSettings(bpy.types.Operator):
         if context.active_object:
             targets.add(context.active_object)
 
-        for obj in targets:
-            if obj == context.active_object and not self.to_active:
-                continue
+        targets = [o for o in targets if (self.to_active if o == context.active_object else self.to_selection)]
+        materials = [m for m in MaterialTuningBatch.collect_materials(targets) if m != active]
 
-            if obj != context.active_object and not self.to_selection:
-                continue
+        tuning_report = MaterialTuningBatch({m: active.mmd_tools_append_material.thumbnails for m in materials}).execute()
 
-            for i in obj.material_slots:
-                # usual checks
-                if not i.material or i.material == active:
-                    continue
-                if not i.material.use_nodes:
-                    i.material.use_nodes = True
+        # copy values from active material
+        for material in materials:
+            MaterialEditor(material).copy_node_group_inputs(active)
+
+        self.report({"INFO"}, _("Tuned {0} materials ({1} copied from templates) in {2:.3f} sec").format(tuning_report.material_count, tuning_report.copied_count, tuning_report.seconds))
+        return {"FINISHED"}
 
-                mat = i.material
-                material_tuners.TUNERS[active.mmd_tools_append_material.thumbnails](mat).execute()
 
-                # disable update to keep active material
-                mat.mmd_tools_append_material.update = False
-                mat.mmd_tools_append_material.thumbnails = active.mmd_tools_append_material.thumbnails
-                mat.mmd_tools_append_material.update = True
+class AutoTuneMaterials(bpy.types.Operator):
+    bl_idname = "mmd_tools_append.auto_tune_materials"
+    bl_label = "Auto Tune Materials"
+    bl_description = "Tune the materials of the selected objects, choosing the Append material from the material and texture names.\nThe materials not recognized are kept as is"
+    bl_options = {"REGISTER", "UNDO"}
 
-                # copy values from active material
-                mat_editor = MaterialEditor(mat)
-                mat_editor.copy_node_group_inputs(active)
+    @classmethod
+    def poll(cls, context):
+        return len(context.selected_objects) > 0
 
+    def execute(self, context):
+        material2tuner_id = {}
+        for material in MaterialTuningBatch.collect_materials(context.selected_objects):
+            tuner_id = classify_material(material)
+            if tuner_id is not None:
+                material2tuner_id[material] = tuner_id
+
+        tuning_report = MaterialTuningBatch(material2tuner_id).execute()
+
+        self.report(
+            {"INFO"},
+            _("Tuned {0} materials ({1} copied from templates, {2} library loads) in {3:.3f} sec").format(
+                tuning_report.material_count,
+                tuning_report.copied_count,
+                tuning_report.library_load_count,
+                tuning_report.seconds,
+            ),
+        )
         return {"FINISHED"}
 
 
@@ -16,7 +16,7 @@ from ..tuners.material_adjusters import (
     MaterialAdjusterUtilities,
     WetAdjuster,
 )
-from ..tuners.operators import AttachMaterialAdjuster, CopyTuneMaterialSettings, DetachMaterialAdjuster, FreezeLighting
+from ..tuners.operators import AttachMaterialAdjuster, AutoTuneMaterials, CopyTuneMaterialSettings, DetachMaterialAdjuster, FreezeLighting
 from ..utilities import is_mmd_tools_installed
 
 
@@ -155,6 +155,8 @@ class MaterialPanel(bpy.types.Panel):
         op.to_active = False
         op.to_selection = True
 
+        grid.row(align=True).operator(AutoTuneMaterials.bl_idname, icon="SHADING_TEXTURE")
+
         utilities = MaterialEditor(material)
         node_frame = utilities.find_node_frame()
         if node_frame is None:
@@ -1,11 +1,9 @@
 # Copyright 2021 UuuNyaa <UuuNyaa@gmail.com>
 # This file is part of MMD Tools Append.
 
-import os
-
 import bpy
 
-from ..utilities import raise_installation_error
+from ..editors.libraries import LIBRARY_MANAGER
 
 
 class ObjectMarker:
@@ -55,15 +53,7 @@ class ObjectAppender(ObjectMarker):
         self.unmark(target)
 
     def append_collection(self, collection_name: str):
-        if collection_name not in bpy.data.collections:
-            path = os.path.join(self.blend_filename)
-
-            try:
-                with bpy.data.libraries.load(path, link=False) as (_, data_to):
-                    data_to.collections = [collection_name]
-            except OSError as exception:
-                raise_installation_error(exception)
-
+        LIBRARY_MANAGER.append(self.blend_filename, "collections", [collection_name])
         return bpy.data.collections[collection_name]
 
     def append_objects_from_collection(self, collection_name: str, target_collection: bpy.types.Collection = None):